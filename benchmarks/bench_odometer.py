@@ -0,0 +1,93 @@
+"""
+Odometer block writer (and the NumPy engine, when installed) vs. the old
+per-word "".join + write loop.
+
+Usage: python benchmarks/bench_odometer.py [--mask ?l?l?l?d?d] [--chars a,b,c,d,e,f,g,h] [--len 7]
+
+Every path writes the same candidates to a temp dir; the script checks the
+files are byte-identical and prints words/sec for each.
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from core import engine
+from core.mask import Mask
+
+
+def legacy_product(pools, output_file):
+    """The pre-odometer loop: one join, one concat and one write per word."""
+    count = 0
+    with open(output_file, 'w', encoding='utf-8', buffering=engine.BUFFER_SIZE, newline='\n') as f:
+        for p in itertools.product(*pools):
+            f.write("".join(p) + '\n')
+            count += 1
+    return count
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    count = fn(*args, **kwargs)
+    return count, time.perf_counter() - t0
+
+
+def compare(name, legacy, engines, tmp):
+    """Runs the legacy loop and every (label, fn) in engines; all outputs must match."""
+    old_path = os.path.join(tmp, "legacy.txt")
+    n_old, t_old = timed(legacy, old_path)
+    with open(old_path, 'rb') as f:
+        expected = f.read()
+
+    print(f"{name}")
+    print(f"  {'legacy':<9}: {n_old:>12,} words  {t_old:7.2f}s  {n_old / t_old:>14,.0f} words/s")
+    ok = True
+    for label, fn in engines:
+        new_path = os.path.join(tmp, f"{label}.txt")
+        n_new, t_new = timed(fn, new_path)
+        with open(new_path, 'rb') as f:
+            identical = f.read() == expected
+        ok &= identical
+        print(f"  {label:<9}: {n_new:>12,} words  {t_new:7.2f}s  {n_new / t_new:>14,.0f} words/s"
+              f"  {t_old / t_new:5.1f}x  identical: {identical}")
+    return ok
+
+
+def backends():
+    return ["python", "numpy"] if engine.np is not None else ["python"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mask", default="?l?l?l?d?d")
+    parser.add_argument("--chars", default="a,b,c,d,e,f,g,h")
+    parser.add_argument("--len", type=int, default=7)
+    args = parser.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        pools = Mask(args.mask).positions
+        ok &= compare(
+            f"mask {args.mask}",
+            lambda path: legacy_product(pools, path),
+            [(b, lambda path, b=b: engine.generate_from_mask(args.mask, path, backend=b)) for b in backends()],
+            tmp,
+        )
+
+        charset = engine._parse_charset(args.chars)
+        ok &= compare(
+            f"brute force {args.chars} x {args.len}",
+            lambda path: legacy_product([charset] * args.len, path),
+            [(b, lambda path, b=b: engine.generate_brute_force(args.chars, args.len, args.len, path, backend=b))
+             for b in backends()],
+            tmp,
+        )
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
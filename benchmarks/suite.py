@@ -0,0 +1,306 @@
+"""
+Reference workloads for every engine function, with a JSON baseline and a
+regression check.
+
+Usage:
+  python benchmarks/suite.py run [--out results.json] [--only mask rules ...] [--scale 0.1] [--repeat 3]
+  python benchmarks/suite.py compare baseline.json results.json [--threshold 0.10] [--memory-threshold 0.25]
+  python benchmarks/suite.py list
+
+'run' builds the synthetic inputs once (seeded, so every machine gets the same
+files), then runs each workload in a fresh process so its peak RSS is its own.
+Each result holds words, bytes, seconds, the stage timings of core.metrics and a
+'rate' (words/s; input bytes/s for the scan and the index build, queries/s for
+indexed search). With --repeat the best
+run is kept. --scale shrinks every workload (0.1 for a quick pass); results are
+only comparable at the same scale.
+
+'compare' flags every workload whose rate dropped by more than --threshold or
+whose peak RSS grew by more than --memory-threshold, and exits 1 if any did.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from core import engine
+from core.metrics import Metrics, peak_rss
+
+PROFILE = dict(first="John", middle="Paul", last="Smith", aliases="jsmith, johnny", usernames="js1985",
+               extra="london, arsenal, rex", dob="14/03/1985", special_chars="!,@,#,$", enable_leet=True)
+RULE_FUNCS = ["l", "u", "c", "C", "t", "r", "d", "f", "{", "}", "[", "]", "q", "k", "K", "E",
+              "T{n}", "p{n}", "D{n}", "'{n}", "z{n}", "Z{n}", "${c}", "^{c}", "@{c}", "s{c}{c}", "i{n}{c}",
+              "o{n}{c}", "<{n}", ">{n}", "!{c}", "/{c}"]
+RULE_CHARS = "abeiost0123456789!@#$"
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+SEARCH_WORD_BYTES = 9  # ?l?l?l?l?l?l?d plus newline
+SEARCH_QUERY_ROUNDS = 25
+
+
+def scaled(n, scale):
+    return max(1, int(n * scale))
+
+
+def synthetic_words(path, count, seed, min_len=4, max_len=12):
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        for _ in range(count):
+            f.write("".join(rng.choices(ALPHABET, k=rng.randint(min_len, max_len))) + "\n")
+
+
+def synthetic_rules(path, count, seed):
+    """count valid rule lines of one to three functions (rejects included)."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="latin-1", newline="\n") as f:
+        for _ in range(count):
+            funcs = rng.sample(RULE_FUNCS, rng.randint(1, 3))
+            f.write(" ".join(fn.replace("{n}", str(rng.randint(0, 9)), 1)
+                             .replace("{n}", str(rng.randint(0, 9)))
+                             .replace("{c}", rng.choice(RULE_CHARS), 1)
+                             .replace("{c}", rng.choice(RULE_CHARS)) for fn in funcs) + "\n")
+
+
+def prepare_inputs(workdir, scale, names):
+    """Builds the inputs the selected workloads need (kept between runs of the same scale)."""
+    inputs = {
+        "words_1m": os.path.join(workdir, "words_1m.txt"),
+        "words_b": os.path.join(workdir, "words_b.txt"),
+        "rule_words": os.path.join(workdir, "rule_words.txt"),
+        "rules_1k": os.path.join(workdir, "rules_1k.rule"),
+        "search_1g": os.path.join(workdir, "search_1g.txt"),
+    }
+    needs = {
+        "words_1m": {"combinator", "hybrid"},
+        "words_b": {"combinator"},
+        "rule_words": {"rules"},
+        "rules_1k": {"rules"},
+        "search_1g": {"search_scan", "search_indexed", "index_build"},
+    }
+    builders = {
+        "words_1m": lambda path: synthetic_words(path, scaled(1_000_000, scale), seed=1),
+        "words_b": lambda path: synthetic_words(path, 20, seed=2, max_len=6),
+        "rule_words": lambda path: synthetic_words(path, scaled(20_000, scale), seed=3),
+        "rules_1k": lambda path: synthetic_rules(path, 1000, seed=4),
+        "search_1g": lambda path: engine.generate_from_mask(
+            "?l?l?l?l?l?l?d", path, limit=scaled(2**30 // SEARCH_WORD_BYTES, scale)),
+    }
+    for key, path in inputs.items():
+        if needs[key] & set(names) and not os.path.exists(path):
+            print(f"  building {os.path.basename(path)}...", flush=True)
+            builders[key](path)
+    return inputs
+
+
+# Workloads: name -> (description, fn(inputs, out_path, scale, metrics)). A workload
+# returning None is rated in words/s; otherwise it returns (amount, unit) and is rated in amount/s.
+
+def w_profile(depth):
+    def run(inputs, out, scale, metrics):
+        engine.generate_wordlist(output_file=out, min_len=4, max_len=16 if depth == 3 else 12,
+                                 depth=depth, metrics=metrics, pool_cache=False, **PROFILE)
+    return run
+
+
+def w_mask(inputs, out, scale, metrics):
+    engine.generate_from_mask("?l?l?l?d?d?d", out, limit=scaled(17_576_000, scale), metrics=metrics)
+
+
+def w_brute_force(inputs, out, scale, metrics):
+    engine.generate_brute_force("a,b,c,d,e,f,g,h,i,j", 1, 7, out, limit=scaled(11_111_110, scale), metrics=metrics)
+
+
+def w_combinator(inputs, out, scale, metrics):
+    engine.combinator_tool(inputs["words_1m"], inputs["words_b"], out, metrics=metrics)
+
+
+def w_hybrid(inputs, out, scale, metrics):
+    engine.hybrid_tool(inputs["words_1m"], "?d", out, metrics=metrics)
+
+
+def w_rules(inputs, out, scale, metrics):
+    result = engine.apply_rules(inputs["rule_words"], "", out, rule_file=inputs["rules_1k"], metrics=metrics)
+    if isinstance(result, str):
+        raise RuntimeError(result)
+
+
+def w_search_scan(inputs, out, scale, metrics):
+    engine.search_in_file(inputs["search_1g"], "qzx", use_index=False, count_only=True, metrics=metrics)
+    return os.path.getsize(inputs["search_1g"]), "bytes/s"
+
+
+def w_index_build(inputs, out, scale, metrics):
+    engine.build_search_index(inputs["search_1g"], metrics=metrics)
+    return os.path.getsize(inputs["search_1g"]), "bytes/s"
+
+
+def w_search_indexed(inputs, out, scale, metrics):
+    path = inputs["search_1g"]
+    if engine.TrigramIndex.open(path) is None:
+        engine.build_search_index(path)  # Not timed: index_build measures it
+    # One lookup takes milliseconds: time a fixed batch of queries as a single run
+    queries = ["".join(q) for q in zip("qzxjvkwy", "zxjvkwyq", "xjvkwyqz", "01234567")] * SEARCH_QUERY_ROUNDS
+    metrics.start()
+    with metrics.stage("search"):
+        for query in queries:
+            metrics.words += engine.search_in_file(path, query, count_only=True)[1]
+    metrics.finish()
+    return len(queries), "queries/s"
+
+
+WORKLOADS = {
+    "profile_depth3": ("smart profile, depth 3, 4-16 chars", w_profile(3)),
+    "profile_depth4": ("smart profile, depth 4, 4-12 chars", w_profile(4)),
+    "mask": ("mask ?l?l?l?d?d?d (17.6M words)", w_mask),
+    "brute_force": ("brute force 0-9 digits as a-j, lengths 1-7 (11.1M words)", w_brute_force),
+    "combinator": ("combinator, 1M-line File A x 20-line File B", w_combinator),
+    "hybrid": ("hybrid, 1M-line file + ?d", w_hybrid),
+    "rules": ("1k generated rules x 20k words", w_rules),
+    "search_scan": ("linear search over a 1 GB wordlist", w_search_scan),
+    "index_build": ("trigram index build over the 1 GB wordlist", w_index_build),
+    "search_indexed": ("200 indexed searches over the 1 GB wordlist", w_search_indexed),
+}
+
+
+def run_workload(name, inputs, workdir, scale):
+    """Child process: one measured run of a workload."""
+    out = os.path.join(workdir, f"out_{name}.txt")
+    metrics = Metrics()
+    rated = WORKLOADS[name][1](inputs, out, scale, metrics)
+    amount, unit = rated if rated is not None else (None, "words/s")
+    report = metrics.report()
+    elapsed = report["elapsed"]
+    for path in (out, out + engine.LineIndex.SUFFIX):
+        if os.path.exists(path):
+            os.remove(path)
+    return {
+        "words": report["words"],
+        "bytes": report["bytes"],
+        "seconds": elapsed,
+        "rate": round((amount if amount is not None else report["words"]) / elapsed, 1) if elapsed else None,
+        "unit": unit,
+        "flushes": report["flushes"],
+        "stages": report["stages"],
+        "peak_rss": peak_rss(),
+    }
+
+
+def run(args):
+    names = args.only or list(WORKLOADS)
+    unknown = set(names) - set(WORKLOADS)
+    if unknown:
+        sys.exit(f"Unknown workload(s): {', '.join(sorted(unknown))}")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="wordlist-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    try:
+        print(f"Inputs in {workdir} (scale {args.scale})")
+        inputs = prepare_inputs(workdir, args.scale, names)
+        for name in names:
+            best = None
+            for _ in range(args.repeat):
+                # A fresh process per run: peak RSS is the workload's own, no warm caches in-process
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    result = pool.submit(run_workload, name, inputs, workdir, args.scale).result()
+                if best is None or (result["rate"] or 0) > (best["rate"] or 0):
+                    best = result
+            results[name] = best
+            rss = f"{best['peak_rss'] / 2**20:8.1f} MB" if best["peak_rss"] else "     n/a"
+            print(f"  {name:<15} {best['rate'] or 0:>16,.0f} {best['unit']:<8} {best['seconds']:8.2f}s  "
+                  f"peak RSS {rss}  ({WORKLOADS[name][0]})", flush=True)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    doc = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": engine.np.__version__ if engine.np is not None else None,
+            "scale": args.scale,
+            "repeat": args.repeat,
+        },
+        "workloads": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        cur = json.load(f)
+    if base["meta"].get("scale") != cur["meta"].get("scale"):
+        sys.exit(f"Scales differ ({base['meta'].get('scale')} vs {cur['meta'].get('scale')}): not comparable")
+
+    regressions = []
+    print(f"{'workload':<15} {'baseline':>16} {'current':>16} {'change':>8} {'peak RSS':>10}")
+    for name, old in base["workloads"].items():
+        new = cur["workloads"].get(name)
+        if new is None:
+            print(f"{name:<15} {'(not run)':>16}")
+            continue
+        if new["unit"] != old["unit"]:
+            print(f"{name:<15} {'(unit changed: ' + old['unit'] + ' -> ' + new['unit'] + ')'}")
+            continue
+        flags = []
+        change = new["rate"] / old["rate"] - 1 if old["rate"] and new["rate"] else 0.0
+        if change < -args.threshold:
+            flags.append("SLOWER")
+        rss_change = new["peak_rss"] / old["peak_rss"] - 1 if old.get("peak_rss") and new.get("peak_rss") else 0.0
+        if rss_change > args.memory_threshold:
+            flags.append("MEMORY")
+        if flags:
+            regressions.append(name)
+        print(f"{name:<15} {old['rate'] or 0:>16,.0f} {new['rate'] or 0:>16,.0f} {change:>+8.1%} {rss_change:>+10.1%}"
+              f"  {' '.join(flags)}")
+    if regressions:
+        print(f"Regressions beyond {args.threshold:.0%} rate / {args.memory_threshold:.0%} memory: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+    print("No regressions.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the workloads and write a results JSON")
+    p_run.add_argument("--out", default="benchmark-results.json")
+    p_run.add_argument("--only", nargs="+", metavar="WORKLOAD", help="Run only these workloads")
+    p_run.add_argument("--scale", type=float, default=1.0, help="Workload size factor (default 1.0)")
+    p_run.add_argument("--repeat", type=int, default=1, help="Runs per workload; the fastest is kept")
+    p_run.add_argument("--workdir", help="Keep the inputs here and reuse them next time (default: temp dir)")
+
+    p_cmp = sub.add_parser("compare", help="Compare two results files; exit 1 on regressions")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.10, help="Allowed rate drop (default 0.10)")
+    p_cmp.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed peak RSS growth (default 0.25)")
+
+    sub.add_parser("list", help="List the workloads")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        compare(args)
+    else:
+        for name, (description, _) in WORKLOADS.items():
+            print(f"{name:<15} {description}")
+
+
+if __name__ == "__main__":
+    main()
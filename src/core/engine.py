@@ -1,8 +1,53 @@
+import bisect
+import bz2
+import contextlib
+import functools
+import gzip
+import hashlib
+import heapq
+import inspect
 import itertools
+import json
+import lzma
+import math
+import mmap
 import os
+import queue
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from . import rules
+from .mask import Mask, compile_masks
+from .metrics import Metrics
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the pure-Python odometer covers everything
+    np = None
 
 # Settings
 BUFFER_SIZE = 1024 * 1024  # 1MB Write Buffer
+BLOCK_SIZE = 1024 * 1024   # Pre-built output blocks are flushed with one write() each
+TAIL_WORDS = 4096          # Candidates per odometer tick (rightmost positions pre-built once)
+PREFIX_CACHE_WORDS = 65536 # Head products up to this size are built once per keyspace and shared by its segments
+COMPILED_CACHE = 1024      # Compiled charsets / heads / tails kept per keyspace
+SHARDS_PER_WORKER = 4      # More shards than workers keeps the pool busy when shards are uneven
+WRITE_QUEUE = 8            # Blocks buffered ahead of the compressing writer thread
+
+# Compressed wordlists, picked by extension. gzip's own default (level 9) is
+# several times slower than zlib's 6 for a few percent of size.
+CODECS = {
+    ".gz": lambda path, mode, **kw: gzip.open(path, mode, compresslevel=6, **kw),
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
 
 def get_substrings(text, min_len=3):
     """Generates all sliding window substrings."""
@@ -14,68 +59,807 @@ def get_substrings(text, min_len=3):
             subs.add(text[i : i + length])
     return list(subs)
 
-import string
+LEET_MAP = str.maketrans({'a': '@', 'A': '@', 'e': '3', 'E': '3',
+                          'i': '1', 'I': '1', 'o': '0', 'O': '0'})
+
+def to_leet(text):
+    """Classic leet substitutions: Password -> P@ssw0rd."""
+    return text.translate(LEET_MAP)
 
-def generate_from_mask(mask, output_file="wordlist.txt"):
+def _utf8(text):
+    """UTF-8 bytes of a candidate part; surrogate-escaped code points (mask ?b) become their raw bytes."""
+    return text.encode('utf-8', 'surrogateescape')
+
+class Keyspace:
     """
-    Generates words based on Standard Mask Syntax.
-    ?d = digits, ?l = lower, ?u = upper, ?s = symbols
-    ?a = all, ?? = literal '?'
-    Example: Admin?d?d?d -> Admin000 -> Admin999
+    Mixed-radix view over one or more Cartesian products ("segments") laid end to end,
+    in exactly the order the generators write them. Position 0 is the most significant
+    digit, so index i maps straight to a candidate without enumerating the first i words.
+    e.g. Keyspace([[pool] * r for r in (1, 2)]) is brute force of lengths 1..2.
+
+    Segments share compiled data: encoded charsets, NumPy tables, tail expansions and
+    (up to PREFIX_CACHE_WORDS) head prefixes are built once per keyspace, so a run over
+    many masks (.hcmask, increment mode) only pays for each distinct prefix or suffix once.
     """
-    
-    # 1. Parse Mask into list of character pools
-    # e.g. "A?d" -> [['A'], ['0'..'9']]
-    pools = []
-    
-    i = 0
-    n = len(mask)
-    while i < n:
-        char = mask[i]
-        
-        if char == '?' and i + 1 < n:
-            code = mask[i+1]
-            if code == 'd':
-                pools.append(string.digits)
-            elif code == 'l':
-                pools.append(string.ascii_lowercase)
-            elif code == 'u':
-                pools.append(string.ascii_uppercase)
-            elif code == 's':
-                pools.append(string.punctuation)
-            elif code == 'a':
-                # All printable except whitespace? Or strictly d+l+u+s?
-                # Standard ?a is ?l?u?d?s
-                pools.append(string.digits + string.ascii_letters + string.punctuation)
-            elif code == '?':
-                pools.append(['?'])
-            else:
-                # Unknown code, treat as literal "?code"? 
-                # Or just literal '?' then code?
-                # Let's treat ?x as literal '?' then literal 'x'
-                pools.append(['?'])
-                # i will increment only by 1 effectively below differently
-                # Actually, easier to just consume '?' as literal if code invalid?
-                # Let's stick to strict codes for now.
-                i -= 1 # Backtrack to treat ? as literal?
-                pools.append(['?'])
-                
-            i += 2 # Skip ? and code
+
+    def __init__(self, segments):
+        self.segments = [[list(p) for p in pools] for pools in segments]
+        self.sizes = []
+        for pools in self.segments:
+            size = 1
+            for p in pools:
+                size *= len(p)
+            self.sizes.append(size)
+        self._cache = {}
+
+    def _compiled(self, key, build):
+        """build() once per key for this keyspace; the cache is reset past COMPILED_CACHE entries."""
+        if key not in self._cache:
+            if len(self._cache) >= COMPILED_CACHE:
+                self._cache.clear()
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def keyspace_size(self):
+        return sum(self.sizes)
+
+    @staticmethod
+    def _bytes_before(pools, i):
+        """UTF-8 bytes (without newlines) of a segment's first i candidates, in O(positions)."""
+        total = 0
+        period = 1  # How many consecutive candidates share one digit at this position
+        for pool in reversed(pools):
+            widths = [len(_utf8(x)) for x in pool]
+            cycle = period * len(widths)
+            full, rem = divmod(i, cycle)
+            k, partial = divmod(rem, period)
+            total += full * period * sum(widths) + period * sum(widths[:k])
+            if partial:
+                total += partial * widths[k]
+            period = cycle
+        return total
+
+    def byte_size(self, skip=0, limit=None):
+        """Exact output size (candidates + newlines) of iter_blocks(skip, limit)."""
+        total = self.keyspace_size()
+        stop = total if limit is None else min(total, skip + limit)
+        size = max(0, stop - skip)  # newlines
+        base = 0
+        for pools, seg_size in zip(self.segments, self.sizes):
+            lo = max(skip - base, 0)
+            hi = min(stop - base, seg_size)
+            if lo < hi:
+                size += self._bytes_before(pools, hi) - self._bytes_before(pools, lo)
+            base += seg_size
+        return size
+
+    def _locate(self, i):
+        """Global index -> (segment number, index inside that segment)."""
+        if i < 0:
+            i += self.keyspace_size()
+        if i < 0:
+            raise IndexError("keyspace index out of range")
+        for seg, size in enumerate(self.sizes):
+            if i < size:
+                return seg, i
+            i -= size
+        raise IndexError("keyspace index out of range")
+
+    @staticmethod
+    def _digits(pools, i):
+        digits = [0] * len(pools)
+        for pos in range(len(pools) - 1, -1, -1):
+            i, digits[pos] = divmod(i, len(pools[pos]))
+        return digits
+
+    def candidate_at(self, i):
+        seg, local = self._locate(i)
+        pools = self.segments[seg]
+        return "".join(p[d] for p, d in zip(pools, self._digits(pools, local)))
+
+    @staticmethod
+    def _iter_segment(pools, start):
+        """Yields one segment's candidates from local index 'start' to its end."""
+        if start == 0:
+            for p in itertools.product(*pools):
+                yield "".join(p)
+            return
+        digits = Keyspace._digits(pools, start)
+        yield "".join(p[d] for p, d in zip(pools, digits))
+        # Finish the odometer from the right: bump position k past its start digit,
+        # keep everything left of k fixed, and run the full product to its right.
+        for k in range(len(pools) - 1, -1, -1):
+            head = "".join(pools[j][digits[j]] for j in range(k))
+            rest = pools[k + 1:]
+            for c in pools[k][digits[k] + 1:]:
+                prefix = head + c
+                for p in itertools.product(*rest):
+                    yield prefix + "".join(p)
+
+    @staticmethod
+    def _odometer(head, first):
+        """
+        Yields every prefix of the head positions from index 'first' on, over one
+        bytearray: when position j ticks, only bytes from j rightwards are rewritten.
+        """
+        digits = Keyspace._digits(head, first)
+        buf = bytearray()
+        offsets = []  # offsets[j] is where position j starts in buf
+        for j, d in enumerate(digits):
+            offsets.append(len(buf))
+            buf += head[j][d]
+        while True:
+            yield bytes(buf)
+            # Tick: bump the rightmost head position that doesn't wrap
+            j = len(head) - 1
+            while j >= 0 and digits[j] == len(head[j]) - 1:
+                digits[j] = 0
+                j -= 1
+            if j < 0:
+                return
+            digits[j] += 1
+            del buf[offsets[j]:]
+            for m in range(j, len(head)):
+                offsets[m] = len(buf)
+                buf += head[m][digits[m]]
+
+    def _segment_runs(self, pools, start, stop):
+        """
+        Yields (bytes, word_count) runs for local indexes start .. stop-1 of one segment.
+
+        The rightmost positions are expanded once into 'tails' (~TAIL_WORDS encoded
+        suffixes); the remaining head positions give the prefixes, from a cached list
+        when the head product is small, else from the odometer. Each prefix then
+        emits prefix+tail for every tail with a single bytes.join.
+        """
+        keys = [tuple(p) for p in pools]
+        enc = [self._compiled(("enc", key), lambda key=key: [_utf8(x) for x in key]) for key in keys]
+
+        # How many positions go into the pre-built tail
+        split = len(enc)
+        n_tails = 1
+        while split > 0 and (n_tails * len(enc[split - 1]) <= TAIL_WORDS or split == len(enc)):
+            split -= 1
+            n_tails *= len(enc[split])
+        head = enc[:split]
+        tails = self._compiled(("tails", *keys[split:]),
+                               lambda: [b"".join(p) for p in itertools.product(*enc[split:])])
+
+        n_heads = 1
+        for h in head:
+            n_heads *= len(h)
+        if n_heads <= PREFIX_CACHE_WORDS:
+            heads = self._compiled(("heads", *keys[:split]),
+                                   lambda: [b"".join(p) for p in itertools.product(*head)])
+            prefixes = itertools.islice(heads, start // n_tails, None)
         else:
-            # Literal character
-            pools.append([char])
-            i += 1
-            
-    # 2. Generator
+            prefixes = self._odometer(head, start // n_tails)
+
+        t_start = start % n_tails
+        remaining = stop - start
+        for prefix in prefixes:
+            t_stop = min(n_tails, t_start + remaining)
+            run = tails if (t_start == 0 and t_stop == n_tails) else tails[t_start:t_stop]
+            yield prefix + (b"\n" + prefix).join(run) + b"\n", len(run)
+            remaining -= len(run)
+            t_start = 0
+            if remaining <= 0:
+                break
+
+    @staticmethod
+    def _numpy_table(pool):
+        """(radix, width) uint8 lookup table of one position, or None if it mixes byte widths."""
+        enc = [_utf8(x) for x in pool]
+        width = len(enc[0])
+        if any(len(e) != width for e in enc):
+            return None
+        return np.frombuffer(b"".join(enc), dtype=np.uint8).reshape(len(enc), width)
+
+    def _numpy_tables(self, pools):
+        """
+        Per-position lookup tables for the NumPy engine, or None if any position
+        mixes byte widths (candidates aren't fixed-width).
+        """
+        tables = [self._compiled(("table", key), lambda key=key: self._numpy_table(key))
+                  for key in map(tuple, pools)]
+        return None if any(t is None for t in tables) else tables
+
+    @staticmethod
+    def _numpy_digits(tables, start, stop):
+        """(stop-start, width) uint8 array of candidates start..stop-1 of 'tables'."""
+        widths = [t.shape[1] for t in tables]
+        out = np.empty((stop - start, sum(widths)), dtype=np.uint8)
+        idx = np.arange(start, stop, dtype=np.uint64)
+        col = out.shape[1]
+        for table in reversed(tables):
+            cols = slice(col - table.shape[1], col)
+            col -= table.shape[1]
+            if table.shape[0] == 1:
+                out[:, cols] = table[0]  # Literal: same bytes on every row
+                continue
+            idx, digit = np.divmod(idx, np.uint64(table.shape[0]))
+            out[:, cols] = table[digit]
+        return out
+
+    def _segment_runs_numpy(self, pools, tables, start, stop, block_size):
+        """
+        Fixed-width segment as 2-D uint8 blocks: one row per candidate plus a newline
+        column. As in the odometer, the rightmost positions are expanded once into a
+        tail array; a block is then K prefixes x all tails, filled by broadcasting
+        the prefix rows (built from an arange of head indexes) against the tail array.
+        """
+        split = len(tables)
+        n_tails = 1
+        while split > 0 and (n_tails * tables[split - 1].shape[0] <= TAIL_WORDS or split == len(tables)):
+            split -= 1
+            n_tails *= tables[split].shape[0]
+        head_tables, tail_tables = tables[:split], tables[split:]
+        head_w = sum(t.shape[1] for t in head_tables)
+        line = head_w + sum(t.shape[1] for t in tail_tables) + 1
+
+        def build_template():
+            template = np.empty((n_tails, line), dtype=np.uint8)
+            template[:, head_w:-1] = Keyspace._numpy_digits(tail_tables, 0, n_tails)
+            template[:, -1] = 10  # '\n'
+            return template
+        template = self._compiled(("template", head_w, *map(tuple, pools[split:])), build_template)
+        per_block = max(1, block_size // (n_tails * line))
+
+        first_head, last_head = start // n_tails, (stop - 1) // n_tails
+        for h0 in range(first_head, last_head + 1, per_block):
+            h1 = min(last_head + 1, h0 + per_block)
+            out = np.empty((h1 - h0, n_tails, line), dtype=np.uint8)
+            out[:] = template
+            out[:, :, :head_w] = Keyspace._numpy_digits(head_tables, h0, h1)[:, None, :]
+
+            # Trim the partial prefix runs at both ends of the range
+            rows = out.reshape(-1, line)
+            lo = max(start - h0 * n_tails, 0)
+            hi = min(stop - h0 * n_tails, rows.shape[0])
+            yield rows[lo:hi].tobytes(), hi - lo
+
+    def iter_blocks(self, skip=0, limit=None, block_size=BLOCK_SIZE, backend="auto"):
+        """
+        Same candidates as iter_range, as newline-terminated UTF-8 blocks of
+        roughly block_size bytes. Yields (block, word_count).
+
+        backend: "auto" uses the NumPy engine for fixed-width segments when NumPy
+        is installed, "numpy" insists on it, "python" always uses the odometer.
+        """
+        if backend == "numpy" and np is None:
+            raise RuntimeError("backend='numpy' requested but NumPy is not installed")
+        use_numpy = backend != "python" and np is not None
+
+        total = self.keyspace_size()
+        stop = total if limit is None else min(total, skip + limit)
+        if skip >= stop:
+            return
+        seg, local = self._locate(skip)
+
+        def runs():
+            left = stop - skip
+            for s in range(seg, len(self.segments)):
+                if left <= 0:
+                    break
+                lo = local if s == seg else 0
+                hi = min(self.sizes[s], lo + left)
+                if hi <= lo:
+                    continue
+                left -= hi - lo
+                pools = self.segments[s]
+                # uint64 indexes cap the vector path; nobody finishes 2**63 words anyway
+                tables = self._numpy_tables(pools) if use_numpy and self.sizes[s] < 2 ** 63 else None
+                if tables is not None:
+                    yield from self._segment_runs_numpy(pools, tables, lo, hi, block_size)
+                else:
+                    yield from self._segment_runs(pools, lo, hi)
+
+        yield from _coalesce(runs(), block_size)
+
+    def iter_range(self, skip=0, limit=None):
+        """Yields candidates skip .. skip+limit-1 (to the end when limit is None)."""
+        total = self.keyspace_size()
+        if skip >= total or limit == 0:
+            return
+        seg, local = self._locate(skip)
+        words = itertools.chain.from_iterable(
+            self._iter_segment(self.segments[s], local if s == seg else 0)
+            for s in range(seg, len(self.segments))
+        )
+        if limit is not None:
+            words = itertools.islice(words, limit)
+        yield from words
+
+class Deduper:
+    """
+    Drops repeated candidates with a fixed memory budget.
+
+    Words are tracked exactly in a set until max_entries, then moved into a Bloom
+    filter of memory_mb with k = -log2(fp_rate) hashes. From then on memory stays
+    flat, and a word that was never seen is wrongly dropped with probability
+    ~fp_rate while the filter is under capacity (reported by bloom_capacity).
+    'dropped' counts every word removed.
+    """
+
+    def __init__(self, max_entries=2_000_000, memory_mb=256, fp_rate=0.001):
+        self.max_entries = max_entries
+        self.n_bits = max(8, int(memory_mb * 1024 * 1024 * 8))
+        self.n_hashes = max(1, round(-math.log2(fp_rate)))
+        self.bloom_capacity = int(self.n_bits * math.log(2) ** 2 / -math.log(fp_rate))
+        self.seen = set()
+        self.bloom = None
+        self.dropped = 0
+
+    def _bloom_add(self, word):
+        """Sets the word's bits; returns True if they were all set already."""
+        digest = hashlib.blake2b(word, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        bits = self.bloom
+        present = True
+        for i in range(self.n_hashes):
+            pos = (h1 + i * h2) % self.n_bits
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        return present
+
+    def _switch_to_bloom(self):
+        self.bloom = bytearray((self.n_bits + 7) // 8)
+        for word in self.seen:
+            self._bloom_add(word)
+        self.seen = set()
+
+    def filter(self, blocks):
+        """Pass (block, word_count) pairs through, without words seen before."""
+        for data, _ in blocks:
+            kept = []
+            for word in data.split(b"\n")[:-1]:
+                if self.bloom is None:
+                    if word in self.seen:
+                        self.dropped += 1
+                        continue
+                    self.seen.add(word)
+                    if len(self.seen) >= self.max_entries:
+                        self._switch_to_bloom()
+                elif self._bloom_add(word):
+                    self.dropped += 1
+                    continue
+                kept.append(word)
+            if kept:
+                yield b"\n".join(kept) + b"\n", len(kept)
+
+def _dedup_stage(blocks, dedup, stats):
+    """
+    Applies the opt-in dedup stage. dedup: False, True (default Deduper) or a Deduper.
+    stats (optional dict) receives 'duplicates' once the run finishes.
+    """
+    if not dedup:
+        return blocks
+    deduper = dedup if isinstance(dedup, Deduper) else Deduper()
+
+    def run():
+        yield from deduper.filter(blocks)
+        if stats is not None:
+            stats["duplicates"] = deduper.dropped
+    return run()
+
+def _resolve_workers(workers):
+    """0 / None means 'use every core'."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+def _coalesce(runs, block_size=BLOCK_SIZE):
+    """Packs small (bytes, word_count) runs into ~block_size blocks."""
+    pending = []
+    pending_bytes = 0
+    pending_words = 0
+    for data, n in runs:
+        pending.append(data)
+        pending_bytes += len(data)
+        pending_words += n
+        if pending_bytes >= block_size:
+            yield b"".join(pending), pending_words
+            pending, pending_bytes, pending_words = [], 0, 0
+    if pending:
+        yield b"".join(pending), pending_words
+
+def _write_stdout(blocks, metrics=None):
+    """Pipe mode: batched bytes to stdout. A closed pipe ends the run quietly."""
+    out = sys.stdout.buffer
+    write = out.write if metrics is None else metrics.timed(out.write)
     count = 0
-    with open(output_file, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as f:
-        # itertools.product(*pools) handles the Cartesian product of all positions
-        for p in itertools.product(*pools):
-            f.write("".join(p) + '\n')
-            count += 1
-            
+    try:
+        for data, n in blocks:
+            write(data)
+            count += n
+        out.flush()
+    except BrokenPipeError:
+        # The reader went away (e.g. '| head'). Point stdout at devnull so the
+        # interpreter's exit-time flush doesn't raise a second time.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    return count
+
+def _codec(path):
+    """The compressed-file opener for path's extension (.gz / .bz2 / .xz), or None."""
+    return CODECS.get(os.path.splitext(path)[1].lower())
+
+def _open_input(path, binary=False):
+    """Opens a wordlist for reading, decompressing transparently by extension."""
+    opener = _codec(path) or open
+    if binary:
+        return opener(path, 'rb')
+    return opener(path, 'rt', encoding='utf-8', errors='ignore')
+
+def _write_compressed(blocks, output_file, index, metrics=None):
+    """
+    Compressed output: blocks are handed to a writer thread through a bounded queue.
+    zlib / bz2 / lzma release the GIL while they compress, so compression overlaps
+    the generator instead of stalling it. Returns the word count.
+    """
+    pending = queue.Queue(maxsize=WRITE_QUEUE)
+    error = []
+
+    def drain():
+        try:
+            with _codec(output_file)(output_file, 'wb') as f:
+                write = f.write if metrics is None else metrics.timed(f.write, "compress")
+                for data in iter(pending.get, None):
+                    write(data)
+        except BaseException as exc:
+            error.append(exc)
+            for _ in iter(pending.get, None):  # Keep the producer from blocking on a full queue
+                pass
+
+    writer = threading.Thread(target=drain, name="wordlist-writer", daemon=True)
+    writer.start()
+    count = 0
+    try:
+        for data, n in blocks:
+            if error:
+                break
+            pending.put(data)
+            count += n
+            if index is not None:
+                index.feed(data)
+    finally:
+        pending.put(None)
+        writer.join()
+    if error:
+        raise error[0]
+    return count
+
+def _write_blocks(blocks, output_file, line_index=False, raw=False, metrics=None):
+    """
+    Writes (block, word_count) pairs with one write() per block. Returns the word count.
+    output_file="-" streams to stdout instead of a file; a .gz/.bz2/.xz output_file is
+    compressed on a writer thread unless raw=True (blocks already compressed).
+    line_index=True also records the '<output_file>.lines' sidecar (see LineIndex),
+    best-effort: it is skipped for non-regular outputs and when it can't be written.
+    metrics (optional Metrics) times block building against the writes.
+    """
+    blocks = _metered(blocks, metrics)
+    if output_file == "-":
+        return _write_stdout(blocks, metrics)
+    index = LineIndex() if line_index else None
+    if _codec(output_file) and not raw:
+        count = _write_compressed(blocks, output_file, index, metrics)
+    else:
+        count = 0
+        with open(output_file, 'wb') as f:
+            write = f.write if metrics is None else metrics.timed(f.write)
+            for data, n in blocks:
+                write(data)
+                count += n
+                if index is not None:
+                    index.feed(data)
+    if index is not None:
+        index.save(output_file)
     return count
 
+class LineIndex:
+    """
+    Sparse line number -> byte offset map, one entry per written block (~BLOCK_SIZE),
+    saved as '<wordlist>.lines'. Any line is reached by seeking to the entry at or
+    before it and skipping at most one block's worth of lines.
+    """
+    SUFFIX = ".lines"
+    MAGIC = b"WLGLIN1\n"
+    HEADER = struct.Struct('<QQQQ')  # wordlist size, wordlist mtime_ns, newline count, entries
+
+    def __init__(self):
+        self.lines = array('Q', [0])    # entry i: line number lines[i] starts at offsets[i]
+        self.offsets = array('Q', [0])
+        self.newlines = 0
+        self.size = 0
+
+    def feed(self, data):
+        """Accounts for the next bytes of the file; blocks need not end on a newline."""
+        n = data.count(b"\n")
+        if n:
+            self.newlines += n
+            self.lines.append(self.newlines)
+            self.offsets.append(self.size + data.rfind(b"\n") + 1)
+        self.size += len(data)
+
+    def line_count(self):
+        """Lines in the file; a last line without a trailing newline still counts."""
+        return self.newlines + (self.size > self.offsets[-1])
+
+    def locate(self, line):
+        """(first line, start offset, end offset) of the indexed span holding line."""
+        i = max(0, bisect.bisect_right(self.lines, line) - 1)
+        end = self.offsets[i + 1] if i + 1 < len(self.offsets) else self.size
+        return self.lines[i], self.offsets[i], end
+
+    def save(self, filename):
+        """
+        Writes '<filename>.lines'; returns False instead when filename is no regular
+        file (/dev/null, a pipe) or the sidecar can't be written. It is only a cache.
+        """
+        if not os.path.isfile(filename):
+            return False
+        try:
+            st = os.stat(filename)
+            with open(filename + self.SUFFIX, 'wb') as f:
+                f.write(self.MAGIC + self.HEADER.pack(st.st_size, st.st_mtime_ns, self.newlines, len(self.lines)))
+                f.write(_le(array('Q', self.lines)).tobytes())
+                f.write(_le(array('Q', self.offsets)).tobytes())
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(filename + self.SUFFIX)
+            return False
+        return True
+
+    @classmethod
+    def load(cls, filename):
+        """The saved index for filename, or None when missing or older than the file."""
+        try:
+            st = os.stat(filename)
+            with open(filename + cls.SUFFIX, 'rb') as f:
+                if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                    return None
+                size, mtime_ns, newlines, n = cls.HEADER.unpack(f.read(cls.HEADER.size))
+                if (size, mtime_ns) != (st.st_size, st.st_mtime_ns):
+                    return None
+                index = cls()
+                index.lines = _le(array('Q', f.read(8 * n)))
+                index.offsets = _le(array('Q', f.read(8 * n)))
+        except (OSError, struct.error, ValueError):
+            return None
+        if len(index.offsets) != n:
+            return None
+        index.newlines, index.size = newlines, size
+        return index
+
+def build_line_index(filename):
+    """Scans an existing wordlist (e.g. one not written by this engine) and saves its LineIndex."""
+    index = LineIndex()
+    with _open_input(filename, binary=True) as f:
+        for data in iter(lambda: f.read(BLOCK_SIZE), b""):
+            index.feed(data)
+    index.save(filename)
+    return index
+
+def _line_index(filename):
+    """The current LineIndex for filename, building the sidecar when missing or stale."""
+    return LineIndex.load(filename) or build_line_index(filename)
+
+def line_count(filename):
+    """Number of lines in filename, from its line index."""
+    return _line_index(filename).line_count()
+
+def read_lines(filename, start_line, count):
+    """
+    Lines start_line .. start_line+count-1 (0-based, without line endings) of filename.
+    Seeks through the line index, so the cost does not grow with start_line
+    (compressed files can only seek by decompressing up to the offset).
+    """
+    index = _line_index(filename)
+    if count <= 0 or start_line >= index.line_count():
+        return []
+    start_line = max(0, start_line)
+    line, offset, end = index.locate(start_line)
+    with _open_input(filename, binary=True) as f:
+        f.seek(offset)
+        skip = start_line - line
+        if skip:
+            # At most one written block of lines to step over
+            head = f.read(end - offset)
+            if np is not None:
+                pos = int(np.flatnonzero(np.frombuffer(head, dtype=np.uint8) == 0x0A)[skip - 1]) + 1
+            else:
+                pos = 0
+                for _ in range(skip):
+                    pos = head.index(b"\n", pos) + 1
+            f.seek(offset + pos)
+        lines = []
+        for raw in f:
+            lines.append(raw.rstrip(b"\r\n").decode('utf-8', 'ignore'))
+            if len(lines) == count:
+                break
+    return lines
+
+def _chunks(blocks):
+    """Public iterators yield just the bytes."""
+    for data, _ in blocks:
+        yield data
+
+def _metered(blocks, metrics):
+    """blocks, counted and timed by metrics.watch when metrics is given."""
+    return blocks if metrics is None else metrics.watch(blocks)
+
+def _stage(metrics, name):
+    """metrics.stage(name), or a no-op without metrics."""
+    return contextlib.nullcontext() if metrics is None else metrics.stage(name)
+
+def _finish_when_done(chunks, metrics):
+    try:
+        yield from chunks
+    finally:
+        metrics.finish()
+
+def _instrumented(fn):
+    """
+    Entry point decorator for the metrics=None keyword (see core/metrics.py). Without
+    one, WORDLIST_PROFILE / WORDLIST_REPORT may supply it (Metrics.from_env). The call
+    is bracketed by metrics.start() / finish(); iter_* streams finish when they end.
+    """
+    streaming = fn.__name__.startswith("iter_")
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, metrics=None, **kwargs):
+        if metrics is None:
+            metrics = Metrics.from_env()
+            if metrics is None:
+                return fn(*args, **kwargs)
+        metrics.entry = fn.__name__
+        metrics.params = {k: v for k, v in signature.bind_partial(*args, **kwargs).arguments.items()
+                          if isinstance(v, (str, int, float, bool, type(None)))}
+        metrics.start()
+        try:
+            result = fn(*args, metrics=metrics, **kwargs)
+        except BaseException:
+            metrics.finish()
+            raise
+        if not streaming:
+            metrics.finish()
+            return result
+        return _finish_when_done(result, metrics)
+    return wrapper
+
+def iter_words(chunks):
+    """Decodes byte chunks from any iter_* function into individual words."""
+    for chunk in chunks:
+        yield from chunk.decode('utf-8').split('\n')[:-1]
+
+def _write_shard(job):
+    """Worker: writes keyspace[start:stop] to its own file."""
+    segments, start, stop, backend, path = job
+    return _write_blocks(Keyspace(segments).iter_blocks(start, stop - start, backend=backend), path, line_index=False)
+
+def _part_path(base, i):
+    """'<base>.partNNN', keeping a compression extension last (list.gz -> list.part000.gz)."""
+    stem, ext = os.path.splitext(base)
+    if ext.lower() in CODECS:
+        return f"{stem}.part{i:03d}{ext}"
+    return f"{base}.part{i:03d}"
+
+def _run_shards(worker, jobs, output_file, workers, merge=True, metrics=None, line_index=False):
+    """
+    Runs worker(job + (part_path,)) for every job on a process pool; each call writes
+    '<output_file>.partNNN' and returns its word count. With merge=True the parts are
+    appended to output_file in job order as they finish and removed. output_file="-"
+    always merges, to stdout, via a temp dir.
+    Compressed outputs are compressed by the workers: gzip, bz2 and xz streams can
+    be concatenated, so the merge is a plain byte copy.
+    Returns the total word count.
+    """
+    tmpdir = None
+    base = output_file
+    if output_file == "-":
+        tmpdir = tempfile.mkdtemp(prefix="wordlist-shards-")
+        base = os.path.join(tmpdir, "stdout")
+        merge = True
+    jobs = [(*job, _part_path(base, i)) for i, job in enumerate(jobs)]
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # map() yields in submission order, so counts line up with part numbers
+        counts = pool.map(worker, jobs)
+        if not merge:
+            total = sum(counts)
+            if metrics is not None:
+                metrics.words += total
+            return total
+
+        def merged():
+            for job, n in zip(jobs, counts):
+                path = job[-1]
+                with open(path, 'rb') as part:
+                    for data in iter(lambda: part.read(BUFFER_SIZE), b""):
+                        yield data, n
+                        n = 0
+                os.remove(path)
+
+        compressed = bool(_codec(output_file))
+        return _write_blocks(merged(), output_file, line_index=line_index and not compressed, raw=compressed,
+                             metrics=metrics)
+    finally:
+        # A closed stdout pipe stops the merge early: drop the shards nobody will read
+        pool.shutdown(cancel_futures=True)
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+def _generate_sharded(keyspace, output_file, workers, merge=True, skip=0, limit=None, backend="auto",
+                      metrics=None, line_index=False):
+    """
+    Splits keyspace[skip : skip+limit] into equal index ranges and writes them on a
+    process pool (see _run_shards); merged output is identical to the serial output.
+    """
+    total = keyspace.keyspace_size()
+    start = min(skip, total)
+    stop = total if limit is None else min(total, start + limit)
+
+    n_shards = max(1, min(stop - start, workers * SHARDS_PER_WORKER))
+    step = -(-(stop - start) // n_shards)  # ceil division
+    jobs = [(keyspace.segments, lo, min(lo + step, stop), backend)
+            for lo in range(start, max(stop, start + 1), max(step, 1))]
+    return _run_shards(_write_shard, jobs, output_file, workers, merge, metrics, line_index)
+
+def mask_keyspace(mask, custom_charsets=None, increment=None):
+    """
+    Index-addressable Keyspace of a mask, a list of masks or a .hcmask file, one
+    segment per mask (and per length with increment); see core.mask.compile_masks.
+    """
+    return Keyspace(compile_masks(mask, custom_charsets, increment))
+
+@_instrumented
+def generate_from_mask(mask, output_file="wordlist.txt", workers=1, merge=True, skip=0, limit=None, backend="auto",
+                       metrics=None, custom_charsets=None, increment=None, line_index=False):
+    """
+    Generates words based on Standard Mask Syntax.
+    ?d = digits, ?l = lower, ?u = upper, ?s = symbols
+    ?a = all, ?h / ?H = hex, ?b = bytes, ?? = literal '?'
+    ?1 .. ?4 = custom_charsets (e.g. ["?l?d", "!@"]); unknown codes raise ValueError.
+    Example: Admin?d?d?d -> Admin000 -> Admin999
+
+    mask may also be a list of masks or the path of a .hcmask file (one run over all
+    of them, in order). increment=True or (min, max) also runs every prefix of each
+    mask from min to max positions, shortest first (hashcat -i).
+
+    output_file="-" streams to stdout; iter_from_mask yields the same bytes.
+    workers > 1 splits the keyspace across a process pool (0 = all cores).
+    merge=False leaves the shards as numbered '<output_file>.partNNN' files.
+    skip / limit write only candidates skip .. skip+limit-1 (no prefix is enumerated),
+    so one attack can be split across machines or resumed from a word count.
+    backend: "auto" (NumPy when installed), "numpy" or "python"; see Keyspace.iter_blocks.
+    metrics (optional, every entry point): a core.metrics.Metrics filled with stage
+    timings, rates and peak RSS.
+    line_index=True (every file-writing entry point) also saves the '<output_file>.lines'
+    sidecar while writing; without it, read_lines() builds it on first use.
+    """
+    with _stage(metrics, "parse"):
+        keyspace = mask_keyspace(mask, custom_charsets, increment)
+
+    workers = _resolve_workers(workers)
+    if workers > 1:
+        return _generate_sharded(keyspace, output_file, workers, merge, skip, limit, backend, metrics, line_index)
+
+    return _write_blocks(keyspace.iter_blocks(skip, limit, backend=backend), output_file, line_index,
+                         metrics=metrics)
+
+@_instrumented
+def iter_from_mask(mask, skip=0, limit=None, backend="auto", metrics=None, custom_charsets=None, increment=None):
+    """Streaming generate_from_mask: yields newline-terminated UTF-8 byte chunks."""
+    with _stage(metrics, "parse"):
+        keyspace = mask_keyspace(mask, custom_charsets, increment)
+    return _chunks(_metered(keyspace.iter_blocks(skip, limit, backend=backend), metrics))
+
 def get_sub_combinations(items):
     """Generates all permutations of the extras list (e.g. 1,2 -> 1,2,12,21)."""
     if not items: return []
@@ -88,56 +872,105 @@ def get_sub_combinations(items):
             combos.add("".join(p))
     return list(combos)
 
-def generate_wordlist(
+# Probability model of order="probability": every pool word gets a weight from its
+# source and case variant, every candidate multiplies the weights of its parts by
+# their role (first / middle / last part) and by its depth and total length.
+# Relative numbers only: they rank candidates, they are not calibrated odds.
+SOURCE_WEIGHTS = {
+    "name": 1.0, "middle": 0.5, "alias": 0.9, "username": 0.9,
+    "extra": 0.7, "extra_combo": 0.35,
+    "year": 0.9, "short_year": 0.8, "day_month": 0.6, "month_day": 0.4, "date_part": 0.4,
+    "full_date": 0.6, "iso_date": 0.3, "special": 0.6,
+}
+SOURCE_KINDS = {"name": "name", "middle": "name", "alias": "name", "username": "name",
+                "extra": "word", "extra_combo": "word", "special": "special"}  # Anything else: "date"
+SUBSTRING_WEIGHTS = {"prefix": 0.4, "suffix": 0.25, "inner": 0.1}  # Times the share of the source covered
+CASE_WEIGHTS = {"typed": 0.9, "lower": 1.0, "capitalized": 0.8, "upper": 0.2, "leet": 0.15}
+ROLE_WEIGHTS = {  # Kind -> weight as first / middle / last part of a multi-part candidate
+    "name": (1.0, 0.6, 0.5),
+    "word": (0.8, 0.6, 0.7),
+    "date": (0.3, 0.4, 1.0),
+    "special": (0.1, 0.4, 1.0),
+}
+DEPTH_WEIGHT = 0.3   # Per part after the first
+RANKED_BATCH = 4096  # Words per run of the best-first enumeration
+WORDLIST_ORDERS = ("lexical", "probability")
+BUDGET_POLICIES = ("fair", "proportional", "depth-first")
+PROFILE_DEFAULTS = {"first": "", "middle": "", "last": "", "aliases": "", "usernames": "", "extra": "",
+                    "dob": "", "special_chars": "", "enable_leet": False}
+# Cache format of profile pools. The key already hashes the tables _pool_sources reads
+# (LEET_MAP, SOURCE_WEIGHTS, SOURCE_KINDS, SUBSTRING_WEIGHTS, CASE_WEIGHTS, PROFILE_DEFAULTS),
+# so editing those needs nothing. Bump it for any change to the code that builds a pool:
+# _pool_sources (parsing, substrings, extras, dates, case / leet variants, specials,
+# how weights combine), to_leet, get_sub_combinations, or the cache file layout.
+POOL_FORMAT = 1
+POOL_CACHE_ENTRIES = 8    # Profile pools kept in memory, least recently used out
+POOL_CACHE_FILES = 64     # Pool files kept on disk, least recently used out
+POOL_CACHE_ENV = "WORDLIST_POOL_CACHE"  # Pool cache directory; set to "" for a memory-only cache
+POOL_CACHE_SUFFIX = ".pool.json"
+POOL_CACHE_MODES = (0o700, 0o600)       # Cache directories / files: the pools hold the target's personal data
+
+def _length_weight(n):
+    """Weight of a candidate's total length: common password lengths first."""
+    if 8 <= n <= 12:
+        return 1.0
+    if 6 <= n <= 16:
+        return 0.6
+    return 0.3
+
+def _pool_sources(
     first="", middle="", last="", 
     aliases="", usernames="", extra="", 
     dob="", special_chars="", 
-    min_len=4, max_len=25, 
-    enable_leet=False, 
-    depth=3,
-    output_file="wordlist.txt"
+    enable_leet=False
 ):
     """
-    Generates a wordlist based on inputs.
+    {pool word: (kind, weight)} for the profile: exactly the words of _build_pool,
+    each with its likeliest source (see SOURCE_WEIGHTS) times its case variant.
     """
     
     # 1. Parsing Inputs
-    base_words = set()
-    
-    def add(s):
-        if s: base_words.add(s.strip())
+    base_words = {}
+
+    def put(words, word, source, weight=None):
+        weight = SOURCE_WEIGHTS[source] if weight is None else weight
+        if word not in words or weight > words[word][1]:
+            words[word] = (SOURCE_KINDS.get(source, "date"), weight)
+
+    def add(s, source):
+        if s: put(base_words, s.strip(), source)
+
+    def add_substrings(text, source):
+        """The get_substrings(text, 3) words, weighted by where they sit in text and how much they cover."""
+        n = len(text)
+        for length in range(3, n + 1):
+            for i in range(n - length + 1):
+                where = "prefix" if i == 0 else "suffix" if i + length == n else "inner"
+                put(base_words, text[i : i + length], source,
+                    SOURCE_WEIGHTS[source] * SUBSTRING_WEIGHTS[where] * length / n)
 
     # Add Names
-    add(first)
-    add(middle)
-    add(last)
+    add(first, "name")
+    add(middle, "middle")
+    add(last, "name")
     
     # Add Substrings for Names (The "Split" requirement)
-    for name in [first, middle, last]:
+    for name, source in ((first, "name"), (middle, "middle"), (last, "name")):
         if name:
-            for sub in get_substrings(name, min_len=3):
-                base_words.add(sub)
+            add_substrings(name, source)
     
     # Process Aliases and Usernames (Treat like names with substrings)
-    for x in aliases.split(','): 
-        val = x.strip()
-        if val: 
-            add(val)
-            for sub in get_substrings(val, min_len=3):
-                base_words.add(sub)
-
-    for x in usernames.split(','): 
-        val = x.strip()
-        if val: 
-            add(val)
-            for sub in get_substrings(val, min_len=3):
-                base_words.add(sub)
+    for values, source in ((aliases, "alias"), (usernames, "username")):
+        for x in values.split(','): 
+            val = x.strip()
+            if val: 
+                add(val, source)
+                add_substrings(val, source)
     
     # Handle Extras with recursive combinations
     raw_extras = [x.strip() for x in extra.split(',') if x.strip()]
-    extra_combos = get_sub_combinations(raw_extras)
-    for x in extra_combos:
-        base_words.add(x)
+    for x in get_sub_combinations(raw_extras):
+        put(base_words, x, "extra" if x in raw_extras else "extra_combo")
     
     # Date Handling
     if dob:
@@ -147,173 +980,1167 @@ def generate_wordlist(
         
         # Add individual parts (14, 10, 2008)
         for p in parts:
-            add(p)
+            add(p, "year" if len(p) == 4 else "date_part")
             if len(p) == 4: # Year
-                add(p[2:]) # Short year (08)
+                add(p[2:], "short_year") # Short year (08)
         
         # Add Combinations: DDMM, MMDD, DDMMYYYY, YYYYMMDD
         # Assume parts are [DD, MM, YYYY] based on typical input, or try to be generic
         if len(parts) >= 2:
-            add(parts[0] + parts[1]) # DDMM
-            add(parts[1] + parts[0]) # MMDD
+            add(parts[0] + parts[1], "day_month") # DDMM
+            add(parts[1] + parts[0], "month_day") # MMDD
             if len(parts) >= 3:
-                add(parts[0] + parts[1] + parts[2]) # DDMMYYYY
-                add(parts[2] + parts[1] + parts[0]) # YYYYMMDD
+                add(parts[0] + parts[1] + parts[2], "full_date") # DDMMYYYY
+                add(parts[2] + parts[1] + parts[0], "iso_date") # YYYYMMDD
     
     specials = [s.strip() for s in special_chars.split(',') if s.strip()]
     # Removed empty default to prevent accidental massive duplication
     
     # 2. generating Variants (Case + Leet)
-    pool = set()
-    for w in base_words:
-        pool.add(w)
-        pool.add(w.lower())
-        pool.add(w.upper())
-        pool.add(w.capitalize())
+    pool = {}
+    for w, (kind, weight) in base_words.items():
+        variants = [(w, "typed"), (w.lower(), "lower"), (w.upper(), "upper"), (w.capitalize(), "capitalized")]
         if enable_leet:
-            pool.add(to_leet(w))
+            variants.append((to_leet(w), "leet"))
+        for variant, case in variants:
+            if variant not in pool or weight * CASE_WEIGHTS[case] > pool[variant][1]:
+                pool[variant] = (kind, weight * CASE_WEIGHTS[case])
             
     # Add specials to pool
     for s in specials:
-        pool.add(s)
-    
-    pool_list = list(pool)
-    pool_list.sort()
-    
-    # 3. Writing with Buffer
-    count = 0
-    with open(output_file, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as f:
-        
-        def write_if_valid(word):
-            if min_len <= len(word) <= max_len:
-                f.write(word + '\n')
-                return 1
-            return 0
-
-        # Dynamic Exhaustive Generation based on Depth
-        # Default Depth 3: Pool x Pool x Pool
-        for r in range(1, depth + 1):
-             for p in itertools.product(pool_list, repeat=r):
-                 count += write_if_valid("".join(p))
+        put(pool, s, "special")
+    return pool
 
-    return count
+def _build_pool(**profile):
+    """
+    Builds the sorted pool of profile words (names, substrings, dates, variants, specials).
+    """
+    return sorted(_pool_sources(**profile))
 
-    return count
+def _profile_key(profile):
+    """
+    Cache key of a profile's pool: a hash of its inputs (defaults filled in), of the
+    tables _pool_sources reads and of POOL_FORMAT (see there for when to bump it).
+    """
+    data = {"format": POOL_FORMAT, "profile": {**PROFILE_DEFAULTS, **profile},
+            "tables": [SOURCE_WEIGHTS, SOURCE_KINDS, SUBSTRING_WEIGHTS, CASE_WEIGHTS,
+                       sorted(LEET_MAP.items())]}
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('ascii')).hexdigest()
+
+class ProfilePool:
+    """
+    The weighted pool of one profile and what enumeration reads from it: the sorted
+    words, their encodings, the length distribution (budget, estimate) and, on first
+    use, the per-role length buckets of the probability order. None of it depends on
+    min_len / max_len / depth, so a new window or depth starts enumerating at once.
+    """
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.words = sorted(sources)
+        self.encoded = [(len(w), w.encode('utf-8')) for w in self.words]
+        self.length_dist = _length_dist(self.words)
+        self._by_role = None
+
+    def by_role(self):
+        """{role: _role_buckets(sources, role)} for every role, built once."""
+        if self._by_role is None:
+            self._by_role = {role: _role_buckets(self.sources, role) for role in (None, 0, 1, 2)}
+        return self._by_role
+
+class PoolCache:
+    """
+    ProfilePools by _profile_key: up to max_entries in memory (LRU) and, with a
+    directory, the weighted pools as JSON files there (up to max_files, least
+    recently used removed), so a new process skips the build too. Unreadable or
+    outdated files are rebuilt; a directory that can't be written is skipped.
+    """
+
+    def __init__(self, directory=None, max_entries=POOL_CACHE_ENTRIES, max_files=POOL_CACHE_FILES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self._entries = OrderedDict()  # key -> ProfilePool
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self, disk=False):
+        """Empties the memory cache (and deletes the pool files with disk=True)."""
+        with self._lock:
+            self._entries.clear()
+        if disk and self.directory:
+            for path in self._files(partial=True):
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+    def get(self, profile):
+        """(ProfilePool, "memory" / "disk" / "built") for the profile keyword arguments."""
+        key = _profile_key(profile)
+        with self._lock:
+            pool = self._entries.get(key)
+            if pool is not None:
+                self._entries.move_to_end(key)
+                return pool, "memory"
+        sources = self._load(key)
+        origin = "disk"
+        if sources is None:
+            sources = _pool_sources(**profile)
+            origin = "built"
+            self._save(key, sources)
+        pool = ProfilePool(sources)
+        with self._lock:
+            self._entries[key] = pool
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return pool, origin
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + POOL_CACHE_SUFFIX)
+
+    def _files(self, partial=False):
+        """Pool files of the directory (with partial, also temporary files left by interrupted writes)."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [os.path.join(self.directory, n) for n in names
+                if n.endswith(POOL_CACHE_SUFFIX) or (partial and POOL_CACHE_SUFFIX + "." in n)]
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding='ascii') as f:
+                data = json.load(f)
+            if data.get("format") != POOL_FORMAT or data.get("key") != key:
+                return None
+            sources = {word: (kind, weight) for word, kind, weight in data["sources"]}
+            os.utime(path)  # Recently used: pruned last
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        return sources
+
+    def _save(self, key, sources):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, POOL_CACHE_MODES[0], exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, POOL_CACHE_MODES[1])
+            with os.fdopen(fd, 'w', encoding='ascii') as f:
+                json.dump({"format": POOL_FORMAT, "key": key,
+                           "sources": [[word, kind, weight] for word, (kind, weight) in sources.items()]}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            return
+        self._prune()
+
+    def _prune(self):
+        files = []
+        for path in self._files():
+            with contextlib.suppress(OSError):
+                files.append((os.stat(path).st_mtime_ns, path))
+        files.sort(reverse=True)
+        for _, path in files[self.max_files:]:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+def _default_pool_dir():
+    """$WORDLIST_POOL_CACHE, else the user cache directory ("" / None: memory only)."""
+    if POOL_CACHE_ENV in os.environ:
+        return os.environ[POOL_CACHE_ENV] or None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "wordlist-generator", "pools")
+
+_default_pool_cache = None
+
+def _shared_pool_cache():
+    global _default_pool_cache
+    if _default_pool_cache is None:
+        _default_pool_cache = PoolCache(_default_pool_dir())
+    return _default_pool_cache
+
+def clear_pool_cache(pool_cache=None):
+    """
+    Forgets every cached profile pool: the memory cache and the pool files of the
+    cache directory (the shared default cache unless a PoolCache is given).
+    Returns the directory that was cleared, or None for a memory-only cache.
+    """
+    if pool_cache is None:
+        pool_cache = _shared_pool_cache()
+    pool_cache.clear(disk=True)
+    return pool_cache.directory
+
+def _profile_pool(pool_cache, stats=None, **profile):
+    """
+    The ProfilePool of a profile. pool_cache: None for the shared default cache,
+    a PoolCache, or False to build it without caching. stats["pool"] says where it came from.
+    """
+    if pool_cache is False:
+        pool, origin = ProfilePool(_pool_sources(**profile)), "built"
+    else:
+        pool, origin = (_shared_pool_cache() if pool_cache is None else pool_cache).get(profile)
+    if stats is not None:
+        stats["pool"] = {"words": len(pool.words), "origin": origin}
+    return pool
+
+def _pruned_runs(positions, min_len, max_len, encoded=None):
+    """
+    Yields (bytes, word_count) runs of every concatenation in product(*positions)
+    whose length is inside [min_len, max_len], in product order.
+    encoded: the positions' (length, UTF-8 bytes) entries, when the caller holds them.
+
+    Branch-and-bound on the partial length: with 'used' chars placed, position j only
+    offers entries that can still end inside the window given the shortest and longest
+    completions of the positions after it, so no out-of-window word is ever built.
+    The filtered entry lists keep each position's order, so output order is unchanged.
+    They are cached per window clamped to the position's own length range, so every
+    prefix whose window spans the same length buckets shares one list.
+    The last position is emitted for a whole prefix with one bytes.join.
+    """
+    n = len(positions)
+    if n == 0 or min_len > max_len or not all(positions):
+        return
+
+    # Shortest / longest entry of each position, and completion of positions j..n-1
+    if encoded is None:
+        encoded = [[(len(w), w.encode('utf-8')) for w in pos] for pos in positions]
+    span = [(min(l for l, _ in entries), max(l for l, _ in entries)) for entries in encoded]
+    rest_min = [0] * (n + 1)
+    rest_max = [0] * (n + 1)
+    for j in range(n - 1, -1, -1):
+        rest_min[j] = rest_min[j + 1] + span[j][0]
+        rest_max[j] = rest_max[j + 1] + span[j][1]
+
+    cache = {}
+
+    def allowed(j, used):
+        """(length, encoded) entries of position j that keep a window-valid completion."""
+        lo = max(span[j][0], min_len - used - rest_max[j + 1])
+        hi = min(span[j][1], max_len - used - rest_min[j + 1])
+        if lo > hi:
+            return ()
+        key = (j, lo, hi)
+        if key not in cache:
+            if (lo, hi) == span[j]:
+                cache[key] = encoded[j]
+            else:
+                cache[key] = [(l, enc) for l, enc in encoded[j] if lo <= l <= hi]
+        return cache[key]
+
+    last = n - 1
+
+    def walk(j, used, prefix):
+        if j == last:
+            tails = [enc for _, enc in allowed(j, used)]
+            if tails:
+                yield prefix + (b"\n" + prefix).join(tails) + b"\n", len(tails)
+            return
+        for length, enc in allowed(j, used):
+            yield from walk(j + 1, used + length, prefix + enc)
+
+    yield from walk(0, 0, b"")
+
+def _wordlist_runs(pool_list, min_len, max_len, depth, encoded=None):
+    """
+    Yields (bytes, word_count) runs of every pool combination up to 'depth' whose
+    length falls inside [min_len, max_len], in depth then pool order.
+    encoded: the pool's (length, UTF-8 bytes) entries (ProfilePool.encoded).
+    """
+    # Dynamic Exhaustive Generation based on Depth
+    # Default Depth 3: Pool x Pool x Pool, pruned by length (see _pruned_runs)
+    for r in range(1, depth + 1):
+        yield from _pruned_runs([pool_list] * r, min_len, max_len, encoded and [encoded] * r)
+
+def _role_buckets(sources, role):
+    """
+    {length: [(cost, encoded word), ...] cheapest first} of the pool for one part of a
+    candidate; cost = -log(weight), role indexes ROLE_WEIGHTS (None: a one-part candidate).
+    """
+    buckets = {}
+    for word, (kind, weight) in sources.items():
+        if role is not None:
+            weight *= ROLE_WEIGHTS[kind][role]
+        buckets.setdefault(len(word), []).append((-math.log(weight), word.encode('utf-8')))
+    for entries in buckets.values():
+        entries.sort()
+    return buckets
+
+def _length_signatures(buckets, min_len, max_len):
+    """Yields every tuple of part lengths (one bucket key per part) whose total is inside [min_len, max_len]."""
+    lengths = [sorted(b) for b in buckets]
+    n = len(lengths)
+    rest_min = [0] * (n + 1)
+    rest_max = [0] * (n + 1)
+    for j in range(n - 1, -1, -1):
+        rest_min[j] = rest_min[j + 1] + lengths[j][0]
+        rest_max[j] = rest_max[j + 1] + lengths[j][-1]
+
+    def walk(j, used, sig):
+        if j == n:
+            yield sig
+            return
+        for length in lengths[j]:
+            if min_len - rest_max[j + 1] <= used + length <= max_len - rest_min[j + 1]:
+                yield from walk(j + 1, used + length, sig + (length,))
 
-def combinator_tool(file_a, file_b, output_file="wordlist.txt"):
+    yield from walk(0, 0, ())
+
+def _ranked_runs(sources, min_len, max_len, depth, quotas=None, by_role=None):
+    """
+    Yields (bytes, word_count) runs of the same words as _wordlist_runs, most probable
+    first (see SOURCE_WEIGHTS), without building the candidate set.
+
+    Every depth and tuple of part lengths that fits the window ("signature") is a
+    product of per-part lists sorted by cost, and a candidate's cost is the sum of its
+    parts' costs. A heap holds the frontier of all those products: popping a tuple of
+    list indexes pushes its successors, each one index bumped at or after the last
+    non-zero index (so every tuple has exactly one parent and is pushed once). Costs
+    never fall along a list, so words come out in ascending cost. The last part's
+    list is walked in place for as long as it stays under the heap's best cost. The
+    frontier, not the output, is what stays in memory.
+
+    quotas ({(depth, length): words}, see _budget_plan) keeps the best words of each
+    bucket: a bucket at its quota stops growing and its frontier drains unexpanded.
+    by_role: the pool's role buckets when already built (ProfilePool.by_role()).
+    """
+    if not sources or min_len > max_len:
+        return
+    if by_role is None:
+        by_role = {role: _role_buckets(sources, role) for role in (None, 0, 1, 2)}
+    products = []
+    left = {}  # Words still allowed per (depth, length) bucket
+    heap = []
+    for r in range(1, depth + 1):
+        roles = (None,) if r == 1 else (0,) + (1,) * (r - 2) + (2,)
+        buckets = [by_role[role] for role in roles]
+        depth_cost = -(r - 1) * math.log(DEPTH_WEIGHT)
+        for sig in _length_signatures(buckets, min_len, max_len):
+            bucket = (r, sum(sig))
+            if bucket not in left:
+                left[bucket] = math.inf if quotas is None else quotas.get(bucket, 0)
+            if not left[bucket]:
+                continue
+            lists = tuple(b[length] for b, length in zip(buckets, sig))
+            cost = depth_cost - math.log(_length_weight(sum(sig))) + sum(lst[0][0] for lst in lists)
+            heap.append((cost, len(products), (0,) * r))
+            products.append((lists, bucket))
+    heapq.heapify(heap)
+
+    batch = []
+    pop, push = heapq.heappop, heapq.heappush
+    while heap:
+        cost, sig, idx = pop(heap)
+        lists, bucket = products[sig]
+        if not left[bucket]:
+            continue
+        *front, k = idx
+        if not k:  # Bumps of the earlier parts; with a non-zero last index, bumping it is the only successor
+            j = len(front) - 1
+            while j > 0 and not front[j]:
+                j -= 1
+            for j in range(max(j, 0), len(front)):
+                i = front[j] + 1
+                lst = lists[j]
+                if i < len(lst):
+                    push(heap, (cost + lst[i][0] - lst[i - 1][0], sig, (*front[:j], i, *front[j + 1:], 0)))
+        # Walk the last part while it costs no more than the best tuple waiting
+        prefix = b"".join([lst[i][1] for lst, i in zip(lists, front)])
+        tail = lists[-1]
+        bound = heap[0][0] if heap else math.inf
+        while True:
+            batch.append(prefix + tail[k][1])
+            left[bucket] -= 1
+            k += 1
+            if k == len(tail) or not left[bucket]:
+                break
+            cost += tail[k][0] - tail[k - 1][0]
+            if cost > bound:
+                push(heap, (cost, sig, (*front, k)))
+                break
+        if len(batch) >= RANKED_BATCH:
+            yield b"\n".join(batch) + b"\n", len(batch)
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n", len(batch)
+
+def _share_out(demands, budget, policy):
+    """
+    Splits an integer budget over per-bucket demands (same unit); no share exceeds its demand.
+    "fair": equal shares, and what small buckets leave over goes to the others (max-min fair);
+    "proportional": the same fraction of every bucket, the rounding remainder going to the
+    largest fractional parts (with budget >= the buckets, each non-empty one keeps at least
+    one unit); "depth-first": buckets in order until
+    the budget is spent (plain truncation). A callable policy(demands, budget) returns the shares.
+    """
+    if callable(policy):
+        return list(policy(demands, budget))
+    if policy not in BUDGET_POLICIES:
+        raise ValueError(f"Unknown budget policy: {policy}")
+    total = sum(demands)
+    if budget >= total:
+        return list(demands)
+    if policy == "proportional":
+        # One unit per non-empty bucket first when the budget allows, the rest by fraction
+        floor = [1 if d and budget >= len(demands) else 0 for d in demands]
+        budget -= sum(floor)
+        rest = [d - f for d, f in zip(demands, floor)]
+        total = sum(rest)
+        shares = [f + r * budget // total for f, r in zip(floor, rest)]
+        order = sorted(range(len(rest)), key=lambda i: -(rest[i] * budget % total))
+        for i in order[:budget - sum(r * budget // total for r in rest)]:
+            shares[i] += 1
+        return shares
+    shares = [0] * len(demands)
+    if policy == "depth-first":
+        for i, d in enumerate(demands):
+            shares[i] = min(d, budget)
+            budget -= shares[i]
+        return shares
+    # Smallest demands first: each takes at most an equal split of what is left
+    order = sorted(range(len(demands)), key=demands.__getitem__)
+    for k, i in enumerate(order):
+        shares[i] = min(demands[i], budget // (len(order) - k))
+        budget -= shares[i]
+    for i, d in enumerate(demands):  # Rounding remainder, in bucket order
+        extra = min(budget, d - shares[i])
+        shares[i] += extra
+        budget -= extra
+    return shares
+
+def _proportional_words(buckets, max_bytes):
+    """
+    Words per _wordlist_buckets entry for "proportional" under a byte cap: the same
+    fraction of every bucket, rounded down, then one more word per bucket while it
+    fits in the bytes left (buckets left empty first, then the largest fractional parts).
+    """
+    total = sum(b for _, _, b in buckets)
+    counts = [c for _, c, _ in buckets]
+    if max_bytes >= total:
+        return counts
+    quotas = [c * max_bytes // total for c in counts]
+    left = max_bytes - sum(b * q // c for q, (_, c, b) in zip(quotas, buckets) if c)
+    order = sorted((i for i, c in enumerate(counts) if c),
+                   key=lambda i: (quotas[i] > 0, -(counts[i] * max_bytes % total)))
+    for i in order:
+        _, c, b = buckets[i]
+        cost = b * (quotas[i] + 1) // c - b * quotas[i] // c
+        if cost <= left:
+            quotas[i] += 1
+            left -= cost
+    return quotas
+
+def _budget_plan(buckets, max_words=None, max_bytes=None, policy="fair"):
+    """
+    Words to keep per _wordlist_buckets entry under max_words / max_bytes. Each cap is
+    shared out on its own (bytes in bytes, then turned into whole words at the bucket's
+    average word size; "proportional" rounds in words, see _proportional_words) and a
+    bucket keeps the smaller of its two quotas.
+    """
+    quotas = [c for _, c, _ in buckets]
+    if max_words is not None:
+        quotas = [min(q, share) for q, share in zip(quotas, _share_out(quotas[:], max(0, max_words), policy))]
+    if max_bytes is not None:
+        if policy == "proportional":
+            words = _proportional_words(buckets, max(0, max_bytes))
+        else:
+            shares = _share_out([b for _, _, b in buckets], max(0, max_bytes), policy)
+            words = [share * c // b for share, (_, c, b) in zip(shares, buckets)]
+        quotas = [min(q, w) for q, w in zip(quotas, words)]
+    return quotas
+
+def _take_words(runs, n):
+    """The first n words of (bytes, word_count) runs; the run holding the n-th word is cut after it."""
+    if n <= 0:
+        return
+    for data, count in runs:
+        if count >= n:
+            if count > n:
+                cut = -1
+                for _ in range(n):
+                    cut = data.index(b"\n", cut + 1)
+                data = data[:cut + 1]
+            yield data, n
+            return
+        n -= count
+        yield data, count
+
+def _byte_capped(blocks, max_bytes):
+    """Blocks up to max_bytes in all, the last one cut at a line end (averages can round up on non-ASCII words)."""
+    left = max_bytes
+    for data, count in blocks:
+        if len(data) > left:
+            cut = data.rfind(b"\n", 0, left) + 1
+            if cut:
+                yield data[:cut], data.count(b"\n", 0, cut)
+            return
+        left -= len(data)
+        yield data, count
+
+def _wordlist_blocks(min_len=4, max_len=25, depth=3, metrics=None, order="lexical",
+                     max_words=None, max_bytes=None, budget_policy="fair", stats=None, pool_cache=None, **profile):
+    if order not in WORDLIST_ORDERS:
+        raise ValueError(f"Unknown wordlist order: {order}")
+    with _stage(metrics, "pool"):
+        pool = _profile_pool(pool_cache, stats, **profile)
+        sources, pool_list = pool.sources, pool.words
+        if max_words is None and max_bytes is None:
+            if order == "probability":
+                return _coalesce(_ranked_runs(sources, min_len, max_len, depth, by_role=pool.by_role()))
+            return _coalesce(_wordlist_runs(pool_list, min_len, max_len, depth, pool.encoded))
+
+        # Budget: exact per-bucket sizes, quotas by policy, then only the kept words are built
+        buckets = _wordlist_buckets(pool_list, min_len, max_len, depth, pool.length_dist)
+        quotas = _budget_plan(buckets, max_words, max_bytes, budget_policy)
+    if stats is not None:
+        kept_bytes = sum(b * q // c for (_, c, b), q in zip(buckets, quotas))
+        total_words = sum(c for _, c, _ in buckets)
+        total_bytes = sum(b for _, _, b in buckets)
+        stats["budget"] = {
+            "policy": budget_policy if isinstance(budget_policy, str) else getattr(budget_policy, "__name__", "custom"),
+            "max_words": max_words, "max_bytes": max_bytes,
+            "words": sum(quotas), "bytes": kept_bytes,
+            "cut_words": total_words - sum(quotas), "cut_bytes": total_bytes - kept_bytes,
+            # (depth, length, words in the bucket, words kept)
+            "buckets": [(r, length, c, q) for ((r, length), c, _), q in zip(buckets, quotas)],
+        }
+    if order == "probability":
+        runs = _ranked_runs(sources, min_len, max_len, depth,
+                            {bucket: q for (bucket, _, _), q in zip(buckets, quotas)}, pool.by_role())
+    else:
+        # Depth, then length, then pool order: an exact-length window builds only that bucket
+        runs = (run for ((r, length), _, _), q in zip(buckets, quotas) if q
+                for run in _take_words(_pruned_runs([pool_list] * r, length, length, [pool.encoded] * r), q))
+    blocks = _coalesce(runs)
+    return _byte_capped(blocks, max_bytes) if max_bytes is not None else blocks
+
+@_instrumented
+def generate_wordlist(
+    first="", middle="", last="", 
+    aliases="", usernames="", extra="", 
+    dob="", special_chars="", 
+    min_len=4, max_len=25, 
+    enable_leet=False, 
+    depth=3,
+    output_file="wordlist.txt",
+    dedup=False,
+    stats=None,
+    metrics=None,
+    order="lexical",
+    max_words=None,
+    max_bytes=None,
+    budget_policy="fair",
+    pool_cache=None,
+    line_index=False
+):
+    """
+    Generates a wordlist based on inputs.
+    output_file="-" streams to stdout (see _write_blocks).
+    Different combinations can spell the same word ('ab'+'c' / 'a'+'bc'); dedup=True
+    (or a Deduper with its own budget) drops the repeats, and stats["duplicates"]
+    reports how many.
+    order="lexical" writes depth by depth in pool order; order="probability" writes
+    the same words most likely first (see _ranked_runs), so a run cut short has
+    tried the best candidates. It is several times slower per word.
+
+    max_words / max_bytes cap the output. The cap is shared over (depth, total length)
+    buckets by budget_policy (see _share_out; default "fair", so depth 4 is not starved
+    by depths 1-3) from the exact bucket sizes, and each bucket only builds the words
+    it keeps: the lexical order becomes depth, then length, then pool order; the
+    probability order keeps the best words of each bucket. stats["budget"] reports
+    what was kept and cut, per bucket.
+
+    The profile's pool (words, variants, weights and their length index) is cached
+    by a hash of the profile inputs (see PoolCache): re-running with another window,
+    depth, order or budget skips straight to enumeration, in this process and, via
+    the cache directory ($WORDLIST_POOL_CACHE), in later ones. pool_cache: a
+    PoolCache of your own, or False to always rebuild. stats["pool"] says whether the
+    pool came from memory, disk or was built. line_index: see generate_from_mask.
+    """
+    blocks = _wordlist_blocks(
+        first=first, middle=middle, last=last,
+        aliases=aliases, usernames=usernames, extra=extra,
+        dob=dob, special_chars=special_chars, enable_leet=enable_leet,
+        min_len=min_len, max_len=max_len, depth=depth, metrics=metrics, order=order,
+        max_words=max_words, max_bytes=max_bytes, budget_policy=budget_policy, stats=stats,
+        pool_cache=pool_cache,
+    )
+    return _write_blocks(_dedup_stage(blocks, dedup, stats), output_file, line_index, metrics=metrics)
+
+@_instrumented
+def iter_wordlist(min_len=4, max_len=25, depth=3, dedup=False, stats=None, metrics=None, order="lexical",
+                  max_words=None, max_bytes=None, budget_policy="fair", pool_cache=None, **profile):
+    """
+    Streaming generate_wordlist: yields newline-terminated UTF-8 byte chunks
+    instead of writing a file. Takes the same keyword arguments (minus output_file).
+    """
+    blocks = _wordlist_blocks(min_len, max_len, depth, metrics, order,
+                              max_words, max_bytes, budget_policy, stats, pool_cache, **profile)
+    return _chunks(_metered(_dedup_stage(blocks, dedup, stats), metrics))
+
+def _read_words(path):
+    """Stripped, non-empty lines of a text wordlist (optionally compressed), UTF-8 encoded."""
+    with _open_input(path) as f:
+        for line in f:
+            word = line.strip()
+            if word:
+                yield word.encode('utf-8')
+
+def _range_words(path, start, end):
+    """_read_words for the line-aligned bytes path[start:end] (same newline handling)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8', 'ignore')
+    for line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n'):
+        word = line.strip()
+        if word:
+            yield word.encode('utf-8')
+
+def _b_batches(file_b, memory_mb=None):
+    """
+    File B as batches of blocks. A block is (b"b1\nb2\n...bn", n): up to BLOCK_SIZE of
+    words joined into one bytes object, so B costs about its file size in memory
+    instead of one Python object per word. A batch holds memory_mb worth of blocks
+    (None: one batch with all of B).
+    """
+    budget = None if memory_mb is None else max(1, int(memory_mb * 1024 * 1024))
+    block_size = BLOCK_SIZE if budget is None else min(BLOCK_SIZE, budget)
+    batch, held = [], 0
+    buf, n = bytearray(), 0
+    for word in _read_words(file_b):
+        buf += word + b"\n"
+        n += 1
+        if len(buf) >= block_size:
+            batch.append((bytes(buf[:-1]), n))
+            held += len(buf)
+            buf, n = bytearray(), 0
+            if budget is not None and held >= budget:
+                yield batch
+                batch, held = [], 0
+    if n:
+        batch.append((bytes(buf[:-1]), n))
+    if batch:
+        yield batch
+
+def _spilled_blocks(spill):
+    """Streams blocks back out of a spill file of newline-terminated words."""
+    spill.seek(0)
+    leftover = b""
+    for data in iter(lambda: spill.read(BLOCK_SIZE), b""):
+        data = leftover + data
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            leftover = data
+            continue
+        block, leftover = data[:cut], data[cut + 1:]
+        yield block, block.count(b"\n") + 1
+
+def _combine(word_a, block_b):
+    """word_a + b for every b of a block, in one replace()."""
+    return word_a + block_b.replace(b"\n", b"\n" + word_a) + b"\n"
+
+def _combinator_runs(words_a, file_b, memory_mb=None, order="a-major"):
+    """
+    (bytes, word_count) runs of WordA + WordB; words_a() returns a fresh iterator over A.
+
+    order="a-major": every B word for the first A word, then the next A word (the
+    classic order). B is held in memory; past memory_mb it is spilled to a temp
+    file once and streamed back for each A word.
+    order="block-major": B is read one memory_mb batch at a time and A is re-scanned
+    per batch. Same output as a-major while B fits in one batch; beyond that the
+    order changes but B is never held whole or re-read.
+    """
+    if order not in ("a-major", "block-major"):
+        raise ValueError(f"Unknown combinator order: {order}")
+    batches = _b_batches(file_b, memory_mb)
+    if order == "block-major":
+        for batch in batches:
+            for word_a in words_a():
+                for block, n in batch:
+                    yield _combine(word_a, block), n
+        return
+
+    first = next(batches, None)
+    if first is None:
+        return  # Empty File B: nothing to combine, A is never read
+    second = next(batches, None)
+    if second is None:
+        for word_a in words_a():
+            for block, n in first:
+                yield _combine(word_a, block), n
+        return
+    with tempfile.TemporaryFile() as spill:
+        for batch in itertools.chain((first, second), batches):
+            for block, _ in batch:
+                spill.write(block + b"\n")
+        first = second = None
+        for word_a in words_a():
+            for block, n in _spilled_blocks(spill):
+                yield _combine(word_a, block), n
+
+def _combinator_blocks(file_a, file_b, memory_mb=None, order="a-major"):
+    return _coalesce(_combinator_runs(lambda: _read_words(file_a), file_b, memory_mb, order))
+
+def _write_combinator_shard(job):
+    """Worker: the combinator output for the A words in file_a[start:end]."""
+    file_a, start, end, file_b, memory_mb, order, path = job
+    runs = _combinator_runs(lambda: _range_words(file_a, start, end), file_b, memory_mb, order)
+    return _write_blocks(_coalesce(runs), path, line_index=False)
+
+@_instrumented
+def combinator_tool(file_a, file_b, output_file="wordlist.txt", dedup=False, stats=None,
+                    memory_mb=None, order="a-major", workers=1, merge=True, metrics=None, line_index=False):
     """
     Combines two wordlists: WordA + WordB.
-    Optimized: Reads File B into memory (smaller one ideally), streams File A.
+    Streams File A; File B is held as joined byte blocks, at most memory_mb of them
+    at a time (see _combinator_runs for how order="a-major" / "block-major" use it).
+    dedup / stats behave as in generate_wordlist (overlapping inputs repeat words).
+
+    workers > 1 (0 = all cores) splits File A into line-aligned byte ranges written
+    on a process pool, memory_mb shared between the workers; merged in range order
+    the a-major output is unchanged. dedup and compressed File A run serially.
+    line_index: see generate_from_mask.
     """
-    # Load File B into memory (assuming it fits, e.g. names)
-    pool_b = []
     try:
-        with open(file_b, 'r', encoding='utf-8', errors='ignore') as fb:
-            pool_b = [line.strip() for line in fb if line.strip()]
+        _open_input(file_b).close()
     except Exception as e:
         return f"Error reading File B: {e}"
 
-    count = 0
-    buffer = []
+    workers = _resolve_workers(workers)
+    if workers == 1 or dedup or _codec(file_a):
+        blocks = _combinator_blocks(file_a, file_b, memory_mb, order)
+        return _write_blocks(_dedup_stage(blocks, dedup, stats), output_file, line_index, metrics=metrics)
+
+    if memory_mb is not None:
+        memory_mb /= workers
+    with open(file_a, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return _write_blocks(iter(()), output_file, line_index, metrics=metrics)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = _line_ranges(mm, workers * SHARDS_PER_WORKER)
+    jobs = [(file_a, start, end, file_b, memory_mb, order) for start, end in ranges]
+    return _run_shards(_write_combinator_shard, jobs, output_file, workers, merge, metrics, line_index)
+
+@_instrumented
+def iter_combinator(file_a, file_b, dedup=False, stats=None, memory_mb=None, order="a-major", metrics=None):
+    """Streaming combinator_tool: yields byte chunks (raises if File B can't be read)."""
+    _open_input(file_b).close()
+    blocks = _combinator_blocks(file_a, file_b, memory_mb, order)
+    return _chunks(_metered(_dedup_stage(blocks, dedup, stats), metrics))
+
+def _gap_separators(separators, gaps):
+    """
+    Separator choices for each of the gaps between inputs. None: no separator;
+    a string or a flat list of strings: those choices in every gap; a list of
+    per-gap entries (each a string or a list of strings): one entry per gap.
+    """
+    if separators is None:
+        return [[""]] * gaps
+    if isinstance(separators, str):
+        return [[separators]] * gaps
+    separators = list(separators)
+    if all(isinstance(sep, str) for sep in separators):
+        return [separators] * gaps
+    if len(separators) != gaps:
+        raise ValueError(f"Expected {gaps} per-gap separator lists, got {len(separators)}")
+    return [[sep] if isinstance(sep, str) else list(sep) for sep in separators]
+
+def _multi_positions(files, separators=None):
+    """Product positions for files[0] + sep + files[1] + ...: every input loaded as a word list."""
+    gaps = _gap_separators(separators, max(0, len(files) - 1))
+    positions = []
+    for i, path in enumerate(files):
+        if i and gaps[i - 1] != [""]:  # A lone empty separator changes nothing
+            positions.append(gaps[i - 1])
+        positions.append([w.decode('utf-8') for w in _read_words(path)])
+    return positions
+
+def _multi_combinator_blocks(files, separators=None, min_len=0, max_len=None):
+    positions = _multi_positions(files, separators)
+    if max_len is None:
+        max_len = sum(max((len(w) for w in pos), default=0) for pos in positions)
+    return _coalesce(_pruned_runs(positions, min_len, max_len))
+
+@_instrumented
+def multi_combinator_tool(files, output_file="wordlist.txt", separators=None, min_len=0, max_len=None,
+                          dedup=False, stats=None, metrics=None, line_index=False):
+    """
+    N-way combinator: files[0] + sep + files[1] + sep + ... for every combination,
+    in input order (e.g. first + ['', '.', '_'] + last + years).
+    separators: see _gap_separators. Only words of min_len..max_len characters are
+    built: inputs are length-bucketed and pruned as in generate_wordlist.
+    Every input is held in memory. dedup / stats behave as in generate_wordlist;
+    line_index as in generate_from_mask.
+    """
+    try:
+        with _stage(metrics, "pool"):
+            blocks = _multi_combinator_blocks(files, separators, min_len, max_len)
+    except (OSError, UnicodeError) as e:
+        return f"Error reading input: {e}"
+    return _write_blocks(_dedup_stage(blocks, dedup, stats), output_file, line_index, metrics=metrics)
+
+@_instrumented
+def iter_multi_combinator(files, separators=None, min_len=0, max_len=None, dedup=False, stats=None,
+                          metrics=None):
+    """Streaming multi_combinator_tool: yields byte chunks (raises if an input can't be read)."""
+    with _stage(metrics, "pool"):
+        blocks = _multi_combinator_blocks(files, separators, min_len, max_len)
+    return _chunks(_metered(_dedup_stage(blocks, dedup, stats), metrics))
+
+def _hybrid_suffixes(mask, custom_charsets=None):
+    """Every mask candidate, UTF-8 encoded, in keyspace order."""
+    return [_utf8(w) for w in Keyspace([Mask(mask, custom_charsets).positions]).iter_range()]
+
+def _hybrid_blocks(file_a, mask, skip=0, limit=None, custom_charsets=None):
+    # Pre-calculate all mask suffixes
+    suffixes = _hybrid_suffixes(mask, custom_charsets)
     
-    with open(file_a, 'r', encoding='utf-8', errors='ignore') as fa, \
-         open(output_file, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as fout:
+    def runs():
+        # Split skip into whole words to pass over and an offset into the first suffix run
+        skip_words, offset = divmod(skip, len(suffixes)) if suffixes else (0, 0)
+        remaining = limit
         
-        for line_a in fa:
-            word_a = line_a.strip()
-            if not word_a: continue
+        for word in _read_words(file_a):
+            if skip_words:
+                skip_words -= 1
+                continue
             
-            for word_b in pool_b:
-                fout.write(word_a + word_b + '\n')
-                count += 1
-                
-    return count
+            batch = suffixes[offset:] if offset else suffixes
+            offset = 0
+            if remaining is not None:
+                batch = batch[:remaining]
+                remaining -= len(batch)
+            
+            if batch:
+                yield word + (b"\n" + word).join(batch) + b"\n", len(batch)
+            if remaining == 0:
+                break
+    return _coalesce(runs())
 
-def hybrid_tool(file_a, mask, output_file="wordlist.txt"):
+@_instrumented
+def hybrid_tool(file_a, mask, output_file="wordlist.txt", skip=0, limit=None, metrics=None, custom_charsets=None,
+                line_index=False):
     """
     Hybrid Attack: Wordlist + Mask.
     e.g. File has 'Admin', Mask is '?d?d' -> Admin00 - Admin99.
+    custom_charsets: the mask's ?1 .. ?4; line_index: see generate_from_mask.
+    Candidate i is word i // mask_size + suffix i % mask_size, so skip / limit
+    jump over whole words without generating their suffixes.
     """
-    # 1. Parse Mask Pools (Reuse logic roughly or call internal helper if refactored)
-    # Re-impl simple parser here for robust standalone
-    pools = []
-    i = 0
-    n = len(mask)
-    while i < n:
-        char = mask[i]
-        if char == '?' and i+1 < n:
-            code = mask[i+1]
-            if code == 'd': pools.append(string.digits)
-            elif code == 'l': pools.append(string.ascii_lowercase)
-            elif code == 'u': pools.append(string.ascii_uppercase)
-            elif code == 's': pools.append(string.punctuation)
-            elif code == 'a': pools.append(string.digits + string.ascii_letters + string.punctuation)
-            elif code == '?': pools.append(['?'])
-            else: pools.append(['?'])
-            i += 2
-        else:
-            pools.append([char])
-            i += 1
-            
-    # Pre-calculate all mask suffixes
-    suffixes = ["".join(p) for p in itertools.product(*pools)]
-    
+    with _stage(metrics, "parse"):
+        blocks = _hybrid_blocks(file_a, mask, skip, limit, custom_charsets)
+    return _write_blocks(blocks, output_file, line_index, metrics=metrics)
+
+@_instrumented
+def iter_hybrid(file_a, mask, skip=0, limit=None, metrics=None, custom_charsets=None):
+    """Streaming hybrid_tool: yields byte chunks."""
+    with _stage(metrics, "parse"):
+        blocks = _hybrid_blocks(file_a, mask, skip, limit, custom_charsets)
+    return _chunks(_metered(blocks, metrics))
+
+RULE_BATCH_OUTPUTS = 65536  # Words per rule batch ~= this / number of rules
+RULE_TASK_OUTPUTS = 1 << 20  # Candidates per process-pool task (bounds each result's size)
+RULE_TASKS_IN_FLIGHT = 2     # Tasks queued per worker ahead of the writer
+
+def _load_rules(rule_str="", rule_file=None, count_hits=False):
+    """RuleSet from the lines of rule_str plus rule_file; no rules at all means ':' (words unchanged)."""
+    lines = [line for line in rule_str.splitlines() if line.strip()] if rule_str else []
+    if rule_file:
+        lines.extend(rules.read_rule_file(rule_file))
+    return rules.RuleSet(lines or [":"], count_hits)
+
+def _expand_joined(ruleset, words):
+    """(newline-terminated rule outputs, count) for a list of words, in RULE_BATCH_OUTPUTS steps."""
+    step = max(1, RULE_BATCH_OUTPUTS // max(1, len(ruleset)))
+    parts = []
     count = 0
-    with open(file_a, 'r', encoding='utf-8', errors='ignore') as fa, \
-         open(output_file, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as fout:
-        
-        for line in fa:
-            word = line.strip()
-            if not word: continue
-            
-            for s in suffixes:
-                fout.write(word + s + '\n')
-                count += 1
-    return count
+    for i in range(0, len(words), step):
+        out = ruleset.expand(words[i:i + step])
+        if out:
+            parts.append(b"\n".join(out) + b"\n")
+            count += len(out)
+    return b"".join(parts), count
+
+_worker_rules = None
+
+def _init_rules_worker(rule_lines, count_hits):
+    """Pool initializer: every worker compiles the rule set once."""
+    global _worker_rules
+    _worker_rules = rules.RuleSet(rule_lines, count_hits)
+
+def _expand_task(blob):
+    """Worker: (outputs, count, hits, unchanged) for a newline-joined batch of words; no counters unless counting."""
+    ruleset = _worker_rules
+    ruleset.reset_hits()
+    data, count = _expand_joined(ruleset, blob.split(b"\n"))
+    if not ruleset.counting:
+        return data, count, None, None
+    return data, count, list(ruleset.hits), list(ruleset.unchanged)
 
-def apply_rules(file_input, rule_str, output_file="wordlist.txt"):
+def _rules_runs_parallel(words, ruleset, workers, ordered):
     """
-    Apply Standard Transformation rules to a wordlist.
-    Supported: $x (Append), ^x (Prepend), u (Upper), l (Lower), c (Title), r (Reverse), d (Duplicate)
+    Batches of words expanded on a process pool, at most RULE_TASKS_IN_FLIGHT per
+    worker ahead of the consumer. ordered=True yields the batches in input order
+    (output identical to the serial run); ordered=False yields each as it finishes.
+    Worker hit counters are added into ruleset's.
     """
-    count = 0
-    with open(file_input, 'r', encoding='utf-8', errors='ignore') as fin, \
-         open(output_file, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as fout:
-        
-        for line in fin:
-            word = line.strip()
-            if not word: continue
-            
-            # Process Rule String (e.g. "c $1")
-            # We apply ALL rules in sequence to the word
-            new_word = word
-            
-            # Parse rules split by space ?? Or standard strict chars?
-            # Standard rules are usually line-separated in a file. 
-            # Here user likely types "u $!" (Upper then Append !)
-            rules = rule_str.split()
-            
-            for rule in rules:
-                if not new_word: break
-                
-                if rule == 'u': new_word = new_word.upper()
-                elif rule == 'l': new_word = new_word.lower()
-                elif rule == 'c': new_word = new_word.capitalize()
-                elif rule == 'r': new_word = new_word[::-1]
-                elif rule == 'd': new_word = new_word + new_word
-                elif rule.startswith('$') and len(rule) > 1:
-                    new_word = new_word + rule[1:]
-                elif rule.startswith('^') and len(rule) > 1:
-                    new_word = rule[1:] + new_word
-                    
-            fout.write(new_word + '\n')
-            count += 1
-    return count
+    batch_size = max(1, RULE_TASK_OUTPUTS // max(1, len(ruleset)))
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_rules_worker,
+                               initargs=(ruleset.rules, ruleset.counting))
+    pending = deque() if ordered else set()
+
+    def collect(future):
+        data, count, hits, unchanged = future.result()
+        if hits is not None:
+            ruleset.hits[:] = map(int.__add__, ruleset.hits, hits)
+            ruleset.unchanged[:] = map(int.__add__, ruleset.unchanged, unchanged)
+        return data, count
+
+    def finished():
+        if ordered:
+            return [pending.popleft()]
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        pending.difference_update(done)
+        return done
+
+    try:
+        for batch in iter(lambda: list(itertools.islice(words, batch_size)), []):
+            while len(pending) >= workers * RULE_TASKS_IN_FLIGHT:
+                for future in finished():
+                    yield collect(future)
+            future = pool.submit(_expand_task, b"\n".join(batch))
+            pending.append(future) if ordered else pending.add(future)
+        while pending:
+            for future in finished():
+                yield collect(future)
+    finally:
+        pool.shutdown(cancel_futures=True)
 
-def search_in_file(filename, query, skip=0, limit=2000):
+def _rules_blocks(file_input, ruleset, workers=1, ordered=True, stats=None):
     """
-    Optimized Search using Chunked Reading (1MB blocks).
-    Much faster than line-by-line for large files.
+    Every rule applied to every word of file_input, word-major (as hashcat --stdout).
+    workers > 1 expands batches on a process pool (see _rules_runs_parallel).
+    stats (optional dict) receives, once the run finishes, 'words' read, 'rejected'
+    (candidates dropped by reject functions) and 'rule_hits': (rule, emitted,
+    unchanged) per rule, when ruleset counts hits.
+    """
+    workers = _resolve_workers(workers)
+    read = [0]
+
+    def counted(words):
+        for read[0], word in enumerate(words, 1):
+            yield word
+
+    def runs():
+        words = counted(_read_words(file_input))
+        if workers > 1:
+            yield from _rules_runs_parallel(words, ruleset, workers, ordered)
+        else:
+            batch_size = max(1, RULE_BATCH_OUTPUTS // max(1, len(ruleset)))
+            for batch in iter(lambda: list(itertools.islice(words, batch_size)), []):
+                out = ruleset.expand(batch)
+                if out:
+                    yield b"\n".join(out) + b"\n", len(out)
+        if stats is not None:
+            stats["words"] = read[0]
+            if ruleset.counting:
+                stats["rejected"] = read[0] * len(ruleset) - sum(ruleset.hits)
+                stats["rule_hits"] = list(zip(ruleset.rules, ruleset.hits, ruleset.unchanged))
+    return _coalesce(runs())
+
+@_instrumented
+def apply_rules(file_input, rule_str="", output_file="wordlist.txt", rule_file=None,
+                workers=1, ordered=True, stats=None, metrics=None, line_index=False):
+    """
+    Applies hashcat rules to a wordlist: every rule line of rule_str (one per line)
+    and of rule_file, to every word. See core/rules.py for the supported functions;
+    the old space-separated form ('c $2024 ^The') still works.
+    Invalid lines are skipped like hashcat does; returns an error string when no
+    rule is usable.
+    workers > 1 (0 = all cores) spreads batches of words over a process pool;
+    ordered=False writes batches as they finish instead of in input order.
+    With stats, per-rule hit counts are collected too (see _rules_blocks).
+    line_index: see generate_from_mask.
+    """
+    try:
+        with _stage(metrics, "parse"):
+            ruleset = _load_rules(rule_str, rule_file, count_hits=stats is not None)
+    except OSError as e:
+        return f"Error reading rule file: {e}"
+    if not len(ruleset):
+        return f"No valid rules ({ruleset.invalid[0][1]})"
+    return _write_blocks(_rules_blocks(file_input, ruleset, workers, ordered, stats), output_file, line_index,
+                         metrics=metrics)
+
+@_instrumented
+def iter_rules(file_input, rule_str="", rule_file=None, workers=1, ordered=True, stats=None, metrics=None):
+    """Streaming apply_rules: yields byte chunks. Raises ValueError when no rule is usable."""
+    with _stage(metrics, "parse"):
+        ruleset = _load_rules(rule_str, rule_file, count_hits=stats is not None)
+    if not len(ruleset):
+        raise ValueError(f"No valid rules ({ruleset.invalid[0][1]})")
+    return _chunks(_metered(_rules_blocks(file_input, ruleset, workers, ordered, stats), metrics))
+
+def _length_dist(words):
+    """{length: (words of that length, their UTF-8 bytes)}."""
+    dist = {}
+    for w in words:
+        c, b = dist.get(len(w), (0, 0))
+        dist[len(w)] = (c + 1, b + len(w.encode('utf-8')))
+    return dist
+
+def _extend_dist(dist, base, max_len):
+    """Length distribution of every prefix in dist followed by every entry in base."""
+    new = {}
+    for l1, (c1, b1) in dist.items():
+        for l2, (c2, b2) in base.items():
+            length = l1 + l2
+            if length > max_len:
+                continue  # Lengths only grow, so this branch never comes back
+            c, b = new.get(length, (0, 0))
+            new[length] = (c + c1 * c2, b + b1 * c2 + c1 * b2)
+    return new
+
+def _window_size(dist, min_len):
+    """(count, bytes incl. newlines) of the dist entries at least min_len long."""
+    count = size = 0
+    for length, (c, b) in dist.items():
+        if length >= min_len:
+            count += c
+            size += b + c
+    return count, size
+
+def _wordlist_buckets(pool_list, min_len, max_len, depth, base=None):
+    """
+    [((depth, length), words, bytes incl. newlines)] of _wordlist_runs, depth then length
+    order, from the pool's length distribution alone: dist[L] = (combinations of total
+    length L, their total bytes) per depth. base: that distribution, if already built.
+    """
+    if base is None:
+        base = _length_dist(pool_list)
+    buckets = []
+    dist = {0: (1, 0)}
+    for r in range(1, depth + 1):
+        dist = _extend_dist(dist, base, max_len)
+        for length in sorted(dist):
+            if length >= min_len:
+                c, b = dist[length]
+                buckets.append(((r, length), c, b + c))
+    return buckets
+
+def _wordlist_size(pool_list, min_len, max_len, depth):
+    """Exact (count, bytes) of _wordlist_runs."""
+    buckets = _wordlist_buckets(pool_list, min_len, max_len, depth)
+    return sum(c for _, c, _ in buckets), sum(b for _, _, b in buckets)
+
+def _positions_size(positions, min_len, max_len):
+    """Exact (count, bytes) of _pruned_runs(positions, min_len, max_len)."""
+    if not positions:
+        return 0, 0
+    dist = {0: (1, 0)}
+    for pos in positions:
+        dist = _extend_dist(dist, _length_dist(pos), max_len)
+    return _window_size(dist, min_len)
+
+def _file_words_size(path):
+    """(non-empty words, their total bytes) of a text wordlist."""
+    count = size = 0
+    for word in _read_words(path):
+        count += 1
+        size += len(word)
+    return count, size
+
+def estimate(mode, params):
+    """
+    Exact candidate count and output size in bytes of a run, without generating it.
+    mode: "wordlist", "mask", "brute_force", "combinator", "multi_combinator",
+    "hybrid" or "rules".
+    params: the keyword arguments of the matching generate_* / *_tool call
+    (output_file, workers, merge and backend are ignored). A wordlist with
+    max_words / max_bytes counts what the budget keeps.
+    "rules" (apply_rules' arguments) is an upper bound instead: words x valid rules,
+    as if no reject function (<N, !X, ...) fired, sized as if every rule kept the
+    word's length. Its stats dict, if given, receives 'invalid': the skipped rule
+    lines as (line, reason). Raises ValueError when no rule is usable.
+    Returns (count, size_bytes).
+    """
+    p = dict(params)
+    if mode == "wordlist":
+        profile = {k: p[k] for k in PROFILE_DEFAULTS if k in p}
+        pool = _profile_pool(p.get("pool_cache"), **profile)
+        buckets = _wordlist_buckets(pool.words, p.get("min_len", 4), p.get("max_len", 25), p.get("depth", 3),
+                                    pool.length_dist)
+        if p.get("max_words") is not None or p.get("max_bytes") is not None:
+            quotas = _budget_plan(buckets, p.get("max_words"), p.get("max_bytes"), p.get("budget_policy", "fair"))
+            return (sum(quotas), sum(b * q // c for (_, c, b), q in zip(buckets, quotas)))
+        return sum(c for _, c, _ in buckets), sum(b for _, _, b in buckets)
+
+    if mode in ("mask", "brute_force"):
+        if mode == "mask":
+            keyspace = mask_keyspace(p["mask"], p.get("custom_charsets"), p.get("increment"))
+        else:
+            keyspace = brute_force_keyspace(p["chars_str"], p["min_len"], p["max_len"])
+        skip, limit = p.get("skip", 0), p.get("limit")
+        total = keyspace.keyspace_size()
+        stop = total if limit is None else min(total, skip + limit)
+        return max(0, stop - skip), keyspace.byte_size(skip, limit)
+
+    if mode == "combinator":
+        n_a, bytes_a = _file_words_size(p["file_a"])
+        n_b, bytes_b = _file_words_size(p["file_b"])
+        count = n_a * n_b
+        return count, bytes_a * n_b + n_a * bytes_b + count
+
+    if mode == "multi_combinator":
+        positions = _multi_positions(p["files"], p.get("separators"))
+        max_len = p.get("max_len")
+        if max_len is None:
+            max_len = sum(max((len(w) for w in pos), default=0) for pos in positions)
+        return _positions_size(positions, p.get("min_len", 0), max_len)
+
+    if mode == "hybrid":
+        suffixes = _hybrid_suffixes(p["mask"], p.get("custom_charsets"))
+        n_s = len(suffixes)
+        suffix_bytes = [len(x) + 1 for x in suffixes]  # + newline
+        skip, remaining = p.get("skip", 0), p.get("limit")
+        skip_words, offset = divmod(skip, n_s) if n_s else (0, 0)
+        count = size = 0
+        for word in _read_words(p["file_a"]):
+            if remaining == 0 or not n_s:
+                break
+            if skip_words:
+                skip_words -= 1
+                continue
+            take = n_s - offset if remaining is None else min(n_s - offset, remaining)
+            count += take
+            size += take * len(word) + sum(suffix_bytes[offset:offset + take])
+            offset = 0
+            if remaining is not None:
+                remaining -= take
+        return count, size
+
+    if mode == "rules":
+        ruleset = _load_rules(p.get("rule_str", ""), p.get("rule_file"))
+        if p.get("stats") is not None:
+            p["stats"]["invalid"] = ruleset.invalid
+        if not len(ruleset):
+            raise ValueError(f"No valid rules ({ruleset.invalid[0][1]})")
+        n_words, word_bytes = _file_words_size(p["file_input"])
+        return n_words * len(ruleset), (word_bytes + n_words) * len(ruleset)
+
+    raise ValueError(f"Unknown estimate mode: {mode}")
+
+def _search_text(filename, query, skip=0, limit=2000, count_only=False, cancel=None):
+    """
+    Decoded-text search using Chunked Reading (1MB blocks).
+    Only used for non-ASCII queries, where case folding needs Unicode lower().
     """
     matches = []
     total_count = 0
@@ -323,9 +2150,10 @@ def search_in_file(filename, query, skip=0, limit=2000):
     CHUNK_SIZE = 1024 * 1024 
     
     try:
-        with open(filename, 'r', encoding='utf-8', errors='ignore') as f:
+        with _open_input(filename) as f:
             leftover = ""
             while True:
+                _check_cancel(cancel)
                 chunk = f.read(CHUNK_SIZE)
                 if not chunk:
                     break
@@ -360,7 +2188,7 @@ def search_in_file(filename, query, skip=0, limit=2000):
                 for line in process_data.splitlines():
                     if query_lower in line.lower():
                         total_count += 1
-                        if total_count <= skip:
+                        if count_only or total_count <= skip:
                             continue
                         if len(matches) < limit:
                             matches.append(line.strip())
@@ -372,18 +2200,412 @@ def search_in_file(filename, query, skip=0, limit=2000):
                 
             # Process final leftover
             if leftover and query_lower in leftover.lower():
-                 if len(matches) < limit:
+                 total_count += 1
+                 if not count_only and total_count > skip and len(matches) < limit:
                      matches.append(leftover.strip())
-                     total_count += 1
 
     except FileNotFoundError:
         return (["Error: File not found."], 0)
     return (matches, total_count)
 
-def generate_brute_force(chars_str, min_len, max_len, output_file="wordlist.txt"):
+SEARCH_WINDOW = 1024 * 1024  # Lowercased slice size for case-insensitive letter queries
+PARALLEL_SEARCH_MIN = 32 * 1024 * 1024  # Smaller files aren't worth a process pool
+
+class SearchCancelled(Exception):
+    """Raised by search_in_file when its cancel event is set mid-scan."""
+
+def _check_cancel(cancel):
+    if cancel is not None and cancel.is_set():
+        raise SearchCancelled
+
+def _line_hits(buf, start, end, needle, fold, cancel=None):
     """
-    Generates every permutation of provided characters.
+    Yields (line_start, line_end) offsets of every line in buf[start:end] that contains
+    needle; start/end must sit on line boundaries. Jumps from match to match with
+    find() and skips the rest of a matching line.
+
+    fold=False: find() runs on buf itself (an mmap), nothing is copied.
+    fold=True: ASCII case-insensitive. needle is lowercase; buf is lowercased one
+    newline-aligned SEARCH_WINDOW at a time (bytes.lower on a cache-sized slice is
+    several times faster than re.IGNORECASE over the whole map).
+    With a cancel event, it is checked once per window (fold=False is windowed too).
+    """
+    pos = start
+    while pos < end:
+        _check_cancel(cancel)
+        if fold or cancel is not None:
+            stop = min(end, pos + SEARCH_WINDOW)
+            if stop < end:
+                nl = buf.rfind(b"\n", pos, stop)
+                if nl < 0:  # Line longer than the window: extend to its end
+                    nl = buf.find(b"\n", stop, end)
+                stop = end if nl < 0 else nl + 1
+        else:
+            stop = end
+        if fold:
+            hay, base, lo, hi = buf[pos:stop].lower(), pos, 0, stop - pos
+        else:
+            hay, base, lo, hi = buf, 0, pos, stop
+
+        p = lo
+        while p < hi:
+            h = hay.find(needle, p, hi)
+            if h < 0 or h >= hi:
+                break
+            line_start = hay.rfind(b"\n", lo, h) + 1 or lo
+            line_end = hay.find(b"\n", h, hi)
+            if line_end < 0:
+                line_end = hi
+            yield base + line_start, base + line_end
+            p = line_end + 1
+        pos = stop
+
+def _search_buffer(buf, start, end, needle, fold, skip, limit, count_only, cancel=None):
+    """(matches, total_count) for buf[start:end]; only kept lines are decoded."""
+    matches = []
+    total_count = 0
+    for line_start, line_end in _line_hits(buf, start, end, needle, fold, cancel):
+        total_count += 1
+        if count_only or total_count <= skip or len(matches) >= limit:
+            continue
+        matches.append(buf[line_start:line_end].decode('utf-8', 'ignore').strip())
+    return matches, total_count
+
+def _query_needle(query):
+    """(needle bytes, fold) for the bytes path, or None when the query needs Unicode folding."""
+    if not query.isascii():
+        return None
+    needle = query.lower().encode('ascii')
+    # Digits / symbols only: no case to fold, so the mmap is searched in place
+    return needle, any(c.isalpha() for c in query)
+
+def _line_ranges(buf, n):
+    """Splits buf into up to n (start, end) byte ranges that begin and end on line boundaries."""
+    size = len(buf)
+    bounds = [0]
+    for i in range(1, n):
+        nl = buf.find(b"\n", size * i // n)
+        cut = size if nl < 0 else nl + 1
+        if cut > bounds[-1]:
+            bounds.append(cut)
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def _search_range(job):
+    """Worker: (matches, total_count) of one line-aligned byte range."""
+    filename, start, end, needle, fold, keep, count_only = job
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _search_buffer(mm, start, end, needle, fold, 0, keep, count_only)
+
+def _merge_hits(parts, skip, limit):
+    """Joins per-range (matches, count) in file order; each part holds its first skip+limit matches."""
+    keep = skip + limit
+    matches = []
+    total_count = 0
+    for part, count in parts:
+        total_count += count
+        if len(matches) < keep:
+            matches.extend(part[:keep - len(matches)])
+    return (matches[skip:], total_count)
+
+# --- Trigram search index ---
+# Sidecar "<wordlist>.tri": for every byte trigram of the lowercased file, the
+# line-aligned blocks that contain it. A query ANDs the posting lists of its
+# trigrams and only the surviving blocks are scanned. Layout (little-endian):
+#   magic | header | block start offsets (Q) | posting blobs | table
+#   table = gram codes (I), posting lengths (I), blob offsets (Q), blob sizes (I)
+# A blob is zlib(first block id, then deltas) as uint32.
+INDEX_SUFFIX = ".tri"
+INDEX_MAGIC = b"WLGTRI1\n"
+INDEX_BLOCK = 64 * 1024          # Target bytes per posting block (rounded up to a line end)
+INDEX_CHUNK = 64 * 1024 * 1024   # Bytes lowercased and split into trigrams per build step
+_INDEX_HEADER = struct.Struct('<QQIIQ')  # wordlist size, wordlist mtime_ns, blocks, grams, table offset
+_NEWLINE = 0x0A
+
+def _le(arr):
+    """Index arrays are stored little-endian whatever the host order."""
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr
+
+def _block_starts(buf, size, block_size):
+    """Offsets of consecutive blocks of at least block_size bytes that end on a newline."""
+    starts = array('Q')
+    pos = 0
+    while pos < size:
+        starts.append(pos)
+        nl = buf.find(b"\n", pos + block_size - 1)
+        pos = size if nl < 0 else nl + 1
+    return starts
+
+def _chunk_grams(low, bounds, first_block):
+    """
+    (gram code, block ids) for every trigram in the lowercased chunk; bounds are the
+    chunk-relative block edges. Grams never span lines, so never span blocks.
+    """
+    grams = {}
+    for b, (lo, hi) in enumerate(zip(bounds, bounds[1:]), first_block):
+        blk = low[lo:hi]
+        for g in set(zip(blk, blk[1:], blk[2:])):
+            if _NEWLINE not in g:
+                grams.setdefault(g[0] << 16 | g[1] << 8 | g[2], array('I')).append(b)
+    return grams.items()
+
+def _chunk_grams_numpy(low, bounds, first_block):
+    """_chunk_grams for NumPy: per-block dedup through a last-seen stamp table, one sort per chunk."""
+    a = np.frombuffer(low, dtype=np.uint8)
+    if len(a) < 3:
+        return []
+    wide = a.astype(np.int32)
+    codes = wide[:-2] << 16 | wide[1:-1] << 8 | wide[2:]
+    nl = a == _NEWLINE
+    codes[nl[:-2] | nl[1:-1] | nl[2:]] = 1 << 24  # Sentinel slot, dropped below
+    stamp = np.empty((1 << 24) + 1, dtype=np.int32)
+    ramp = np.arange(max(hi - lo for lo, hi in zip(bounds, bounds[1:])), dtype=np.int32)
+    per_code, per_block = [], []
+    for b, (lo, hi) in enumerate(zip(bounds, bounds[1:]), first_block):
+        c = codes[lo:max(lo, hi - 2)]
+        idx = ramp[:len(c)]
+        stamp[c] = idx          # Last write wins, so each code keeps one position
+        c = c[stamp[c] == idx]
+        c = c[c != 1 << 24]
+        per_code.append(c)
+        per_block.append(np.full(len(c), b, dtype=np.uint32))
+    codes = np.concatenate(per_code)
+    blocks = np.concatenate(per_block)
+    order = np.argsort(codes, kind='stable')  # Stable: block ids stay ascending per gram
+    codes, blocks = codes[order], blocks[order]
+    edges = np.flatnonzero(np.diff(codes)) + 1
+    return ((int(codes[lo]), blocks[lo:hi]) for lo, hi in
+            zip([0, *edges.tolist()], [*edges.tolist(), len(codes)]))
+
+def _deltas(ids):
+    """First block id, then gaps: small numbers that zlib packs tightly."""
+    if np is not None:
+        return array('I', np.diff(np.frombuffer(ids, dtype=np.uint32), prepend=0).tobytes())
+    return array('I', [ids[0]]) + array('I', map(int.__sub__, ids[1:], ids))
+
+@_instrumented
+def build_search_index(filename, block_size=INDEX_BLOCK, metrics=None):
+    """
+    Writes the trigram sidecar for filename and returns its path. search_in_file()
+    uses it while the wordlist keeps the size and mtime recorded here; any rewrite
+    of the wordlist makes it stale and searches fall back to the linear scan.
+    With metrics: 'scan' (trigram extraction) and 'write' stages, bytes indexed.
+    """
+    if _codec(filename):
+        raise ValueError("The search index needs an uncompressed wordlist.")
+    st = os.stat(filename)
+    path = filename + INDEX_SUFFIX
+    with _stage(metrics, "scan"):
+        starts, postings = _index_postings(filename, st.st_size, block_size)
+    if metrics is not None:
+        metrics.bytes = st.st_size
+    with _stage(metrics, "write"):
+        _write_index(path, st, starts, postings)
+    return path
+
+def _index_postings(filename, size, block_size):
+    """(block start offsets, {gram code: block ids}) of a wordlist."""
+    postings = {}
+    with open(filename, 'rb') as f:
+        with (mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else memoryview(b"")) as buf:
+            starts = _block_starts(buf, size, block_size)
+            grams_of = _chunk_grams_numpy if np is not None else _chunk_grams
+            edges = list(starts) + [size]
+            first = 0
+            while first < len(starts):
+                last = first + 1
+                while last < len(starts) and edges[last] - edges[first] < INDEX_CHUNK:
+                    last += 1
+                base = edges[first]
+                low = buf[base:edges[last]].lower()
+                bounds = [e - base for e in edges[first:last + 1]]
+                for code, ids in grams_of(low, bounds, first):
+                    postings.setdefault(code, array('I')).frombytes(ids.tobytes())
+                first = last
+    return starts, postings
+
+def _write_index(path, st, starts, postings):
+    """Writes the sidecar for the wordlist stat st (atomically, via '<path>.tmp')."""
+    codes = sorted(postings)
+    lengths, offsets, sizes = array('I'), array('Q'), array('I')
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as out:
+        out.write(INDEX_MAGIC + bytes(_INDEX_HEADER.size))
+        out.write(_le(starts).tobytes())
+        for code in codes:
+            ids = postings.pop(code)
+            blob = zlib.compress(_le(_deltas(ids)).tobytes())
+            lengths.append(len(ids))
+            offsets.append(out.tell())
+            sizes.append(len(blob))
+            out.write(blob)
+        table_offset = out.tell()
+        for arr in (array('I', codes), lengths, offsets, sizes):
+            out.write(_le(arr).tobytes())
+        out.seek(len(INDEX_MAGIC))
+        out.write(_INDEX_HEADER.pack(st.st_size, st.st_mtime_ns, len(starts), len(codes), table_offset))
+    os.replace(tmp_path, path)
+
+class TrigramIndex:
+    """A loaded sidecar: block offsets plus the gram table; posting blobs are read per query."""
+
+    def __init__(self, path, size, starts, table):
+        self.path = path
+        self.size = size
+        self.starts = starts
+        self.table = table  # gram code -> (posting length, blob offset, blob size)
+
+    @classmethod
+    def open(cls, filename):
+        """The index for filename, or None when there is none or it no longer matches the file."""
+        try:
+            st = os.stat(filename)
+            ist = os.stat(filename + INDEX_SUFFIX)
+        except OSError:
+            return None
+        return _load_index(filename + INDEX_SUFFIX, ist.st_size, ist.st_mtime_ns, st.st_size, st.st_mtime_ns)
+
+    def _postings(self, f, code):
+        _, offset, size = self.table[code]
+        f.seek(offset)
+        deltas = _le(array('I', zlib.decompress(f.read(size))))
+        return itertools.accumulate(deltas)
+
+    def candidate_ranges(self, needle):
+        """Merged (start, end) byte ranges of the blocks that hold every trigram of needle."""
+        codes = {a << 16 | b << 8 | c for a, b, c in zip(needle, needle[1:], needle[2:])}
+        if not all(code in self.table for code in codes):
+            return []
+        blocks = None
+        with open(self.path, 'rb') as f:
+            for code in sorted(codes, key=lambda c: self.table[c][0]):  # Rarest first
+                ids = self._postings(f, code)
+                blocks = set(ids) if blocks is None else blocks.intersection(ids)
+                if not blocks:
+                    return []
+        ranges = []
+        for b in sorted(blocks):
+            start = self.starts[b]
+            end = self.starts[b + 1] if b + 1 < len(self.starts) else self.size
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+@functools.lru_cache(maxsize=4)
+def _load_index(path, index_size, index_mtime_ns, size, mtime_ns):
+    """Parses a sidecar; cached on both files' size/mtime so a live search loads it once."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+                return None
+            rec_size, rec_mtime, n_blocks, n_grams, table_offset = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+            if (rec_size, rec_mtime) != (size, mtime_ns):
+                return None  # Wordlist rewritten since the index was built
+            starts = _le(array('Q', f.read(8 * n_blocks)))
+            f.seek(table_offset)
+            codes, lengths = (_le(array('I', f.read(4 * n_grams))) for _ in range(2))
+            offsets = _le(array('Q', f.read(8 * n_grams)))
+            sizes = _le(array('I', f.read(4 * n_grams)))
+    except (OSError, struct.error, ValueError):
+        return None
+    return TrigramIndex(path, size, starts, dict(zip(codes, zip(lengths, offsets, sizes))))
+
+def _search_stream(filename, needle, fold, skip, limit, count_only, cancel=None):
+    """search_in_file for compressed wordlists: decompresses line-aligned chunks in turn."""
+    matches = []
+    total_count = 0
+    try:
+        with _open_input(filename, binary=True) as f:
+            leftover = b""
+            while True:
+                _check_cancel(cancel)
+                data = f.read(BLOCK_SIZE)
+                chunk = leftover + data
+                if data:
+                    cut = chunk.rfind(b"\n") + 1
+                    chunk, leftover = chunk[:cut], chunk[cut:]
+                part, count = _search_buffer(chunk, 0, len(chunk), needle, fold,
+                                             max(0, skip - total_count), limit - len(matches), count_only, cancel)
+                matches.extend(part)
+                total_count += count
+                if not data:
+                    break
+    except FileNotFoundError:
+        return (["Error: File not found."], 0)
+    return (matches, total_count)
+
+@_instrumented
+def search_in_file(filename, query, skip=0, limit=2000, count_only=False, workers=1, use_index=True, cancel=None,
+                   metrics=None):
+    """
+    Case-insensitive line search over a memory-mapped file.
+    Returns (first 'limit' matching lines after skipping 'skip' matches, total_count).
+    count_only=True returns ([], total_count) without building any line strings.
+
+    workers > 1 (0 = all cores) scans newline-aligned byte ranges on a process pool
+    (files under PARALLEL_SEARCH_MIN stay serial). Each range returns its count and
+    its first skip+limit matches; merged in file order, the result is identical.
+
+    With a current build_search_index() sidecar (and use_index), ASCII queries of 3+
+    characters only scan the blocks holding all of their trigrams.
+    .gz/.bz2/.xz wordlists are decompressed on the fly and scanned serially.
+    cancel is an Event-like object (is_set()) checked about once per MB scanned (per
+    finished range with workers > 1); once set, SearchCancelled is raised.
+    With metrics, the whole lookup is the 'search' stage and words counts the matches.
     """
+    with _stage(metrics, "search"):
+        result = _search_file(filename, query, skip, limit, count_only, workers, use_index, cancel)
+    if metrics is not None:
+        metrics.words = result[1]
+    return result
+
+def _search_file(filename, query, skip, limit, count_only, workers, use_index, cancel=None):
+    """search_in_file without the metrics wrapper."""
+    needle = _query_needle(query)
+    if needle is None:
+        return _search_text(filename, query, skip, limit, count_only, cancel)
+    if _codec(filename):
+        return _search_stream(filename, *needle, skip, limit, count_only, cancel)
+
+    keep = skip + limit
+    try:
+        with open(filename, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return ([], 0)  # mmap refuses empty files
+            index = TrigramIndex.open(filename) if use_index and len(needle[0]) >= 3 else None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if index is not None and index.size == size:
+                    return _merge_hits((_search_buffer(mm, start, end, *needle, 0, keep, count_only, cancel)
+                                        for start, end in index.candidate_ranges(needle[0])), skip, limit)
+                workers = _resolve_workers(workers)
+                if workers == 1 or size < PARALLEL_SEARCH_MIN:
+                    return _search_buffer(mm, 0, size, *needle, skip, limit, count_only, cancel)
+                ranges = _line_ranges(mm, workers)
+    except FileNotFoundError:
+        return (["Error: File not found."], 0)
+
+    jobs = [(filename, start, end, *needle, keep, count_only) for start, end in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            return _merge_hits(_cancellable(pool.map(_search_range, jobs), cancel), skip, limit)
+        except SearchCancelled:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+def _cancellable(parts, cancel):
+    """Passes range results through, raising SearchCancelled between them once cancel is set."""
+    for part in parts:
+        _check_cancel(cancel)
+        yield part
+
+def _parse_charset(chars_str):
+    """Brute force pool: "a,b,c" -> ['a','b','c'], sorted."""
     # Parse chars: "a,b,c" -> ['a','b','c']
     pool = set()
     parts = chars_str.split(',')
@@ -400,13 +2622,36 @@ def generate_brute_force(chars_str, min_len, max_len, output_file="wordlist.txt"
 
     pool_list = list(pool)
     pool_list.sort()
+    return pool_list
+
+def brute_force_keyspace(chars_str, min_len, max_len):
+    """Index-addressable Keyspace of a brute force run, shortest length first."""
+    pool_list = _parse_charset(chars_str)
+    return Keyspace([[pool_list] * r for r in range(min_len, max_len + 1)])
+
+@_instrumented
+def generate_brute_force(chars_str, min_len, max_len, output_file="wordlist.txt", workers=1, merge=True, skip=0, limit=None, backend="auto",
+                         metrics=None, line_index=False):
+    """
+    Generates every permutation of provided characters.
+    workers / merge / skip / limit / backend / metrics / line_index behave as in generate_from_mask.
+    Every length is fixed-width when all entries have the same byte width,
+    so single-character sets run on the NumPy engine.
+    """
+    with _stage(metrics, "parse"):
+        keyspace = brute_force_keyspace(chars_str, min_len, max_len)
     
-    count = 0
-    with open(output_file, 'w', encoding='utf-8', buffering=BUFFER_SIZE) as f:
-        # Range inclusive
-        for r in range(min_len, max_len + 1):
-            for p in itertools.product(pool_list, repeat=r):
-                f.write("".join(p) + '\n')
-                count += 1
-    
-    return count
+    workers = _resolve_workers(workers)
+    if workers > 1:
+        return _generate_sharded(keyspace, output_file, workers, merge, skip, limit, backend, metrics, line_index)
+
+    # Range inclusive, shortest length first
+    return _write_blocks(keyspace.iter_blocks(skip, limit, backend=backend), output_file, line_index,
+                         metrics=metrics)
+
+@_instrumented
+def iter_brute_force(chars_str, min_len, max_len, skip=0, limit=None, backend="auto", metrics=None):
+    """Streaming generate_brute_force: yields newline-terminated UTF-8 byte chunks."""
+    with _stage(metrics, "parse"):
+        keyspace = brute_force_keyspace(chars_str, min_len, max_len)
+    return _chunks(_metered(keyspace.iter_blocks(skip, limit, backend=backend), metrics))
@@ -0,0 +1,275 @@
+"""
+Background jobs: engine runs that must not block the caller (the GUI).
+
+JobRunner runs one job at a time, in submission order, each in its own worker
+process. A job is a streaming engine call (an iter_* function) plus an output
+file; the worker writes its chunks through the engine's block writer, so the
+output and its compression are the same as the *_tool / generate_*
+call would give. Between blocks the worker checks the job's cancel and pause
+events and reports words and bytes written; the runner turns those into a rate
+and an ETA and passes every change to on_update(job), on the runner's thread.
+The worker writes to a partial file next to the output ('<name>.jobN.partial<ext>')
+and only replaces the output with it once the job is done, so a job that fails,
+is cancelled or is killed leaves any previous output untouched; its partial
+file is removed.
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from . import engine
+
+PROGRESS_INTERVAL = 0.25  # Seconds between progress reports from the worker
+CANCEL_GRACE = 5.0        # Seconds a cancelled worker gets to unwind before it is terminated
+
+QUEUED, RUNNING, PAUSED, DONE, CANCELLED, FAILED = "queued", "running", "paused", "done", "cancelled", "failed"
+FINISHED = (DONE, CANCELLED, FAILED)
+
+
+class JobCancelled(Exception):
+    """Raised inside the worker's block stream so the writer unwinds and closes the file."""
+
+
+class Job:
+    """One queued engine call and its live state; the runner thread updates it."""
+    _ids = itertools.count(1)
+
+    def __init__(self, label, func, output_file, kwargs, total=None, estimate=None, collect_stats=False):
+        self.id = next(Job._ids)
+        self.label = label
+        self.func = func                # Name of an engine iter_* function
+        self.output_file = output_file
+        self.kwargs = kwargs
+        self.total = total              # Expected word count, for percent and ETA
+        self.estimate = estimate        # (mode, params) for engine.estimate, run by the worker when total is None
+        self.state = QUEUED
+        self.words = 0
+        self.bytes = 0
+        self.active = 0.0               # Seconds spent running, pauses excluded
+        self.result = None              # Word count once done
+        self.collect_stats = collect_stats  # Pass stats={} to the function; it comes back in .stats
+        self.stats = {}
+        self.error = None
+        self._cancel = None
+        self._resume = None
+        self._cancelled_at = None
+
+    @property
+    def rate(self):
+        """Words per second so far."""
+        return self.words / self.active if self.active else 0.0
+
+    @property
+    def byte_rate(self):
+        return self.bytes / self.active if self.active else 0.0
+
+    @property
+    def percent(self):
+        if not self.total:
+            return None
+        return min(100.0, 100.0 * self.words / self.total)
+
+    @property
+    def eta(self):
+        """Seconds left at the current rate, or None without a total or a rate yet."""
+        if not self.total or not self.rate:
+            return None
+        return max(0.0, (self.total - self.words) / self.rate)
+
+
+def _watched(chunks, cancel, resume, messages, tally):
+    """
+    (chunk, words) pairs for the block writer, with progress reports and pause /
+    cancel checks. tally holds [words, bytes, active seconds] as of the last block.
+    """
+    words = size = 0
+    active = 0.0
+    start = last = time.perf_counter()
+    for chunk in chunks:
+        if not resume.is_set():
+            active += time.perf_counter() - start
+            messages.put((PAUSED, words, size, active, None))
+            resume.wait()
+            start = time.perf_counter()
+            messages.put((RUNNING, words, size, active, None))
+        if cancel.is_set():
+            raise JobCancelled
+        n = chunk.count(b"\n")
+        words += n
+        size += len(chunk)
+        yield chunk, n
+        now = time.perf_counter()
+        tally[:] = words, size, active + now - start
+        if now - last >= PROGRESS_INTERVAL:
+            last = now
+            messages.put((RUNNING, *tally, None))
+
+
+def _partial_path(output_file, job_id):
+    """Where a job writes before its output is complete: same directory and extension (codec)."""
+    if output_file == "-":
+        return output_file
+    root, ext = os.path.splitext(output_file)
+    return f"{root}.job{job_id}.partial{ext}"
+
+
+def _worker(func, output_file, partial_file, kwargs, estimate, collect_stats, cancel, resume, messages):
+    """
+    Worker process: runs engine.<func>(**kwargs) into partial_file, moves it over
+    output_file once complete and reports how it ended. With estimate, the expected word count is sent first. With collect_stats
+    the function fills a stats dict (only asked for on request: for rules it turns on
+    per-rule hit counting), sent back with the result.
+    """
+    try:
+        if estimate is not None:
+            messages.put((RUNNING, 0, 0, 0.0, engine.estimate(*estimate)[0]))
+        fn = getattr(engine, func)
+        stats = {}
+        if collect_stats:
+            kwargs = dict(kwargs, stats=stats)
+        tally = [0, 0, 0.0]
+        count = engine._write_blocks(_watched(fn(**kwargs), cancel, resume, messages, tally), partial_file,
+                                     line_index=False)
+        if partial_file != output_file:
+            os.replace(partial_file, output_file)
+            _remove_output(output_file + engine.LineIndex.SUFFIX)  # Described the replaced file
+        messages.put((DONE, count, tally[1], tally[2], stats))
+    except JobCancelled:
+        messages.put((CANCELLED, None, None, None, None))
+    except Exception as e:
+        messages.put((FAILED, None, None, None, f"{type(e).__name__}: {e}"))
+
+
+def _remove_output(path):
+    """Deletes a partial output (or a stale sidecar) if it is there."""
+    if path == "-":
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class JobRunner:
+    """
+    Runs submitted jobs one after another in worker processes.
+    on_update(job) is called from the runner thread whenever a job changes state
+    or reports progress; it must not block for long.
+    """
+
+    def __init__(self, on_update=None):
+        self.on_update = on_update
+        self.jobs = []
+        self.current = None
+        self._queue = queue.Queue()
+        self._ctx = multiprocessing.get_context("spawn")  # fork is unsafe next to the UI's threads
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+
+    def submit(self, label, func, output_file, total=None, estimate=None, collect_stats=False, **kwargs):
+        """
+        Queues engine.<func>(**kwargs) written to output_file; returns the Job.
+        total is the expected word count; without it, estimate=(mode, params) has
+        the worker compute it with engine.estimate. collect_stats=True passes
+        stats={} to func and fills job.stats from it when the job is done.
+        """
+        job = Job(label, func, output_file, kwargs, total, None if total else estimate, collect_stats)
+        self.jobs.append(job)
+        self._queue.put(job)
+        self._notify(job)
+        return job
+
+    def queued(self):
+        return [job for job in self.jobs if job.state == QUEUED]
+
+    def pause(self, job=None):
+        job = job or self.current
+        if job is not None and job._resume is not None:
+            job._resume.clear()
+
+    def resume(self, job=None):
+        job = job or self.current
+        if job is not None and job._resume is not None:
+            job._resume.set()
+
+    def cancel(self, job=None):
+        """Cancels the running job (default) or a queued one."""
+        job = job or self.current
+        if job is None or job.state in FINISHED:
+            return
+        if job._cancel is None:  # Not started: the loop skips it
+            job.state = CANCELLED
+            self._notify(job)
+            return
+        job._cancelled_at = time.monotonic()
+        job._cancel.set()
+        job._resume.set()  # A paused worker has to wake up to see the cancel
+
+    def cancel_all(self):
+        for job in self.queued():
+            self.cancel(job)
+        self.cancel()
+
+    def shutdown(self):
+        """Cancels everything and stops the runner thread."""
+        self.cancel_all()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _notify(self, job):
+        if self.on_update is not None:
+            self.on_update(job)
+
+    def _loop(self):
+        for job in iter(self._queue.get, None):
+            if job.state == QUEUED:
+                self.current = job
+                self._run(job)
+                self.current = None
+
+    def _run(self, job):
+        ctx = self._ctx
+        messages = ctx.Queue()
+        job._cancel = ctx.Event()
+        job._resume = ctx.Event()
+        job._resume.set()
+        partial_file = _partial_path(job.output_file, job.id)
+        proc = ctx.Process(target=_worker, name=f"job-{job.id}",
+                           args=(job.func, job.output_file, partial_file, job.kwargs, job.estimate, job.collect_stats,
+                                 job._cancel, job._resume, messages))
+        job.state = RUNNING
+        self._notify(job)
+        proc.start()
+        state = RUNNING
+        while state not in FINISHED:
+            try:
+                state, words, size, active, extra = messages.get(timeout=PROGRESS_INTERVAL)
+            except queue.Empty:
+                if not proc.is_alive():
+                    state = FAILED
+                    job.error = f"Worker exited with code {proc.exitcode}"
+                elif job._cancelled_at is not None and time.monotonic() - job._cancelled_at > CANCEL_GRACE:
+                    proc.terminate()  # Stuck before its next block (e.g. still building a pool)
+                    state = CANCELLED
+                continue
+            if state == FAILED:
+                job.error = extra
+            elif state != CANCELLED:
+                job.words, job.bytes, job.active = words, size, active
+                if state == DONE:
+                    job.result = words
+                    job.stats = extra
+                else:
+                    if extra is not None:
+                        job.total = extra
+                    job.state = state
+                    self._notify(job)
+        proc.join()
+        if state != DONE:
+            _remove_output(partial_file)
+        # Finished only once the output is complete or cleaned up
+        job.state = state
+        self._notify(job)
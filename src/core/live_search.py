@@ -0,0 +1,212 @@
+"""
+Search-as-you-type over a wordlist, off the caller's thread.
+
+LiveSearch.request() is meant to be called on every keystroke. Queries the
+cache can answer (the same query again, or a refinement of a query whose
+matches are all held) are answered at once, on the calling thread. Any other
+query waits for DEBOUNCE seconds of quiet and then runs engine.search_in_file
+on the search thread; a newer request cancels a scan in flight, and only the
+latest query's result reaches on_result(query, skip, result).
+
+SearchCache keeps the results of several queries, least recently used first
+out, within a memory budget. Entries belong to one version of one file (path,
+size, mtime): once the wordlist is regenerated they are dropped.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from . import engine
+
+DEBOUNCE = 0.25                 # Seconds of no typing before a scan starts
+MATCH_LIMIT = 50_000            # Matches fetched (and cached) per query
+CACHE_BYTES = 64 * 1024 * 1024  # Approximate memory budget of the cache
+
+# matches: lines from match number skip on; count: total matches in the file;
+# complete: matches holds every match (skip == 0 and count <= len(matches))
+SearchResult = namedtuple("SearchResult", "matches count complete")
+
+_LIST_SLOT = 8  # Bytes per list entry, on top of the string objects
+
+
+def _source(filename):
+    """Identity of the file's current version, or None if it is gone."""
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return os.path.abspath(filename), st.st_size, st.st_mtime_ns
+
+
+def _fold(query):
+    """Cache key: the query as search_in_file compares it (ASCII queries fold ASCII only)."""
+    return query.lower()
+
+
+def _contains(key):
+    """Line filter equivalent to search_in_file's match for the folded query key."""
+    if key.isascii():
+        needle = key.encode("ascii")
+        return lambda line: needle in line.encode("utf-8").lower()
+    return lambda line: key in line.lower()
+
+
+def _size(result):
+    return sys.getsizeof(result.matches) + sum(sys.getsizeof(m) + _LIST_SLOT for m in result.matches)
+
+
+class SearchCache:
+    """
+    LRU of search results per query (complete or capped at the match limit), bounded
+    by max_bytes. Not thread-safe: LiveSearch only touches it under its lock.
+    """
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._source = None
+        self._entries = OrderedDict()  # key -> (result, size)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+        self._source = None
+
+    def _check_source(self, source):
+        if source != self._source:
+            self.clear()
+            self._source = source
+
+    def get(self, filename, query):
+        """
+        Cached result for query, or None. A query not cached itself is answered by
+        filtering the smallest complete result of a query it contains ("adm" held in
+        full answers "admin" and "xadm"); that answer is cached too.
+        """
+        self._check_source(_source(filename))
+        key = _fold(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+        base = min((result for k, (result, _) in self._entries.items() if result.complete and k in key),
+                   key=lambda result: result.count, default=None)
+        if base is None:
+            return None
+        matches = list(filter(_contains(key), base.matches))
+        result = SearchResult(matches, len(matches), True)
+        self._store(key, result)
+        return result
+
+    def put(self, filename, query, result):
+        self._check_source(_source(filename))
+        self._store(_fold(query), result)
+
+    def _store(self, key, result):
+        size = _size(result)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._entries[key] = (result, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self.bytes -= dropped
+
+
+class LiveSearch:
+    """
+    Debounced, cancellable searches on one background thread.
+    on_result(query, skip, result) and on_error(query, message) are called from the
+    search thread (or from request() itself for cache hits); they must not block for long.
+    """
+
+    def __init__(self, on_result, on_error=None, debounce=DEBOUNCE, limit=MATCH_LIMIT, cache=None):
+        self.on_result = on_result
+        self.on_error = on_error
+        self.debounce = debounce
+        self.limit = limit
+        self.cache = cache if cache is not None else SearchCache()
+        self._lock = threading.Condition()
+        self._pending = None   # (filename, query, skip, due time)
+        self._running = None   # cancel Event of the scan in flight
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="live-search", daemon=True)
+        self._thread.start()
+
+    def request(self, filename, query, skip=0):
+        """
+        Searches for query, replacing any earlier request. skip > 0 fetches the next
+        matches of a capped result (not cached, no debounce).
+        """
+        with self._lock:
+            self._cancel_locked()
+            result = None if skip else self.cache.get(filename, query)
+            if result is None:
+                due = time.monotonic() + (0 if skip else self.debounce)
+                self._pending = (filename, query, skip, due)
+                self._lock.notify()
+                return
+        self.on_result(query, 0, result)
+
+    def cancel(self):
+        """Drops the pending request and stops a scan in flight."""
+        with self._lock:
+            self._cancel_locked()
+
+    def close(self):
+        with self._lock:
+            self._cancel_locked()
+            self._closed = True
+            self._lock.notify()
+        self._thread.join()
+
+    def _cancel_locked(self):
+        self._pending = None
+        if self._running is not None:
+            self._running.set()
+
+    def _next(self):
+        """Waits for a request to come due; None once closed."""
+        with self._lock:
+            while not self._closed:
+                if self._pending is None:
+                    self._lock.wait()
+                    continue
+                wait = self._pending[3] - time.monotonic()
+                if wait > 0:
+                    self._lock.wait(wait)  # Woken early by a newer keystroke: re-read _pending
+                    continue
+                request, self._pending = self._pending, None
+                self._running = threading.Event()
+                return request[:3], self._running
+            return None
+
+    def _loop(self):
+        for (filename, query, skip), cancel in iter(self._next, None):
+            try:
+                matches, count = engine.search_in_file(filename, query, skip=skip, limit=self.limit, cancel=cancel)
+                result = SearchResult(matches, count, not skip and count <= len(matches))
+            except engine.SearchCancelled:
+                continue
+            except Exception as e:
+                if self.on_error is not None and not cancel.is_set():
+                    self.on_error(query, f"{type(e).__name__}: {e}")
+                continue
+            finally:
+                with self._lock:
+                    if self._running is cancel:
+                        self._running = None
+            with self._lock:
+                if cancel.is_set():
+                    continue  # Superseded while finishing
+                if not skip and os.path.exists(filename):
+                    self.cache.put(filename, query, result)
+            self.on_result(query, skip, result)
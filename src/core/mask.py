@@ -0,0 +1,186 @@
+"""
+Hashcat-style masks, compiled once.
+
+A mask is a string of literals and ?codes. Each position becomes a charset
+(a tuple of one-character strings), in the order the generators enumerate it:
+
+  ?l a-z   ?u A-Z   ?d 0-9   ?s punctuation   ?a ?d?l?u?s (this tool's order)
+  ?h 0-9a-f   ?H 0-9A-F   ?b every byte 0x00-0xff   ?? a literal '?'
+  ?1 .. ?4 custom charsets, themselves written with literals and the codes above
+
+Bytes 0x80-0xff of ?b are held as surrogate-escaped code points, so they are
+written as single raw bytes (str.encode('utf-8', 'surrogateescape')), as hashcat
+writes them; 0x0a splits its candidate across two lines, also as in hashcat.
+Unknown codes, a trailing '?' and undefined custom charsets raise MaskError.
+
+A .hcmask file holds one mask per line, optionally preceded by up to four
+custom charsets: "?l?d,?u,?1?2?2?2". A comma inside a field is written "\\,";
+lines starting with '#' are comments.
+"""
+import string
+
+HCMASK_SUFFIX = ".hcmask"
+CUSTOM_SLOTS = "1234"
+
+# ?b: raw bytes; 0x80-0xff as the lone surrogates surrogateescape turns back into those bytes
+_BYTES = "".join(chr(b) if b < 0x80 else chr(0xDC00 + b) for b in range(256))
+
+CHARSETS = {
+    "l": string.ascii_lowercase,
+    "u": string.ascii_uppercase,
+    "d": string.digits,
+    "s": string.punctuation,
+    "a": string.digits + string.ascii_letters + string.punctuation,
+    "h": string.digits + "abcdef",
+    "H": string.digits + "ABCDEF",
+    "b": _BYTES,
+    "?": "?",
+}
+
+
+class MaskError(ValueError):
+    """A mask, custom charset or .hcmask line that cannot be compiled."""
+
+
+def _tokens(text, custom):
+    """Yields one charset string per position of text; custom maps '1'..'4' to charset strings."""
+    i = 0
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char != "?":
+            yield char
+            i += 1
+            continue
+        if i + 1 == n:
+            raise MaskError(f"Mask {text!r} ends with a lone '?' (write ?? for a literal '?')")
+        code = text[i + 1]
+        if code in CHARSETS:
+            yield CHARSETS[code]
+        elif code in CUSTOM_SLOTS:
+            if custom is None:
+                raise MaskError(f"?{code} is not allowed inside a custom charset")
+            if code not in custom:
+                raise MaskError(f"?{code} is used in {text!r} but custom charset {code} is not defined")
+            yield custom[code]
+        else:
+            raise MaskError(f"Unknown mask code ?{code} in {text!r}")
+        i += 2
+
+
+def _unique(chars):
+    """Charset without repeats, first occurrence kept (hashcat drops duplicates too)."""
+    return tuple(dict.fromkeys(chars))
+
+
+def custom_charsets(custom):
+    """
+    {'1': charset string, ...} from a sequence (index 0 is ?1) or a {1: ..., '2': ...}
+    mapping of up to four definitions; None / empty entries are left undefined.
+    """
+    if not custom:
+        return {}
+    items = custom.items() if isinstance(custom, dict) else enumerate(custom, 1)
+    charsets = {}
+    for slot, definition in items:
+        slot = str(slot)
+        if slot not in CUSTOM_SLOTS:
+            raise MaskError(f"Custom charsets are ?1 to ?4, not ?{slot}")
+        if definition:
+            charsets[slot] = "".join(_unique("".join(_tokens(definition, None))))
+    return charsets
+
+
+class Mask:
+    """
+    A compiled mask: one charset per position and the keyspace size, computed once.
+    custom: the ?1-?4 definitions (see custom_charsets).
+    """
+
+    def __init__(self, text, custom=None):
+        self.text = text
+        self.custom = custom_charsets(custom)
+        self.positions = [_unique(charset) for charset in _tokens(text, self.custom)]
+        self.keyspace = 1
+        for charset in self.positions:
+            self.keyspace *= len(charset)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __repr__(self):
+        return f"Mask({self.text!r}, keyspace={self.keyspace})"
+
+    def increments(self, lo=1, hi=None):
+        """
+        Position lists of the incrementing prefixes lo..hi positions long (hashcat -i),
+        shortest first; hi defaults to the whole mask.
+        """
+        hi = len(self) if hi is None else min(hi, len(self))
+        if lo < 1 or lo > hi:
+            raise MaskError(f"Increment range {lo}..{hi} does not fit a {len(self)}-position mask")
+        return [self.positions[:n] for n in range(lo, hi + 1)]
+
+
+def _split_fields(line):
+    """Splits an .hcmask line on unescaped commas; '\\,' is a literal comma."""
+    fields = [""]
+    i = 0
+    while i < len(line):
+        if line[i] == "\\" and i + 1 < len(line) and line[i + 1] == ",":
+            fields[-1] += ","
+            i += 2
+            continue
+        if line[i] == ",":
+            fields.append("")
+        else:
+            fields[-1] += line[i]
+        i += 1
+    return fields
+
+
+def parse_hcmask_line(line, custom=None):
+    """One .hcmask line -> Mask; its own charsets replace the matching entries of custom."""
+    fields = _split_fields(line)
+    if len(fields) > 5:
+        raise MaskError(f"Too many fields in .hcmask line {line!r} (at most four charsets and the mask)")
+    charsets = dict(custom_charsets(custom))
+    for slot, definition in zip(CUSTOM_SLOTS, fields[:-1]):
+        charsets.update(custom_charsets({slot: definition}))
+    return Mask(fields[-1], charsets)
+
+
+def load_hcmask(path, custom=None):
+    """Masks of a .hcmask file, in file order; errors name the offending line."""
+    masks = []
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("#"):
+                continue
+            try:
+                masks.append(parse_hcmask_line(line, custom))
+            except MaskError as e:
+                raise MaskError(f"{path}:{number}: {e}") from None
+    if not masks:
+        raise MaskError(f"{path} holds no masks")
+    return masks
+
+
+def compile_masks(mask, custom=None, increment=None):
+    """
+    Position lists of every mask a run enumerates, in order.
+    mask: a mask string, a Mask, a list of those, or the path of a .hcmask file.
+    increment: None, True (1 position up to the whole mask) or (min, max) positions;
+    applied to every mask.
+    """
+    if isinstance(mask, str) and mask.endswith(HCMASK_SUFFIX):
+        masks = load_hcmask(mask, custom)
+    elif isinstance(mask, (list, tuple)):
+        masks = [m if isinstance(m, Mask) else Mask(m, custom) for m in mask]
+    else:
+        masks = [mask if isinstance(mask, Mask) else Mask(mask, custom)]
+    if not increment:
+        return [m.positions for m in masks]
+    lo, hi = (1, None) if increment is True else increment
+    return [positions for m in masks for positions in m.increments(lo, hi)]
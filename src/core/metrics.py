@@ -0,0 +1,200 @@
+"""
+Run metrics for the engine entry points.
+
+Pass metrics=Metrics() to a generate_* / *_tool / iter_* function (or to
+search_in_file / build_search_index) and read metrics.report() afterwards:
+- per-stage seconds: parse, pool, enumerate (building blocks: product, joins,
+  encoding; with workers > 1 also waiting on the shards), write (time inside
+  write() calls, one flush each), compress (writer thread, overlaps enumerate);
+- words, bytes and their rates, flush count;
+- peak RSS of the process and of its finished children (pool workers).
+on_progress(metrics) is called every progress_interval seconds while blocks flow.
+
+profile="cprofile" and/or "tracemalloc" also captures the top functions by
+cumulative time (calling thread only: not the writer thread or pool workers)
+and the peak traced memory with its top allocation sites. With report_path the
+report is saved as JSON when the run finishes. Without a metrics argument, the
+WORDLIST_PROFILE / WORDLIST_REPORT environment variables switch the same thing on.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is left out of the report
+    resource = None
+
+PROFILE_ENV = "WORDLIST_PROFILE"  # "cprofile", "tracemalloc" or "cprofile,tracemalloc"
+REPORT_ENV = "WORDLIST_REPORT"    # JSON report path for environment-enabled metrics
+DEFAULT_REPORT = "wordlist-report.json"
+PROFILERS = ("cprofile", "tracemalloc")
+PROFILE_TOP = 25  # Functions / allocation sites kept in the report
+
+
+def peak_rss(children=False):
+    """Peak resident set size in bytes (of finished child processes with children=True), or None."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+
+def _profilers(profile):
+    if isinstance(profile, str):
+        profile = profile.split(",")
+    profile = [p.strip().lower() for p in profile or () if p.strip()]
+    unknown = set(profile) - set(PROFILERS)
+    if unknown:
+        raise ValueError(f"Unknown profiler(s): {', '.join(sorted(unknown))} (use {' / '.join(PROFILERS)})")
+    return profile
+
+
+class Metrics:
+    """Stage timings, throughput and optional profiles of one engine run."""
+
+    def __init__(self, on_progress=None, progress_interval=1.0, profile=(), report_path=None):
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.profilers = _profilers(profile)
+        self.report_path = report_path
+        self.entry = None    # Entry point name and its simple arguments, set by the engine
+        self.params = {}
+        self.stages = {}
+        self.words = 0
+        self.bytes = 0
+        self.flushes = 0
+        self.started = None
+        self.elapsed = None
+        self.profiles = {}
+        self._t0 = None
+        self._cprofile = None
+
+    @classmethod
+    def from_env(cls):
+        """Metrics configured by WORDLIST_PROFILE / WORDLIST_REPORT, or None when neither is set."""
+        profile = os.environ.get(PROFILE_ENV, "")
+        report = os.environ.get(REPORT_ENV, "")
+        if not profile and not report:
+            return None
+        return cls(profile=profile, report_path=report or DEFAULT_REPORT)
+
+    def start(self):
+        """Starts the clock and the profilers; later calls are no-ops."""
+        if self._t0 is not None:
+            return
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        if "tracemalloc" in self.profilers and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if "cprofile" in self.profilers:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def finish(self):
+        """Stops the clock and the profilers and saves the report (with report_path); once."""
+        if self._t0 is None or self.elapsed is not None:
+            return
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self.profiles["cprofile"] = self._top_functions(self._cprofile)
+            self._cprofile = None
+        if "tracemalloc" in self.profilers and tracemalloc.is_tracing():
+            self.profiles["tracemalloc"] = self._top_allocations()
+            tracemalloc.stop()
+        self.elapsed = time.perf_counter() - self._t0
+        if self.report_path:
+            self.save(self.report_path)
+
+    @contextmanager
+    def stage(self, name):
+        """Adds the time spent in the block to stage 'name'."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - t0)
+
+    def add_time(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def watch(self, blocks):
+        """
+        Passes (data, word_count) blocks through, timing each next() into 'enumerate'
+        and counting words and bytes; calls on_progress every progress_interval.
+        """
+        blocks = iter(blocks)
+        clock = time.perf_counter
+        last = clock()
+        while True:
+            t0 = clock()
+            block = next(blocks, None)
+            now = clock()
+            self.add_time("enumerate", now - t0)
+            if block is None:
+                return
+            self.words += block[1]
+            self.bytes += len(block[0])
+            if self.on_progress is not None and now - last >= self.progress_interval:
+                last = now
+                self.on_progress(self)
+            yield block
+
+    def timed(self, write, stage="write"):
+        """write() wrapped to count flushes and add their time to stage."""
+        clock = time.perf_counter
+
+        def timed_write(data):
+            t0 = clock()
+            write(data)
+            self.flushes += 1
+            self.add_time(stage, clock() - t0)
+        return timed_write
+
+    @staticmethod
+    def _top_functions(profile):
+        stats = pstats.Stats(profile)
+        rows = []
+        for (path, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({"function": f"{os.path.basename(path)}:{line}({func})", "calls": calls,
+                         "tottime": round(tottime, 6), "cumtime": round(cumtime, 6)})
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:PROFILE_TOP]
+
+    @staticmethod
+    def _top_allocations():
+        current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP]
+        return {"current": current, "peak": peak,
+                "top": [{"site": str(stat.traceback[0]), "size": stat.size, "count": stat.count} for stat in top]}
+
+    def report(self):
+        """Everything measured, as a JSON-ready dict."""
+        elapsed = self.elapsed if self.elapsed is not None else (
+            time.perf_counter() - self._t0 if self._t0 is not None else 0.0)
+        return {
+            "entry": self.entry,
+            "params": self.params,
+            "started": self.started,
+            "elapsed": round(elapsed, 6),
+            "words": self.words,
+            "bytes": self.bytes,
+            "words_per_sec": round(self.words / elapsed, 1) if elapsed else None,
+            "bytes_per_sec": round(self.bytes / elapsed, 1) if elapsed else None,
+            "flushes": self.flushes,
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "peak_rss": peak_rss(),
+            "peak_rss_children": peak_rss(children=True),
+            "profile": self.profiles,
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
@@ -0,0 +1,378 @@
+"""
+Hashcat-compatible rule engine.
+
+Rule lines are parsed once and compiled to Python source: the functions of a line
+become one chain of bytes expressions, and a whole rule set becomes one generated
+function that expands a batch of words against every rule, word-major like
+'hashcat --stdout -r'. Words are bytes, so positions count bytes and the case
+functions only touch ASCII letters, as in hashcat.
+
+Supported: : l u c C t TN r d pN f { } $X ^X [ ] DN xNM ONM iNX oNX 'N sXY @X
+zN ZN q k K *NM LN RN +N -N .N ,N yN YN E eX 3NX (N = 0-9 / A-Z for 10-35),
+and the reject functions <N >N _N !X /X (X )X =NX %NX. Rejects compile to nested
+ifs around the rest of the rule, so a rejected candidate is never built or emitted.
+Memory functions (M 4 6 X) are not, matching hashcat's GPU rules. Hashcat's
+256-byte candidate cap is not applied.
+Lines that aren't valid hashcat fall back to this tool's older space-separated
+form ("u $2024 ^The"), where $ and ^ take whole strings and the functions work
+on the decoded text, exactly as before.
+"""
+RULES_PER_FUNCTION = 1000  # Generated functions are split to keep compile time flat
+
+# Function -> argument kinds: N = position (0-9, A-Z), X = any single byte
+ARGS = {
+    ':': '', 'l': '', 'u': '', 'c': '', 'C': '', 't': '', 'T': 'N', 'r': '', 'd': '', 'p': 'N',
+    'f': '', '{': '', '}': '', '$': 'X', '^': 'X', '[': '', ']': '', 'D': 'N', 'x': 'NN',
+    'O': 'NN', 'i': 'NX', 'o': 'NX', "'": 'N', 's': 'XX', '@': 'X', 'z': 'N', 'Z': 'N',
+    'q': '', 'k': '', 'K': '', '*': 'NN', 'L': 'N', 'R': 'N', '+': 'N', '-': 'N', '.': 'N',
+    ',': 'N', 'y': 'N', 'Y': 'N', 'E': '', 'e': 'X', '3': 'NX',
+    '<': 'N', '>': 'N', '_': 'N', '!': 'X', '/': 'X', '(': 'X', ')': 'X', '=': 'NX', '%': 'NX',
+}
+REJECTS = {'<', '>', '_', '!', '/', '(', ')', '=', '%'}
+LEGACY_FUNCS = {'u', 'l', 'c', 'r', 'd'}
+
+# Byte maps for L / R / + / -
+_SHL = bytes((c << 1) & 0xFF for c in range(256))
+_SHR = bytes(c >> 1 for c in range(256))
+_INC = bytes((c + 1) & 0xFF for c in range(256))
+_DEC = bytes((c - 1) & 0xFF for c in range(256))
+
+_T = "\0"  # Placeholder for the word in templates; repr() never emits a raw NUL
+
+
+class RuleError(ValueError):
+    """A rule line that is neither valid hashcat nor the legacy form."""
+
+
+def _position(ch):
+    """hashcat position digit: 0-9, then A-Z for 10-35."""
+    if '0' <= ch <= '9':
+        return ord(ch) - ord('0')
+    if 'A' <= ch <= 'Z':
+        return ord(ch) - ord('A') + 10
+    raise RuleError(f"Bad position {ch!r}")
+
+
+def parse_rule(rule):
+    """
+    Parses one hashcat rule line into [(function, args)]; args are ints for
+    positions and single bytes for characters. Spaces between functions are ignored.
+    """
+    if isinstance(rule, str):
+        rule = rule.encode('utf-8')
+    rule = rule.decode('latin-1')  # One char per byte, so X arguments stay single bytes
+    ops = []
+    i = 0
+    while i < len(rule):
+        fn = rule[i]
+        i += 1
+        if fn == ' ':
+            continue
+        kinds = ARGS.get(fn)
+        if kinds is None:
+            raise RuleError(f"Unknown rule function {fn!r}")
+        if i + len(kinds) > len(rule):
+            raise RuleError(f"Missing arguments for {fn!r}")
+        args = []
+        for kind in kinds:
+            ch = rule[i]
+            i += 1
+            args.append(_position(ch) if kind == 'N' else ch.encode('latin-1'))
+        ops.append((fn, tuple(args)))
+    return ops
+
+
+def parse_legacy(rule):
+    """
+    The old space-separated form: u l c r d, $text (append) and ^text (prepend).
+    Returns one ('legacy', ops) function, applied to the decoded word as before.
+    """
+    if isinstance(rule, bytes):
+        rule = rule.decode('utf-8')
+    ops = []
+    for token in rule.split():
+        if token in LEGACY_FUNCS:
+            ops.append((token, ()))
+        elif token[0] in '$^' and len(token) > 1:
+            ops.append((token[0], (token[1:],)))
+        else:
+            raise RuleError(f"Unknown rule {token!r}")
+    return [('legacy', tuple(ops))]
+
+
+def parse(rule):
+    """hashcat first, legacy form as the fallback; raises RuleError if neither fits."""
+    try:
+        return parse_rule(rule)
+    except RuleError as hashcat_error:
+        try:
+            return parse_legacy(rule)
+        except (RuleError, UnicodeDecodeError):
+            raise hashcat_error from None
+
+
+def _template(fn, args):
+    """Expression for one function applied to the word _T, or None for a no-op."""
+    a = [repr(x) for x in args]
+    t = _T
+    if fn == ':': return None
+    if fn == 'legacy':  # Old form: str methods (Unicode case, reversal by character)
+        inner = f"{t}.decode('utf-8')"
+        for op in args:
+            inner = _template(*op).replace(_T, f"({inner})")
+        return f"({inner}).encode('utf-8')"
+    if fn == 'l': return f"{t}.lower()"
+    if fn == 'u': return f"{t}.upper()"
+    if fn == 'c': return f"{t}.capitalize()"
+    if fn == 'C': return f"{t}[:1].lower() + {t}[1:].upper()"
+    if fn == 't': return f"{t}.swapcase()"
+    if fn == 'r': return f"{t}[::-1]"
+    if fn == 'd': return f"{t} * 2"
+    if fn == 'f': return f"{t} + {t}[::-1]"
+    if fn == '{': return f"{t}[1:] + {t}[:1]"
+    if fn == '}': return f"{t}[-1:] + {t}[:-1]"
+    if fn == '[': return f"{t}[1:]"
+    if fn == ']': return f"{t}[:-1]"
+    if fn == 'q': return f"_dup_chars({t})"
+    if fn == 'k': return f"{t}[1:2] + {t}[:1] + {t}[2:]"
+    if fn == 'K': return f"{t}[:-2] + {t}[-1:] + {t}[-2:-1]"
+    if fn == 'E': return f"_title({t}, b' ')"
+    if fn == '$': return f"{t} + {a[0]}"
+    if fn == '^': return f"{a[0]} + {t}"
+    if fn == '@': return f"{t}.replace({a[0]}, b'')"
+    if fn == 's': return f"{t}.replace({a[0]}, {a[1]})"
+    if fn == 'e': return f"_title({t}, {a[0]})"
+    n = args[0] if args else 0
+    if fn == 'p': return f"{t} * {n + 1}"
+    if fn == "'": return f"{t}[:{n}]"
+    if fn == 'D': return f"{t}[:{n}] + {t}[{n + 1}:]"
+    if fn == 'z': return f"{t}[:1] * {n} + {t}"
+    if fn == 'Z': return f"{t} + {t}[-1:] * {n}"
+    if fn in 'TLR+-':
+        table = {'T': None, 'L': '_SHL', 'R': '_SHR', '+': '_INC', '-': '_DEC'}[fn]
+        mid = f"{t}[{n}:{n + 1}]" + (".swapcase()" if table is None else f".translate({table})")
+        return f"{t}[:{n}] + {mid} + {t}[{n + 1}:]"
+    if fn == 'x': return f"({t}[{n}:{n + args[1]}] if {n} < len({t}) >= {n + args[1]} else {t})"
+    if fn == 'O': return f"({t}[:{n}] + {t}[{n + args[1]}:] if {n} < len({t}) >= {n + args[1]} else {t})"
+    if fn == 'i': return f"({t}[:{n}] + {a[1]} + {t}[{n}:] if {n} <= len({t}) else {t})"
+    if fn == 'o': return f"({t}[:{n}] + {a[1]} + {t}[{n + 1}:] if {n} < len({t}) else {t})"
+    if fn == '*': return f"_swap({t}, {n}, {args[1]})"
+    if fn == '.': return f"({t}[:{n}] + {t}[{n + 1}:{n + 2}] + {t}[{n + 1}:] if {n + 1} < len({t}) else {t})"
+    if fn == ',':
+        if n == 0:
+            return None
+        return f"({t}[:{n}] + {t}[{n - 1}:{n}] + {t}[{n + 1}:] if {n} < len({t}) else {t})"
+    if fn == 'y': return f"({t}[:{n}] + {t} if {n} <= len({t}) else {t})"
+    if fn == 'Y': return f"({t} + {t}[len({t}) - {n}:] if {n} <= len({t}) else {t})"
+    if fn == '3': return f"_toggle_after({t}, {n}, {a[1]})"
+    raise RuleError(f"Unknown rule function {fn!r}")
+
+
+def _keep(fn, args, t):
+    """Condition under which the reject function fn lets the word t through."""
+    a = [repr(x) for x in args]
+    n = args[0]
+    if fn == '<': return f"len({t}) <= {n}"
+    if fn == '>': return f"len({t}) >= {n}"
+    if fn == '_': return f"len({t}) == {n}"
+    if fn == '!': return f"{a[0]} not in {t}"
+    if fn == '/': return f"{a[0]} in {t}"
+    if fn == '(': return f"{t}[:1] == {a[0]}"
+    if fn == ')': return f"{t}[-1:] == {a[0]}"
+    if fn == '=': return f"{t}[{n}:{n + 1}] == {a[1]}"
+    if fn == '%': return f"{t}.count({a[1]}) >= {n}"
+    raise RuleError(f"Unknown reject function {fn!r}")
+
+
+def _fuse(ops):
+    """Merges runs of $X (append) and ^X (prepend) into one literal each: '$1 $2 $3' -> + b'123'."""
+    fused = []
+    for fn, args in ops:
+        if fused and fn in '$^' and fused[-1][0] == fn:
+            prev = fused[-1][1][0]
+            fused[-1] = (fn, (prev + args[0] if fn == '$' else args[0] + prev,))
+        else:
+            fused.append((fn, args))
+    return fused
+
+
+def _rule_lines(ops, tail, indent="    ", word="w"):
+    """
+    Source lines applying ops to 'word', ending with tail(expression). Functions are
+    nested into one expression; the running value is only stored in 't' when the
+    next template (or a reject check) needs it more than once. Each reject opens an
+    if block, so tail only runs for candidates that pass every check.
+    """
+    lines = []
+    expr = word
+    for fn, args in _fuse(ops):
+        if fn in REJECTS:
+            if not expr.isidentifier():
+                lines.append(f"{indent}t = {expr}")
+                expr = "t"
+            lines.append(f"{indent}if {_keep(fn, args, expr)}:")
+            indent += "    "
+            continue
+        tpl = _template(fn, args)
+        if tpl is None:
+            continue
+        if tpl.count(_T) > 1 and not expr.isidentifier():
+            lines.append(f"{indent}t = {expr}")
+            expr = "t"
+        expr = tpl.replace(_T, expr if expr.isidentifier() else f"({expr})")
+    lines.extend(indent + s for s in tail(expr))
+    return lines
+
+
+def _dup_chars(w):
+    buf = bytearray(2 * len(w))
+    buf[0::2] = w
+    buf[1::2] = w
+    return bytes(buf)
+
+
+def _swap(w, a, b):
+    if a >= len(w) or b >= len(w):
+        return w
+    buf = bytearray(w)
+    buf[a], buf[b] = buf[b], buf[a]
+    return bytes(buf)
+
+
+def _title(w, sep):
+    """Lowercase, then uppercase the first byte and the byte after every sep."""
+    if sep not in w:
+        return w.capitalize()
+    return sep.join([part[:1].upper() + part[1:] for part in w.lower().split(sep)])
+
+
+def _toggle_after(w, n, sep):
+    """Toggles the case of the byte after the n-th (0-based) occurrence of sep."""
+    pos = -1
+    for _ in range(n + 1):
+        pos = w.find(sep, pos + 1)
+        if pos < 0:
+            return w
+    return w[:pos + 1] + w[pos + 1:pos + 2].swapcase() + w[pos + 2:]
+
+
+_NAMESPACE = {
+    '_SHL': _SHL, '_SHR': _SHR, '_INC': _INC, '_DEC': _DEC,
+    '_dup_chars': _dup_chars, '_swap': _swap, '_title': _title, '_toggle_after': _toggle_after,
+}
+
+
+def _compile(source, name, **names):
+    namespace = dict(_NAMESPACE, **names)
+    exec(compile(source, f"<rules:{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def compile_rule(rule):
+    """One rule line as a function bytes -> bytes, or None when a reject function drops the word."""
+    body = _rule_lines(parse(rule), lambda expr: [f"return {expr}"])
+    return _compile("def rule(w):\n" + "".join(line + "\n" for line in body) + "    return None\n", "rule")
+
+
+def _emit(expr):
+    return [f"emit({expr})"]
+
+
+def _emit_counted(index):
+    """Tail that also counts the rule's candidates in hits[index] and those equal to the word in same[index]."""
+    def tail(expr):
+        return [f"x = {expr}", "emit(x)", f"hits[{index}] += 1", f"if x == w: same[{index}] += 1"]
+    return tail
+
+
+def _expand_source(rule_ops, name, loop, first=None):
+    """
+    Source of one generated function. loop=True: name(words) -> outputs of every
+    rule for every word. loop=False: name(w, emit) for one word, to be called per
+    chunk of rules by RuleSet.expand. With first (the index of the chunk's first
+    rule) every rule also updates its hit counters.
+    """
+    indent = "        " if loop else "    "
+    lines = [f"def {name}(words):\n    out = []\n    emit = out.append\n    for w in words:\n"
+             if loop else f"def {name}(w, emit):\n"]
+    for i, ops in enumerate(rule_ops):
+        tail = _emit if first is None else _emit_counted(first + i)
+        lines.extend(line + "\n" for line in _rule_lines(ops, tail, indent))
+    if loop:
+        lines.append("    return out\n")
+    return "".join(lines)
+
+
+def read_rule_file(path):
+    """Rule lines of a hashcat rule file: bytes, without comments ('#') and blank lines."""
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b"\r\n")
+            if line.strip() and not line.startswith(b"#"):
+                yield line
+
+
+class RuleSet:
+    """
+    Parsed and compiled rule lines. expand(words) returns the output of every
+    rule for every word (word-major). Invalid lines are skipped, as hashcat does,
+    and listed in .invalid as (line, reason).
+
+    With count_hits=True, .hits[i] counts the candidates rule i emitted (words it
+    did not reject) and .unchanged[i] those equal to their input word: rules
+    with few of the first or mostly the second are the ones to prune.
+    """
+
+    def __init__(self, rules, count_hits=False):
+        self.rules = []
+        self.invalid = []
+        rule_ops = []
+        for rule in rules:
+            try:
+                rule_ops.append(parse(rule))
+            except RuleError as e:
+                self.invalid.append((rule, str(e)))
+                continue
+            self.rules.append(rule)
+
+        self.counting = count_hits
+        self.hits = [0] * len(rule_ops)
+        self.unchanged = [0] * len(rule_ops)
+        counters = {'hits': self.hits, 'same': self.unchanged}
+
+        def build(chunk, start, name, loop):
+            source = _expand_source(chunk, name, loop, start if count_hits else None)
+            return _compile(source, name, **counters)
+
+        starts = range(0, len(rule_ops), RULES_PER_FUNCTION)
+        self._parts = None
+        if not rule_ops:
+            self._expand = lambda words: []
+        elif len(starts) == 1:
+            self._expand = build(rule_ops, 0, "expand", loop=True)
+        else:
+            self._parts = [build(rule_ops[i:i + RULES_PER_FUNCTION], i, "expand_part", loop=False)
+                           for i in starts]
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(read_rule_file(path))
+
+    def __len__(self):
+        return len(self.rules)
+
+    def reset_hits(self):
+        """Zeroes the counters in place (the generated code holds the lists)."""
+        self.hits[:] = [0] * len(self.hits)
+        self.unchanged[:] = [0] * len(self.unchanged)
+
+    def expand(self, words):
+        """list of rule outputs (bytes) for a batch of bytes words."""
+        if self._parts is None:
+            return self._expand(words)
+        out = []
+        emit = out.append
+        for w in words:
+            for part in self._parts:
+                part(w, emit)
+        return out
@@ -6,14 +6,23 @@ import sys
 # Ensure src is in path
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__))))
 try:
-    from core import engine
+    from core import engine, jobs
+    from core.live_search import LiveSearch
+    from core.mask import Mask, MaskError, compile_masks
+    from core.metrics import DEFAULT_REPORT, Metrics
 except ImportError:
     # Fallback if running from different dir
     sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-    from core import engine
+    from core import engine, jobs
+    from core.live_search import LiveSearch
+    from core.mask import Mask, MaskError, compile_masks
+    from core.metrics import DEFAULT_REPORT, Metrics
 
 OUTPUT_FILE = "wordlist.txt"
 
+# Safety Threshold: 100 Million words (Approx 1GB+ file)
+MAX_WORDS = 100_000_000
+
 def main(page: ft.Page):
     page.title = "Optimized Wordlist Generator (Python Edition)"
     page.theme_mode = ft.ThemeMode.DARK
@@ -32,15 +41,20 @@ def main(page: ft.Page):
     
     txt_min = ft.TextField(label="Min Len", value="4", width=100)
     txt_max = ft.TextField(label="Max Len", value="25", width=100)
+    txt_budget = ft.TextField(label="Max words (budget)", hint_text="no limit", width=180)
     txt_special = ft.TextField(label="Special Chars (comma-sep)", hint_text="!,@,#,$", expand=True)
     
     chk_leet = ft.Checkbox(label="Enable Leet Speak (a->@, e->3)", value=False)
+    chk_dedup = ft.Checkbox(label="Remove duplicate words", value=False)
+    chk_likely = ft.Checkbox(label="Most likely words first (slower, best for time-boxed runs)", value=False)
+    chk_pool_cache = ft.Checkbox(label="Cache the profile's words on disk for faster re-runs", value=True)
     
     # Depth Slider
     sld_depth = ft.Slider(min=2, max=4, divisions=2, value=3, label="Max Combination Depth: {value}")
     
     lbl_status = ft.Text("Ready", color="grey")
     lbl_stats = ft.Text("", weight="bold")
+    bar_progress = ft.ProgressBar(value=0, visible=False, expand=True)
     
     txt_search = ft.TextField(label="Find text in wordlist (Live)", expand=True)
     
@@ -74,14 +88,109 @@ def main(page: ft.Page):
         else:
             return f"{size_bytes / 1024:.2f} KB"
 
+    def preflight(mode, params, hint=""):
+        """
+        Pre-flight check with the exact engine.estimate.
+        Returns the word count, or None (after showing why) when the run is over MAX_WORDS.
+        """
+        total_est, size_est = engine.estimate(mode, params)
+        if total_est > MAX_WORDS:
+            lbl_status.value = f"Stopped: Too massive ({total_est:,} words, {format_size(size_est)}). {hint}"
+            lbl_status.color = "red"
+            page.snack_bar = ft.SnackBar(ft.Text(f"Operation too large: {total_est:,} combinations! {hint}"), open=True)
+            page.update()
+            return None
+        return total_est
+
+    def check_mask(compile_mask):
+        """
+        Compiles a mask before its job is queued, so a typo is reported here rather
+        than as a failed job. Returns False (after showing the MaskError) when invalid.
+        """
+        try:
+            compile_mask()
+        except MaskError as ex:
+            lbl_status.value = f"Invalid mask: {ex}"
+            lbl_status.color = "red"
+            page.update()
+            return False
+        return True
+
+    def format_eta(seconds):
+        seconds = int(seconds)
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+    def on_job_update(job):
+        """Runner thread: mirrors the job's progress and outcome on the page."""
+        waiting = len(runner.queued())
+        queue_note = f" ({waiting} queued)" if waiting else ""
+        if job.state == jobs.QUEUED:
+            if runner.current is not None:
+                lbl_status.value = f"{runner.current.label} running{queue_note}"
+            else:
+                lbl_status.value = f"Queued: {job.label}"
+            page.update()
+            return
+        if job is not runner.current and job.state == jobs.CANCELLED:
+            lbl_status.value = f"Removed {job.label} from the queue{queue_note}"
+            page.update()
+            return
+
+        running = job.state in (jobs.RUNNING, jobs.PAUSED)
+        bar_progress.visible = btn_pause.visible = btn_cancel.visible = running
+        if running:
+            text = f"{job.label}: {job.words:,}"
+            text += f" / {job.total:,} words ({job.percent:.0f}%)" if job.total else " words"
+            text += f" | {format_size(job.bytes)} | {job.rate:,.0f} words/s"
+            if job.eta is not None:
+                text += f" | ETA {format_eta(job.eta)}"
+            paused = job.state == jobs.PAUSED
+            lbl_status.value = ("Paused. " if paused else "") + text + queue_note
+            lbl_status.color = "grey" if paused else "blue"
+            bar_progress.value = job.percent / 100 if job.percent is not None else None
+            btn_pause.icon = "play_arrow" if paused else "pause"
+            btn_pause.tooltip = "Resume" if paused else "Pause"
+        elif job.state == jobs.DONE:
+            size = os.path.getsize(OUTPUT_FILE)
+            lbl_stats.value = f"Generated: {job.result} words | Size: {format_size(size)}"
+            if "duplicates" in job.stats:
+                lbl_stats.value += f" | Duplicates dropped: {job.stats['duplicates']}"
+            if job.stats.get("budget", {}).get("cut_words"):
+                lbl_stats.value += f" | Over budget, not generated: {job.stats['budget']['cut_words']:,}"
+            lbl_status.value = f"Done: {job.label} in {format_eta(job.active)}.{queue_note}"
+            lbl_status.color = "green"
+            current_offset[0] = 0
+            current_offset[1] = 0
+            load_preview(None, reset=True)
+        elif job.state == jobs.CANCELLED:
+            lbl_status.value = f"Cancelled: {job.label} (partial output removed).{queue_note}"
+            lbl_status.color = "orange"
+        else:
+            lbl_status.value = f"Error: {job.error}{queue_note}"
+            lbl_status.color = "red"
+        page.update()
+
+    runner = jobs.JobRunner(on_update=on_job_update)
+
+    def toggle_pause(e):
+        job = runner.current
+        if job is None:
+            return
+        if job.state == jobs.PAUSED:
+            runner.resume()
+        else:
+            runner.pause()
+
+    btn_pause = ft.IconButton(icon="pause", tooltip="Pause", visible=False, on_click=toggle_pause)
+    btn_cancel = ft.IconButton(icon="stop", tooltip="Cancel", visible=False, on_click=lambda e: runner.cancel())
+
     def run_generator(e):
-        lbl_status.value = "Generating... (This may take a while for high usage)"
-        lbl_status.color = "blue"
+        lbl_status.value = "Calculating complexity..."
+        lbl_status.color = "yellow"
         page.update()
 
         try:
-            # Call Python Engine directly
-            count = engine.generate_wordlist(
+            params = dict(
                 first=txt_first.value,
                 middle=txt_middle.value,
                 last=txt_last.value,
@@ -92,20 +201,19 @@ def main(page: ft.Page):
                 special_chars=txt_special.value,
                 min_len=int(txt_min.value) if txt_min.value.isdigit() else 4,
                 max_len=int(txt_max.value) if txt_max.value.isdigit() else 25,
+                max_words=int(txt_budget.value.replace(",", "")) if txt_budget.value.replace(",", "").isdigit() else None,
                 enable_leet=chk_leet.value,
                 depth=int(sld_depth.value),
-                output_file=OUTPUT_FILE
+                order="probability" if chk_likely.value else "lexical",
+                pool_cache=None if chk_pool_cache.value else False,
             )
-            
-            # Statistics
-            size = os.path.getsize(OUTPUT_FILE)
-            lbl_stats.value = f"Generated: {count} words | Size: {format_size(size)}"
-            lbl_status.value = "Done."
-            lbl_status.color = "green"
-            
-            # Reset pagination
-            current_offset[0] = 0
-            load_preview(None, reset=True)
+            total_est = preflight("wordlist", params, "Lower the depth or narrow Min/Max Len.")
+            if total_est is None:
+                return
+
+            # Runs in a worker process; on_job_update reports progress and the result
+            runner.submit("Smart wordlist", "iter_wordlist", OUTPUT_FILE, total=total_est, collect_stats=True,
+                          dedup=chk_dedup.value, **params)
 
         except Exception as ex:
             lbl_status.value = f"Error: {str(ex)}"
@@ -115,30 +223,78 @@ def main(page: ft.Page):
         
         page.update()
 
+    def clear_pool_cache(e):
+        try:
+            directory = engine.clear_pool_cache()
+            lbl_status.value = f"Profile cache cleared ({directory})." if directory else "Profile cache cleared."
+            lbl_status.color = "green"
+        except Exception as ex:
+            lbl_status.value = f"Error: {ex}"
+            lbl_status.color = "red"
+        page.update()
+
     # Pagination State
-    # current_offset[0] is for file bytes (Preview Mode)
+    # current_offset[0] is the first line shown (Preview Mode)
     # current_offset[1] is for skipped matches (Search Mode)
     current_offset = [0, 0]
     CHUNK_SIZE = 1000
     
-    # Cache for Incremental Search
-    # Stores results of previous search to filter locally
-    search_cache = {
-        "query": "",
-        "matches": [],
-        "full_loaded": False # True if we hold ALL matches for this query
-    }
+    # Live search: debounced scans on a background thread, results cached per query
+    search_view = {"query": "", "result": None, "base": 0}  # Result on screen; base = skip it was fetched with
+
+    def show_matches():
+        """Appends the next CHUNK_SIZE matches of the shown result, then a button for more."""
+        result, base = search_view["result"], search_view["base"]
+        if preview_list.controls and isinstance(preview_list.controls[-1], ft.OutlinedButton):
+            preview_list.controls.pop()
+        visible = result.matches[current_offset[1] - base:current_offset[1] - base + CHUNK_SIZE]
+        for line in visible:
+            preview_list.controls.append(ft.Text(line, font_family="Consolas"))
+        current_offset[1] += len(visible)
+        if current_offset[1] < result.count:
+            if current_offset[1] < base + len(result.matches):
+                preview_list.controls.append(ft.OutlinedButton("Load Next matched...", on_click=lambda _: load_preview(None)))
+            else:
+                preview_list.controls.append(ft.OutlinedButton("Search further...", on_click=lambda _: search_further()))
+
+    def search_further():
+        lbl_status.value = f"Searching for '{search_view['query']}' past match {current_offset[1]:,}..."
+        lbl_status.color = "yellow"
+        page.update()
+        live_search.request(OUTPUT_FILE, search_view["query"], skip=current_offset[1])
+
+    def on_search_result(query, skip, result):
+        if query != txt_search.value.strip():
+            return  # Typed on since: a newer request is coming
+        search_view.update(query=query, result=result, base=skip)
+        if not skip:
+            current_offset[1] = 0
+            preview_list.controls.clear()
+            preview_list.controls.append(ft.Text(f"Found {result.count} matches for '{query}':", color="cyan", weight="bold"))
+        show_matches()
+        lbl_status.value = f"Search done. Found {result.count} matches."
+        lbl_status.color = "green"
+        page.update()
+
+    def on_search_error(query, message):
+        lbl_status.value = f"Search Error: {message}"
+        lbl_status.color = "red"
+        page.update()
+
+    live_search = LiveSearch(on_result=on_search_result, on_error=on_search_error)
+
+    def on_disconnect(e):
+        # Closing the window stops the worker process and any search scan
+        runner.cancel_all()
+        live_search.cancel()
+
+    page.on_disconnect = on_disconnect
 
     def load_preview(e, reset=False):
         if reset:
             preview_list.controls.clear()
             current_offset[0] = 0
             current_offset[1] = 0
-            if not txt_search.value:
-                # Clear cache if search cleared
-                search_cache["query"] = ""
-                search_cache["matches"] = []
-                search_cache["full_loaded"] = False
 
         if not os.path.exists(OUTPUT_FILE):
              preview_list.controls.clear()
@@ -148,117 +304,56 @@ def main(page: ft.Page):
 
         query = txt_search.value.strip()
         
-        # Capture the query at the start
-        current_val = query
-        
         # Branch 1: Search Mode
-        if current_val:
-            try:
-                # Debug feedback in UI
-                lbl_status.value = f"Searching for '{current_val}'..."
+        if query:
+            lbl_page.value = ""
+            if reset:
+                lbl_status.value = f"Searching for '{query}'..."
                 lbl_status.color = "yellow"
                 page.update()
-                
-                matches = []
-                count = 0
-                CACHE_LIMIT = 50000 
-                
-                # INCREMENTAL SEARCH LOGIC
-                use_cache = False
-                if (search_cache["query"] 
-                    and current_val.lower().startswith(search_cache["query"].lower())
-                    and search_cache["full_loaded"]):
-                     use_cache = True
-                
-                if use_cache:
-                    # Filter in-memory
-                    matches = [m for m in search_cache["matches"] if current_val.lower() in m.lower()]
-                    count = len(matches)
-                    search_cache["query"] = current_val
-                    search_cache["matches"] = matches
-                else:
-                    # Search from File
-                    found_matches, total_count = engine.search_in_file(OUTPUT_FILE, current_val, skip=0, limit=CACHE_LIMIT)
-                    
-                    matches = found_matches
-                    count = total_count
-                    
-                    # Store in Cache
-                    search_cache["query"] = current_val
-                    search_cache["matches"] = matches
-                    # If we found FEWER than the limit, we have everything!
-                    search_cache["full_loaded"] = (count <= CACHE_LIMIT)
-
-                lbl_status.value = f"Search done. Found {count} matches."
-                lbl_status.color = "green"
-                
-                if reset:
-                    preview_list.controls.clear()
-                    preview_list.controls.append(ft.Text(f"Found {count} matches for '{current_val}':", color="cyan", weight="bold"))
-                
-                # Display Chunk (Pagination logic applied to 'matches' list)
-                start_idx = current_offset[1]
-                end_idx = start_idx + CHUNK_SIZE
-                
-                visible_matches = matches[start_idx : end_idx]
-                
-                for line in visible_matches:
-                     preview_list.controls.append(ft.Text(line, font_family="Consolas"))
-                
-                # Update shown count
-                current_offset[1] += len(visible_matches)
-                
-                # Add Load More
-                if current_offset[1] < count:
-                    if preview_list.controls and isinstance(preview_list.controls[-1], ft.OutlinedButton):
-                       preview_list.controls.pop()
-                    
-                    if current_offset[1] >= len(matches) and not search_cache["full_loaded"]:
-                         btn_more = ft.OutlinedButton(f"Start Over/Deep Search...", on_click=lambda _: load_preview(None)) 
-                    else:
-                        btn_more = ft.OutlinedButton(f"Load Next matched...", on_click=lambda _: load_preview(None))
-                        preview_list.controls.append(btn_more)
-
-            except Exception as ex:
-                lbl_status.value = f"Search Error: {str(ex)}"
-                lbl_status.color = "red"
-                page.update()
-                print(f"Search Exception: {ex}")
-                import traceback
-                traceback.print_exc()
+                # Answered at once from the cache, else scanned after a pause in typing
+                live_search.request(OUTPUT_FILE, query)
+                return
+            if search_view["result"] is not None and search_view["query"] == query:
+                show_matches()
 
-        # Branch 2: Pagination Mode (Sequential Read)
+        # Branch 2: Pagination Mode (line index: every page is one seek away)
         else:
+            live_search.cancel()  # Search box cleared: stop a scan in flight
             try:
-                # Remove "Load More" button if it exists
-                if preview_list.controls and isinstance(preview_list.controls[-1], ft.OutlinedButton):
-                    preview_list.controls.pop()
-
-                with open(OUTPUT_FILE, 'r', encoding='utf-8', errors='ignore') as f:
-                    # Seek logic
-                    if current_offset[0] == 0:
-                        f.seek(0)
-                    else:
-                        f.seek(current_offset[0])
-                    
-                    added_count = 0
-                    for _ in range(CHUNK_SIZE):
-                        line = f.readline()
-                        if not line: break
-                        preview_list.controls.append(ft.Text(line.strip(), font_family="Consolas"))
-                        added_count += 1
-                    
-                    current_offset[0] = f.tell() # Save byte position
-                    
-                    if added_count == CHUNK_SIZE:
-                        # Add Load More Button
-                        btn_more = ft.OutlinedButton("Load More Words...", on_click=lambda _: load_preview(None))
-                        preview_list.controls.append(btn_more)
+                total_lines = engine.line_count(OUTPUT_FILE)
+                current_offset[0] = max(0, min(current_offset[0], total_lines - 1))
+                preview_list.controls.clear()
+                for line in engine.read_lines(OUTPUT_FILE, current_offset[0], CHUNK_SIZE):
+                    preview_list.controls.append(ft.Text(line.strip(), font_family="Consolas"))
+                shown = len(preview_list.controls)
+                if shown:
+                    lbl_page.value = f"Lines {current_offset[0] + 1:,}-{current_offset[0] + shown:,} of {total_lines:,}"
+                else:
+                    lbl_page.value = "Empty wordlist"
             except Exception as ex:
                 preview_list.controls.append(ft.Text(f"Read Error: {ex}"))
         
         page.update()
 
+    def show_page(first_line):
+        if txt_search.value.strip():
+            return  # Paging applies to the plain preview, not to search results
+        current_offset[0] = max(0, first_line)
+        load_preview(None)
+
+    def jump_to_line(e):
+        try:
+            show_page(int(txt_jump.value.replace(",", "")) - 1)
+        except ValueError:
+            lbl_status.value = "Enter a line number to jump to."
+            lbl_status.color = "red"
+            page.update()
+
+    def show_last_page(e):
+        if os.path.exists(OUTPUT_FILE):
+            show_page(engine.line_count(OUTPUT_FILE) - CHUNK_SIZE)
+
     def open_folder(e):
         if os.name == 'nt':
             os.startfile(os.getcwd())
@@ -291,7 +386,8 @@ def main(page: ft.Page):
     page.overlay.extend([picker_a, picker_b])
     
     # Hybrid/Rule Inputs
-    txt_adv_mask = ft.TextField(label="Mask / Rule", hint_text="?d?d for Hybrid, or '$1 u' for Rules", expand=True)
+    txt_adv_mask = ft.TextField(label="Mask / Rule", hint_text="?d?d for Hybrid, or '$1 u' for Rules (File B: rule file)", expand=True)
+    chk_adv_dedup = ft.Checkbox(label="Remove duplicate words (Combinator)", value=False)
     
     def run_advanced(e):
         tool = adv_mode.value
@@ -305,35 +401,23 @@ def main(page: ft.Page):
             page.update()
             return
             
-        lbl_status.value = f"Running {tool}..."
-        lbl_status.color = "yellow"
-        page.update()
-        
         try:
-            import time
-            time.sleep(0.1)
-            
-            c = 0
+            # The worker estimates the size itself, so large inputs don't block the page
             if tool.startswith("Combinator"):
-                c = engine.combinator_tool(file_a, file_b, OUTPUT_FILE)
+                runner.submit(tool, "iter_combinator", OUTPUT_FILE, collect_stats=True,
+                              estimate=("combinator", dict(file_a=file_a, file_b=file_b)),
+                              file_a=file_a, file_b=file_b, dedup=chk_adv_dedup.value)
             elif tool.startswith("Hybrid"):
-                c = engine.hybrid_tool(file_a, mask_rule, OUTPUT_FILE)
+                if not check_mask(lambda: Mask(mask_rule)):
+                    return
+                runner.submit(tool, "iter_hybrid", OUTPUT_FILE,
+                              estimate=("hybrid", dict(file_a=file_a, mask=mask_rule)),
+                              file_a=file_a, mask=mask_rule)
             elif tool.startswith("Rule"):
-                c = engine.apply_rules(file_a, mask_rule, OUTPUT_FILE)
-                
-            if isinstance(c, str): # Error message
-                lbl_status.value = f"Error: {c}"
-                lbl_status.color = "red"
-            else:
-                size = os.path.getsize(OUTPUT_FILE)
-                lbl_stats.value = f"Generated: {c} words | Size: {format_size(size)}"
-                lbl_status.value = "Done."
-                lbl_status.color = "green"
-                current_offset[0] = 0
-                current_offset[1] = 0
-                search_cache["query"] = ""
-                load_preview(None, reset=True)
-                
+                # File B, when picked, is a hashcat rule file applied on top of the typed rule
+                runner.submit(tool, "iter_rules", OUTPUT_FILE,
+                              estimate=("rules", dict(file_input=file_a, rule_str=mask_rule, rule_file=file_b or None)),
+                              file_input=file_a, rule_str=mask_rule, rule_file=file_b or None)
         except Exception as ex:
             lbl_status.value = f"Error: {ex}"
             lbl_status.color = "red"
@@ -351,52 +435,16 @@ def main(page: ft.Page):
 
         try:
             # Pre-flight check
-            c_val = txt_bf_chars.value or ""
-            # Logic matches engine.py parsing to predict count
-            pool = set([x.strip() for x in c_val.split(',') if x.strip()])
-            if not pool and c_val.strip():
-                 pool = set(c_val.strip()) # Fallback
-            
-            p_len = len(pool)
             mn = int(txt_bf_min.value) if txt_bf_min.value.isdigit() else 1
             mx = int(txt_bf_max.value) if txt_bf_max.value.isdigit() else 4
+            params = dict(chars_str=txt_bf_chars.value or "", min_len=mn, max_len=mx)
             
-            total_est = 0
-            for r in range(mn, mx + 1):
-                total_est += p_len ** r
-            
-            # Safety Threshold: 100 Million (Approx 1GB+ file)
             # 18 chars ^ 8 len = 11 Billion combinations.
-            if total_est > 100_000_000:
-                lbl_status.value = f"Stopped: Too massive ({total_est:,} words). Reduce Max Len."
-                lbl_status.color = "red"
-                page.snack_bar = ft.SnackBar(ft.Text(f"Operation too large: {total_est:,} combinations! Try Max Len 3 or 4."), open=True)
-                page.update()
+            total_est = preflight("brute_force", params, "Try Max Len 3 or 4.")
+            if total_est is None:
                 return
 
-            lbl_status.value = f"Brute Forcing {total_est:,} combos..."
-            lbl_status.color = "orange"
-            page.update()
-            
-            # Tiny delay to let UI update before heavy blocking work
-            import time
-            time.sleep(0.1)
-
-            count = engine.generate_brute_force(
-                chars_str=txt_bf_chars.value,
-                min_len=mn,
-                max_len=mx,
-                output_file=OUTPUT_FILE
-            )
-            
-            size = os.path.getsize(OUTPUT_FILE)
-            lbl_stats.value = f"Generated: {count} words | Size: {format_size(size)}"
-            lbl_status.value = "Done."
-            lbl_status.color = "green"
-            
-            current_offset[0] = 0
-            current_offset[1] = 0
-            load_preview(None, reset=True)
+            runner.submit("Brute force", "iter_brute_force", OUTPUT_FILE, total=total_est, **params)
 
         except Exception as ex:
             lbl_status.value = f"Error: {str(ex)}"
@@ -418,52 +466,14 @@ def main(page: ft.Page):
         page.update()
 
         try:
+             if not check_mask(lambda: compile_masks(txt_mask.value)):
+                return
              # Safety limit check
-             # We need to estimate count.
-             # Parse mask manually to estimate? or engine helper?
-             # Simple estimation:
-             import string
-             est = 1
-             m = txt_mask.value
-             i = 0
-             while i < len(m):
-                 if m[i] == '?' and i+1 < len(m):
-                     code = m[i+1]
-                     if code == 'd': est *= 10
-                     elif code == 'l': est *= 26
-                     elif code == 'u': est *= 26
-                     elif code == 's': est *= 32
-                     elif code == 'a': est *= 94
-                     elif code == '?': pass
-                     i += 2
-                 else:
-                     i += 1
-             
-             if est > 100_000_000:
-                lbl_status.value = f"Stopped: Too massive ({est:,})."
-                lbl_status.color = "red"
-                page.snack_bar = ft.SnackBar(ft.Text(f"Too large ({est:,})!"), open=True)
-                page.update()
+             est = preflight("mask", {"mask": txt_mask.value})
+             if est is None:
                 return
 
-             lbl_status.value = f"Generating Pattern ({est:,} words)..."
-             lbl_status.color = "orange"
-             page.update()
-             
-             import time
-             time.sleep(0.1)
-             
-             count = engine.generate_from_mask(txt_mask.value, OUTPUT_FILE)
-             
-             size = os.path.getsize(OUTPUT_FILE)
-             lbl_stats.value = f"Generated: {count} words | Size: {format_size(size)}"
-             lbl_status.value = "Done."
-             lbl_status.color = "green"
-             
-             current_offset[0] = 0
-             current_offset[1] = 0
-             search_cache["query"] = "" # Invalidate Cache
-             load_preview(None, reset=True)
+             runner.submit("Pattern", "iter_from_mask", OUTPUT_FILE, total=est, mask=txt_mask.value)
              
         except Exception as ex:
              lbl_status.value = f"Error: {ex}"
@@ -475,7 +485,33 @@ def main(page: ft.Page):
     # --- Events & Controls ---
     # Smart Generate Button is inline in smart_content, but others are used in search_area shared block.
     
+    def build_index(e):
+        if not os.path.exists(OUTPUT_FILE):
+            return
+        lbl_status.value = "Indexing wordlist for search..."
+        lbl_status.color = "yellow"
+        page.update()
+        try:
+            engine.build_search_index(OUTPUT_FILE)
+            lbl_status.value = "Search index ready (rebuild after regenerating)."
+            lbl_status.color = "green"
+        except Exception as ex:
+            lbl_status.value = f"Index Error: {ex}"
+            lbl_status.color = "red"
+        page.update()
+
     btn_search = ft.IconButton(icon="search", on_click=lambda e: load_preview(e, reset=True))
+    btn_index = ft.IconButton(icon="bolt", tooltip="Build search index", on_click=build_index)
+
+    # Preview paging
+    lbl_page = ft.Text("", color="grey")
+    txt_jump = ft.TextField(label="Go to line", width=140, on_submit=jump_to_line)
+    btn_first = ft.IconButton(icon="first_page", tooltip="First page", on_click=lambda e: show_page(0))
+    btn_prev = ft.IconButton(icon="chevron_left", tooltip="Previous page",
+                             on_click=lambda e: show_page(current_offset[0] - CHUNK_SIZE))
+    btn_next = ft.IconButton(icon="chevron_right", tooltip="Next page",
+                             on_click=lambda e: show_page(current_offset[0] + CHUNK_SIZE))
+    btn_last = ft.IconButton(icon="last_page", tooltip="Last page", on_click=show_last_page)
     txt_search.on_submit = lambda e: load_preview(e, reset=True)
     txt_search.on_change = lambda e: load_preview(e, reset=True) 
     
@@ -490,12 +526,15 @@ def main(page: ft.Page):
         ft.Row([txt_aliases, txt_users]),
         ft.Row([txt_extra, txt_dob]),
         ft.Row([
-            txt_min, txt_max, 
+            txt_min, txt_max, txt_budget,
             txt_special,
         ]),
         ft.Text("Combination Depth (Complexity):"),
         sld_depth,
         chk_leet,
+        chk_dedup,
+        chk_likely,
+        ft.Row([chk_pool_cache, ft.TextButton("Clear cache", icon="delete", on_click=clear_pool_cache)]),
         ft.Container(height=10),
         ft.ElevatedButton("Generate Smart Wordlist", on_click=run_generator, height=50, width=300),
     ], scroll=ft.ScrollMode.ADAPTIVE)
@@ -512,7 +551,7 @@ def main(page: ft.Page):
     # 3. Pattern Tab Content
     mask_content = ft.Column([
         ft.Text("Use Standard Mask Format:", italic=True),
-        ft.Text("?d = digit (0-9), ?l = lower (a-z), ?u = upper (A-Z), ?s = symbol", size=12, color="grey"),
+        ft.Text("?d = digit (0-9), ?l = lower (a-z), ?u = upper (A-Z), ?s = symbol, ?h / ?H = hex", size=12, color="grey"),
         txt_mask,
         ft.Container(height=10),
         ft.ElevatedButton("Generate Pattern", on_click=run_mask, height=50, width=300, color="teal"),
@@ -533,6 +572,7 @@ def main(page: ft.Page):
         ]),
         ft.Text("For Combinator: Select File A and B. For Hybrid/Rules: Select File A and use Input below.", size=12, italic=True),
         txt_adv_mask,
+        chk_adv_dedup,
         ft.ElevatedButton("Run Tool", on_click=run_advanced, icon="build", color="pink"),
     ])
 
@@ -570,9 +610,11 @@ def main(page: ft.Page):
         ft.Divider(),
         ft.Row([btn_save, btn_open]),
         ft.Row([lbl_status, lbl_stats], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+        ft.Row([bar_progress, btn_pause, btn_cancel]),
         ft.Container(height=10),
         ft.Row([ft.Text("Preview & Find", size=20, weight="bold"), ft.Container(expand=True)]),
-        ft.Row([txt_search, btn_search]),
+        ft.Row([txt_search, btn_search, btn_index]),
+        ft.Row([btn_first, btn_prev, btn_next, btn_last, txt_jump, lbl_page]),
         ft.Container(
             content=preview_list,
             border=ft.border.all(1, "white54"),
@@ -613,7 +655,60 @@ if __name__ == "__main__":
         parser.add_argument("-min", type=int, default=4)
         parser.add_argument("-max", type=int, default=25)
         parser.add_argument("-leet", action="store_true")
-        parser.add_argument("-o", "--output", default="wordlist.txt")
+        parser.add_argument("--dedup", action="store_true", help="Drop repeated words (profile, --combinator, --combine)")
+        parser.add_argument("--likely-first", action="store_true",
+                            help="Profile: write the most probable candidates first (slower per word)")
+        parser.add_argument("--depth", type=int, default=3, help="Profile: most pool words joined per candidate")
+        parser.add_argument("--max-words", type=int, default=None, help="Profile: word budget")
+        parser.add_argument("--max-bytes", type=int, default=None, help="Profile: output size budget in bytes")
+        parser.add_argument("--no-pool-cache", action="store_true",
+                            help="Profile: rebuild the word pool instead of reusing the cached one")
+        parser.add_argument("--clear-pool-cache", action="store_true",
+                            help="Delete the cached profile pools (see README), then exit")
+        parser.add_argument("--budget-policy", choices=list(engine.BUDGET_POLICIES), default="fair",
+                            help="How --max-words/--max-bytes are shared over depths and lengths")
+        parser.add_argument("-o", "--output", default="wordlist.txt",
+                            help="Output file (.gz/.bz2/.xz are compressed), or - to stream to stdout")
+        parser.add_argument("--mask", default="",
+                            help="Generate from a mask (e.g. Admin?d?d?d) or a .hcmask file instead of a profile")
+        for slot in "1234":
+            parser.add_argument(f"-{slot}", f"--custom-charset{slot}", dest=f"cs{slot}", default=None,
+                                help=f"Custom charset ?{slot} for --mask / --hybrid (e.g. ?l?d)")
+        parser.add_argument("--increment", nargs="?", const="", default=None, metavar="MIN:MAX",
+                            help="--mask: also run every shorter prefix of the mask (optionally MIN:MAX positions)")
+        parser.add_argument("--chars", default="", help="Brute force these characters (uses -min/-max)")
+        parser.add_argument("--combinator", nargs=2, metavar=("FILE_A", "FILE_B"), help="WordA + WordB for every pair")
+        parser.add_argument("--combine", nargs="+", metavar="FILE",
+                            help="N-way combinator: FILE1 + sep + FILE2 + ... (uses -min/-max)")
+        parser.add_argument("--sep", action="append", default=None,
+                            help="Separator choice between --combine inputs (repeat for more choices)")
+        parser.add_argument("--hybrid", nargs=2, metavar=("FILE", "MASK"), help="Every word + every mask candidate")
+        parser.add_argument("--rules", nargs="+", metavar="FILE [RULE]",
+                            help="Apply hashcat rules (e.g. 'c $1', or -r FILE) to every word of FILE")
+        parser.add_argument("-r", "--rule-file", default=None, help="hashcat rule file for --rules (e.g. best64.rule)")
+        parser.add_argument("--unordered", action="store_true",
+                            help="--rules with --workers: write batches as they finish, not in input order")
+        parser.add_argument("--rule-stats", metavar="TSV", default=None,
+                            help="--rules: write emitted/unchanged counts per rule (for pruning rule files)")
+        parser.add_argument("-w", "--workers", type=int, default=1,
+                            help="Processes for --mask/--chars/--combinator/--rules (0 = all cores)")
+        parser.add_argument("--memory-mb", type=float, default=None,
+                            help="Memory budget for --combinator's File B (default: hold it all)")
+        parser.add_argument("--order", choices=["a-major", "block-major"], default="a-major",
+                            help="--combinator output order when File B exceeds --memory-mb")
+        parser.add_argument("--parts", action="store_true", help="Keep worker shards as numbered .partNNN files")
+        parser.add_argument("--skip", type=int, default=0, help="Start --mask/--chars/--hybrid at this candidate index")
+        parser.add_argument("--limit", type=int, default=None, help="Stop --mask/--chars/--hybrid after this many candidates")
+        parser.add_argument("--estimate", action="store_true", help="Print the exact word count and output size, then exit")
+        parser.add_argument("--backend", choices=["auto", "numpy", "python"], default="auto",
+                            help="Block engine for --mask/--chars (numpy needs NumPy installed)")
+        parser.add_argument("--index", metavar="FILE", help="Build the trigram search index for FILE, then exit")
+        parser.add_argument("--line-index", action="store_true",
+                            help="Also write the OUTPUT.lines paging sidecar (skipped for stdout and devices)")
+        parser.add_argument("--metrics", metavar="JSON", default=None,
+                            help="Write a run report (stage timings, rates, peak RSS) to JSON")
+        parser.add_argument("--profile", action="append", choices=["cprofile", "tracemalloc"], default=None,
+                            help="Add a profile to the run report (repeatable; default report: wordlist-report.json)")
         
         # If --cli or other flags present that aren't for Flet, assume CLI.
         # Flet takes unknown args?
@@ -623,15 +718,152 @@ if __name__ == "__main__":
         # Heuristic: If --cli is passed OR typical generator args are seen
         if args.cli or (len(sys.argv) > 1 and not sys.argv[0].endswith("flet")):
              # Run logic
-             print(f"[*] Generating wordlist to {args.output}...")
-             count = engine.generate_wordlist(
-                 first=args.first, last=args.last, middle=args.middle,
-                 aliases=args.aliases, usernames=args.users, extra=args.extra,
-                 dob=args.dob, special_chars=args.special,
-                 min_len=args.min, max_len=args.max,
-                 enable_leet=args.leet, output_file=args.output
-             )
-             print(f"[+] Done. Generated {count} words.")
+             # With -o - stdout carries the words, so progress goes to stderr
+             log = sys.stderr if args.output == "-" else sys.stdout
+             metrics = None
+             if args.metrics or args.profile:
+                 metrics = Metrics(profile=args.profile or (), report_path=args.metrics or DEFAULT_REPORT)
+             if args.clear_pool_cache:
+                 directory = engine.clear_pool_cache()
+                 print(f"[+] Profile pool cache cleared{f' ({directory})' if directory else ''}")
+                 sys.exit(0)
+             if args.index:
+                 print(f"[+] Index written to {engine.build_search_index(args.index, metrics=metrics)}")
+                 sys.exit(0)
+             custom = [getattr(args, f"cs{slot}") for slot in "1234"]
+             increment = args.increment
+             try:
+                 if increment is not None:
+                     increment = tuple(int(n) for n in increment.split(":")) if increment else True
+                 # Report a bad mask, custom charset or .hcmask line up front (MaskError is a ValueError)
+                 if args.hybrid:
+                     Mask(args.hybrid[1], custom)
+                 elif args.mask:
+                     compile_masks(args.mask, custom, increment)
+             except ValueError as e:
+                 print(f"[-] {e}", file=sys.stderr)
+                 sys.exit(1)
+             pool_cache = False if args.no_pool_cache else None
+             stats = {}
+             if args.estimate:
+                 if args.combinator:
+                     mode, params = "combinator", dict(file_a=args.combinator[0], file_b=args.combinator[1])
+                 elif args.combine:
+                     mode, params = "multi_combinator", dict(files=args.combine, separators=args.sep,
+                                                             min_len=args.min, max_len=args.max)
+                 elif args.hybrid:
+                     mode, params = "hybrid", dict(file_a=args.hybrid[0], mask=args.hybrid[1], skip=args.skip, limit=args.limit,
+                                                   custom_charsets=custom)
+                 elif args.mask:
+                     mode, params = "mask", dict(mask=args.mask, skip=args.skip, limit=args.limit,
+                                                 custom_charsets=custom, increment=increment)
+                 elif args.chars:
+                     mode, params = "brute_force", dict(chars_str=args.chars, min_len=args.min, max_len=args.max,
+                                                        skip=args.skip, limit=args.limit)
+                 elif args.rules:
+                     mode, params = "rules", dict(file_input=args.rules[0], rule_str=" ".join(args.rules[1:]),
+                                                  rule_file=args.rule_file, stats=stats)
+                 else:
+                     mode, params = "wordlist", dict(
+                         first=args.first, last=args.last, middle=args.middle,
+                         aliases=args.aliases, usernames=args.users, extra=args.extra,
+                         dob=args.dob, special_chars=args.special,
+                         min_len=args.min, max_len=args.max, enable_leet=args.leet, depth=args.depth,
+                         max_words=args.max_words, max_bytes=args.max_bytes, budget_policy=args.budget_policy,
+                         pool_cache=pool_cache
+                     )
+                 try:
+                     count, size = engine.estimate(mode, params)
+                 except ValueError as e:  # No usable rule
+                     print(f"[-] {e}", file=sys.stderr)
+                     sys.exit(1)
+                 if mode == "rules":
+                     for line, reason in stats["invalid"]:
+                         print(f"[!] Skipped rule {line!r}: {reason}", file=sys.stderr)
+                     print(f"[*] At most {count:,} words, about {size:,} bytes (reject rules may drop some)")
+                 else:
+                     print(f"[*] {count:,} words, {size:,} bytes")
+                 sys.exit(0)
+             print(f"[*] Generating wordlist to {args.output}...", file=log)
+             if args.combinator:
+                 count = engine.combinator_tool(*args.combinator, output_file=args.output,
+                                                dedup=args.dedup, stats=stats,
+                                                memory_mb=args.memory_mb, order=args.order,
+                                                workers=args.workers, merge=not args.parts, metrics=metrics,
+                                                line_index=args.line_index)
+             elif args.combine:
+                 count = engine.multi_combinator_tool(args.combine, output_file=args.output,
+                                                      separators=args.sep, min_len=args.min, max_len=args.max,
+                                                      dedup=args.dedup, stats=stats, metrics=metrics,
+                                                      line_index=args.line_index)
+             elif args.hybrid:
+                 count = engine.hybrid_tool(
+                     *args.hybrid, output_file=args.output,
+                     skip=args.skip, limit=args.limit, metrics=metrics, custom_charsets=custom,
+                     line_index=args.line_index
+                 )
+             elif args.rules:
+                 count = engine.apply_rules(args.rules[0], " ".join(args.rules[1:]), output_file=args.output,
+                                            rule_file=args.rule_file, workers=args.workers,
+                                            ordered=not args.unordered,
+                                            stats=stats if args.rule_stats else None, metrics=metrics,
+                                            line_index=args.line_index)
+             elif args.mask:
+                 count = engine.generate_from_mask(
+                     args.mask, output_file=args.output,
+                     workers=args.workers, merge=not args.parts,
+                     skip=args.skip, limit=args.limit, backend=args.backend, metrics=metrics,
+                     custom_charsets=custom, increment=increment, line_index=args.line_index
+                 )
+             elif args.chars:
+                 count = engine.generate_brute_force(
+                     args.chars, args.min, args.max, output_file=args.output,
+                     workers=args.workers, merge=not args.parts,
+                     skip=args.skip, limit=args.limit, backend=args.backend, metrics=metrics,
+                     line_index=args.line_index
+                 )
+             else:
+                 count = engine.generate_wordlist(
+                     first=args.first, last=args.last, middle=args.middle,
+                     aliases=args.aliases, usernames=args.users, extra=args.extra,
+                     dob=args.dob, special_chars=args.special,
+                     min_len=args.min, max_len=args.max, depth=args.depth,
+                     enable_leet=args.leet, output_file=args.output,
+                     dedup=args.dedup, stats=stats, metrics=metrics,
+                     order="probability" if args.likely_first else "lexical",
+                     max_words=args.max_words, max_bytes=args.max_bytes, budget_policy=args.budget_policy,
+                     pool_cache=pool_cache, line_index=args.line_index
+                 )
+             if isinstance(count, str): # Error message
+                 print(f"[-] {count}", file=sys.stderr)
+                 sys.exit(1)
+             print(f"[+] Done. Generated {count} words.", file=log)
+             if metrics is not None:
+                 report = metrics.report()
+                 stages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report["stages"].items())
+                 rss = f", peak RSS {report['peak_rss'] / 2**20:.0f} MB" if report["peak_rss"] else ""
+                 print(f"[*] {report['words_per_sec'] or 0:,.0f} words/s, {(report['bytes_per_sec'] or 0) / 2**20:.1f} MB/s"
+                       f"{rss}; {stages}. Report: {metrics.report_path}", file=log)
+             if "duplicates" in stats:
+                 print(f"[+] Dropped {stats['duplicates']} duplicates.", file=log)
+             if "budget" in stats:
+                 budget = stats["budget"]
+                 cut = [(r, length, total - kept) for r, length, total, kept in budget["buckets"] if kept < total]
+                 depths = ", ".join(f"depth {r}: {sum(n for d, _, n in cut if d == r):,}" for r in sorted({r for r, _, _ in cut}))
+                 print(f"[+] Budget ({budget['policy']}) cut {budget['cut_words']:,} words "
+                       f"({budget['cut_bytes'] / 2**20:.1f} MB){'; ' + depths if depths else ''}.", file=log)
+             if "rule_hits" in stats:
+                 # Most productive rules first; 'unchanged' outputs are wasted guesses
+                 ranked = sorted(stats["rule_hits"], key=lambda r: r[1] - r[2], reverse=True)
+                 with open(args.rule_stats, "w", encoding="utf-8", newline="\n") as f:
+                     f.write("emitted\tunchanged\trule\n")
+                     for rule, emitted, unchanged in ranked:
+                         if isinstance(rule, bytes):
+                             rule = rule.decode("utf-8", "replace")
+                         f.write(f"{emitted}\t{unchanged}\t{rule}\n")
+                 useless = sum(1 for _, emitted, unchanged in ranked if emitted == unchanged)
+                 print(f"[+] Rejected {stats['rejected']} candidates; {useless} of {len(ranked)} rules "
+                       f"produced nothing new. Per-rule counts: {args.rule_stats}", file=log)
         else:
              ft.app(target=main)
     else:
@@ -0,0 +1,75 @@
+import pytest
+
+from core import engine
+
+PROFILE = dict(first="Muhib", last="Mehdi", aliases="shadowhunter,nightfall", dob="14/10/2008")
+
+
+@pytest.mark.parametrize("policy", engine.BUDGET_POLICIES)
+@pytest.mark.parametrize("demands,budget", [
+    ([41, 900, 7000, 52000], 5000),
+    ([0, 3, 1, 0, 10], 4),
+    ([5, 5, 5], 2),
+    ([1000, 1, 1, 1], 999),
+    ([10, 20], 100),
+])
+def test_share_out_spends_budget_within_demands(policy, demands, budget):
+    shares = engine._share_out(demands, budget, policy)
+    assert sum(shares) == min(budget, sum(demands))
+    assert all(0 <= s <= d for s, d in zip(shares, demands))
+
+
+def test_proportional_keeps_every_bucket():
+    shares = engine._share_out([41, 900, 7000, 52000], 5000, "proportional")
+    assert sum(shares) == 5000
+    assert all(shares)
+    # Too small a budget to go round: no floor, still exact
+    assert sum(engine._share_out([5, 5, 5, 5], 3, "proportional")) == 3
+
+
+@pytest.mark.parametrize("policy", engine.BUDGET_POLICIES)
+@pytest.mark.parametrize("caps", [dict(max_words=5000), dict(max_bytes=50000), dict(max_words=3000, max_bytes=30000)])
+def test_estimate_matches_output(policy, caps):
+    params = dict(min_len=4, max_len=14, depth=3, budget_policy=policy, pool_cache=False, **caps, **PROFILE)
+    stats = {}
+    out = b"".join(engine.iter_wordlist(stats=stats, **params))
+    assert engine.estimate("wordlist", params) == (out.count(b"\n"), len(out))
+    assert (stats["budget"]["words"], stats["budget"]["bytes"]) == (out.count(b"\n"), len(out))
+
+
+def test_proportional_word_cap_is_exact_and_covers_depth_one():
+    stats = {}
+    out = b"".join(engine.iter_wordlist(min_len=4, max_len=14, depth=3, max_words=5000, budget_policy="proportional",
+                                        stats=stats, pool_cache=False, **PROFILE))
+    assert out.count(b"\n") == 5000
+    assert all(kept for depth, _, words, kept in stats["budget"]["buckets"] if depth == 1 and words)
+
+
+def test_rules_estimate_is_words_times_rules(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("pass\n\nword\nsecret\n", encoding="utf-8")
+    params = dict(file_input=str(words), rule_str=":\nu\nc")
+    out = b"".join(engine.iter_rules(**params))
+    # No reject functions and no length changes: the bound is exact
+    assert engine.estimate("rules", params) == (out.count(b"\n"), len(out)) == (9, 3 * (4 + 4 + 6 + 3))
+
+
+def test_rules_estimate_is_an_upper_bound(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("ab\nlonger\n", encoding="utf-8")
+    rule_file = tmp_path / "extra.rule"
+    rule_file.write_text("# comment\n>3 u\nd\n", encoding="utf-8")
+    stats = {}
+    params = dict(file_input=str(words), rule_str=":\nB", rule_file=str(rule_file))
+    count, size = engine.estimate("rules", dict(params, stats=stats))
+    assert [line for line, _ in stats["invalid"]] == ["B"]
+    out = b"".join(engine.iter_rules(**params))
+    assert count == 2 * 3 > out.count(b"\n") == 5  # '>3 u' rejects 'ab'
+    assert size == 3 * (2 + 6 + 2)
+
+
+def test_rules_estimate_without_usable_rules(tmp_path):
+    words = tmp_path / "words.txt"
+    words.write_text("pass\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="No valid rules"):
+        engine.estimate("rules", dict(file_input=str(words), rule_str="B"))
@@ -0,0 +1,85 @@
+"""Compressed wordlists: .gz/.bz2/.xz output through the writer thread, and as input to every tool."""
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from core import engine
+
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+def compress(path, text):
+    with OPENERS[path.suffix](path, "wb") as f:
+        f.write(text.encode("utf-8"))
+    return str(path)
+
+
+def plain(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def decompress(path):
+    with OPENERS[path.suffix](path, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("ext", OPENERS)
+@pytest.mark.parametrize("workers", [1, 2])
+def test_output_round_trip(tmp_path, monkeypatch, ext, workers):
+    monkeypatch.setattr(engine, "WRITE_QUEUE", 1)  # Producer blocks on the writer every block
+    monkeypatch.setattr(engine, "BLOCK_SIZE", 4096)
+    out = tmp_path / f"out.txt{ext}"
+    assert engine.generate_from_mask("?l?d?d?d", output_file=str(out), workers=workers) == 26000
+    assert decompress(out) == b"".join(engine.iter_from_mask("?l?d?d?d"))
+
+
+@pytest.mark.parametrize("ext", OPENERS)
+def test_output_line_index(tmp_path, ext):
+    out = tmp_path / f"out.txt{ext}"
+    engine.generate_from_mask("?d?d?d", output_file=str(out), line_index=True)
+    assert engine.line_count(str(out)) == 1000
+    assert engine.read_lines(str(out), 998, 5) == ["998", "999"]
+
+
+def test_writer_error_is_raised(tmp_path):
+    with pytest.raises(OSError):
+        engine.generate_from_mask("?d?d?d?d", output_file=str(tmp_path / "missing" / "out.txt.gz"))
+
+
+@pytest.fixture(params=list(OPENERS))
+def inputs(request, tmp_path):
+    """(compressed words, compressed suffixes, plain words, plain suffixes)."""
+    ext = request.param
+    words, suffixes = "alpha\nbeta\n\ngamma\n", "1\n22\n"
+    return (compress(tmp_path / f"a.txt{ext}", words), compress(tmp_path / f"b.txt{ext}", suffixes),
+            plain(tmp_path / "a.txt", words), plain(tmp_path / "b.txt", suffixes))
+
+
+def test_combinator_input(inputs):
+    file_a, file_b, plain_a, plain_b = inputs
+    expected = b"".join(engine.iter_combinator(plain_a, plain_b))
+    assert expected.count(b"\n") == 6
+    assert b"".join(engine.iter_combinator(file_a, file_b)) == expected
+    assert engine.estimate("combinator", dict(file_a=file_a, file_b=file_b)) == (6, len(expected))
+
+
+def test_hybrid_input(inputs):
+    file_a, _, plain_a, _ = inputs
+    expected = b"".join(engine.iter_hybrid(plain_a, "?d"))
+    assert expected.count(b"\n") == 30
+    assert b"".join(engine.iter_hybrid(file_a, "?d")) == expected
+
+
+def test_rules_input(inputs):
+    file_a, _, plain_a, _ = inputs
+    assert b"".join(engine.iter_rules(file_a, ":\nu")) == b"".join(engine.iter_rules(plain_a, ":\nu"))
+    assert b"".join(engine.iter_rules(file_a, "u", workers=2)) == b"ALPHA\nBETA\nGAMMA\n"
+
+
+def test_search_input(inputs):
+    file_a, _, _, _ = inputs
+    assert engine.search_in_file(file_a, "MM", 0, 10) == (["gamma"], 1)
+    assert engine.search_in_file(file_a, "a", 1, 10) == (["beta", "gamma"], 3)
@@ -0,0 +1,51 @@
+"""Deduper: exact set below max_entries, Bloom filter after, nothing unique lost."""
+from core import engine
+
+
+def blocks(words, size=7):
+    """words as (block, count) pairs of up to size words, like the generators yield."""
+    for i in range(0, len(words), size):
+        chunk = words[i:i + size]
+        yield b"".join(w + b"\n" for w in chunk), len(chunk)
+
+
+def run(deduper, words):
+    return [w for data, _ in deduper.filter(blocks(words)) for w in data.split(b"\n")[:-1]]
+
+
+def test_exact_below_threshold():
+    words = [b"%d" % (i % 40) for i in range(100)]
+    deduper = engine.Deduper(max_entries=41)
+    assert run(deduper, words) == [b"%d" % i for i in range(40)]
+    assert deduper.dropped == 60
+    assert deduper.bloom is None and len(deduper.seen) == 40
+
+
+def test_switch_over_point():
+    deduper = engine.Deduper(max_entries=5, memory_mb=1)
+    assert run(deduper, [b"a", b"b", b"a", b"c", b"d"]) == [b"a", b"b", b"c", b"d"]
+    assert deduper.bloom is None
+    # The 5th distinct word fills the set and moves everything into the filter
+    assert run(deduper, [b"e"]) == [b"e"]
+    assert deduper.bloom is not None and deduper.seen == set()
+    # Words from before and after the switch are still recognised
+    assert run(deduper, [b"a", b"e", b"f", b"d", b"f"]) == [b"f"]
+    assert deduper.dropped == 5
+
+
+def test_nothing_unique_dropped_after_switch():
+    unique = [b"word%05d" % i for i in range(20_000)]
+    words = [w for i, w in enumerate(unique) for _ in range(1 + (i % 3 == 0))]
+    deduper = engine.Deduper(max_entries=1000, memory_mb=1, fp_rate=0.0001)
+    assert run(deduper, words) == unique
+    assert deduper.bloom is not None
+    assert deduper.dropped == len(words) - len(unique)
+
+
+def test_dedup_stage_reports_duplicates():
+    stats = {}
+    deduper = engine.Deduper(max_entries=3, memory_mb=1)
+    out = b"".join(data for data, _ in engine._dedup_stage(blocks([b"x", b"y", b"x", b"z", b"w", b"y"]),
+                                                           deduper, stats))
+    assert out == b"x\ny\nz\nw\n"
+    assert stats == {"duplicates": 2}
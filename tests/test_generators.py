@@ -0,0 +1,135 @@
+"""Every generator against a plain itertools.product reference, with skip/limit and workers > 1."""
+import itertools
+import string
+
+import pytest
+
+from core import engine
+
+SKIP_LIMIT = [(0, None), (0, 1), (7, 100), (999, 5), (10**9, 10)]
+
+
+def lines(words):
+    return b"".join(w.encode("utf-8") + b"\n" for w in words)
+
+
+def window(words, skip, limit):
+    return list(itertools.islice(words, skip, None if limit is None else skip + limit))
+
+
+def product_words(pools):
+    return ["".join(p) for p in itertools.product(*pools)]
+
+
+MASKS = {
+    "?d?d?d": [string.digits] * 3,
+    "A?l?d": ["A", string.ascii_lowercase, string.digits],
+    "?u?s": [string.ascii_uppercase, string.punctuation],
+    "x?a": ["x", string.digits + string.ascii_letters + string.punctuation],
+    "é?h?H": ["é", string.digits + "abcdef", string.digits + "ABCDEF"],
+}
+
+
+@pytest.mark.parametrize("mask", MASKS)
+@pytest.mark.parametrize("skip,limit", SKIP_LIMIT)
+def test_mask(mask, skip, limit):
+    expected = lines(window(product_words(MASKS[mask]), skip, limit))
+    assert b"".join(engine.iter_from_mask(mask, skip=skip, limit=limit, backend="python")) == expected
+
+
+def test_keyspace_candidate_at():
+    segments = [[["a", "bc"], ["1", "22", "é"]], [["x"], ["y", "z"], ["0", "1"]]]
+    keyspace = engine.Keyspace(segments)
+    expected = [w for pools in segments for w in product_words(pools)]
+    assert keyspace.keyspace_size() == len(expected)
+    assert [keyspace.candidate_at(i) for i in range(len(expected))] == expected
+    with pytest.raises(IndexError):
+        keyspace.candidate_at(len(expected))
+    for skip, limit in SKIP_LIMIT:
+        assert list(keyspace.iter_range(skip, limit)) == window(expected, skip, limit)
+        assert b"".join(data for data, _ in keyspace.iter_blocks(skip, limit, backend="python")) == \
+            lines(window(expected, skip, limit))
+
+
+def brute_force_words(chars, lo, hi):
+    return [w for r in range(lo, hi + 1) for w in product_words([sorted(chars)] * r)]
+
+
+@pytest.mark.parametrize("skip,limit", SKIP_LIMIT)
+def test_brute_force(skip, limit):
+    expected = lines(window(brute_force_words("abcé1", 1, 4), skip, limit))
+    assert b"".join(engine.iter_brute_force("a,b,c,é,1", 1, 4, skip=skip, limit=limit, backend="python")) == expected
+
+
+@pytest.fixture
+def word_files(tmp_path):
+    a = ["alpha", "beta", "é", "gamma", "delta"]
+    b = ["1", "22", "", "!", "ü"]
+    path_a, path_b = tmp_path / "a.txt", tmp_path / "b.txt"
+    path_a.write_text("\n".join(a) + "\n", encoding="utf-8")
+    path_b.write_text("\n".join(b) + "\n", encoding="utf-8")
+    return str(path_a), str(path_b), a, [w for w in b if w]
+
+
+@pytest.mark.parametrize("skip,limit", SKIP_LIMIT)
+def test_hybrid(tmp_path, word_files, skip, limit):
+    path_a, _, a, _ = word_files
+    expected = lines(window(product_words([a, string.digits, "xy"]), skip, limit))
+    assert b"".join(engine.iter_hybrid(path_a, "?d?1", skip=skip, limit=limit, custom_charsets=["xy"])) == expected
+    out = tmp_path / "out.txt"
+    engine.hybrid_tool(path_a, "?d?1", str(out), skip=skip, limit=limit, custom_charsets=["xy"])
+    assert out.read_bytes() == expected
+
+
+@pytest.mark.parametrize("skip,limit", SKIP_LIMIT)
+def test_mask_workers(tmp_path, skip, limit):
+    out = tmp_path / "out.txt"
+    engine.generate_from_mask("?l?d?d", str(out), workers=3, skip=skip, limit=limit)
+    assert out.read_bytes() == lines(window(product_words([string.ascii_lowercase] + [string.digits] * 2), skip, limit))
+
+
+def test_mask_parts(tmp_path):
+    out = tmp_path / "out.txt"
+    engine.generate_from_mask("?l?d?d", str(out), workers=2, merge=False)
+    parts = sorted(tmp_path.glob("out.txt.part*"))
+    assert len(parts) > 1
+    assert b"".join(p.read_bytes() for p in parts) == lines(product_words([string.ascii_lowercase] + [string.digits] * 2))
+
+
+@pytest.mark.parametrize("skip,limit", SKIP_LIMIT)
+def test_brute_force_workers(tmp_path, skip, limit):
+    out = tmp_path / "out.txt"
+    engine.generate_brute_force("a,b,c,é,1", 1, 4, str(out), workers=3, skip=skip, limit=limit)
+    assert out.read_bytes() == lines(window(brute_force_words("abcé1", 1, 4), skip, limit))
+
+
+PROFILE = dict(first="Ann", last="Lee", dob="01/02/1990", special_chars="!", enable_leet=True)
+
+
+@pytest.mark.parametrize("min_len,max_len,depth", [(4, 8, 2), (1, 25, 1), (6, 6, 3), (9, 4, 2)])
+def test_wordlist(min_len, max_len, depth):
+    pool = engine._build_pool(**PROFILE)
+    expected = [w for r in range(1, depth + 1) for w in product_words([pool] * r) if min_len <= len(w) <= max_len]
+    out = b"".join(engine.iter_wordlist(min_len, max_len, depth, pool_cache=False, **PROFILE))
+    assert out == lines(expected)
+    assert engine.estimate("wordlist", dict(min_len=min_len, max_len=max_len, depth=depth, pool_cache=False,
+                                            **PROFILE)) == (len(expected), len(out))
+
+
+def test_combinator(tmp_path, word_files):
+    path_a, path_b, a, b = word_files
+    expected = lines(product_words([a, b]))
+    assert b"".join(engine.iter_combinator(path_a, path_b)) == expected
+    # Small memory budget: File B in several blocks, same a-major output
+    assert b"".join(engine.iter_combinator(path_a, path_b, memory_mb=1e-5)) == expected
+    out = tmp_path / "out.txt"
+    engine.combinator_tool(path_a, path_b, str(out), workers=3)
+    assert out.read_bytes() == expected
+
+
+def test_multi_combinator(word_files):
+    path_a, path_b, a, b = word_files
+    expected = [w for w in product_words([a, ["", "."], b, b]) if 3 <= len(w) <= 8]
+    out = b"".join(engine.iter_multi_combinator([path_a, path_b, path_b], separators=[["", "."], [""]],
+                                                min_len=3, max_len=8))
+    assert out == lines(expected)
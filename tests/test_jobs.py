@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+
+import pytest
+
+from core import engine, jobs
+
+
+def run_worker(func, output_file, kwargs, collect_stats):
+    """jobs._worker in this process; returns its final message."""
+    resume = threading.Event()
+    resume.set()
+    messages = queue.Queue()
+    jobs._worker(func, output_file, output_file, kwargs, None, collect_stats, threading.Event(), resume, messages)
+    return messages.get_nowait()
+
+
+def test_rules_job_skips_hit_counting(tmp_path, monkeypatch):
+    words = tmp_path / "words.txt"
+    words.write_text("pass\nword\n", encoding="utf-8")
+    seen = []
+    load_rules = engine._load_rules
+    monkeypatch.setattr(engine, "_load_rules", lambda *a, **kw: seen.append(kw) or load_rules(*a, **kw))
+    out = tmp_path / "out.txt"
+    state, count, _, _, stats = run_worker("iter_rules", str(out), dict(file_input=str(words), rule_str="u\n$1"),
+                                           False)
+    assert (state, count, stats) == (jobs.DONE, 4, {})
+    assert seen == [{"count_hits": False}]
+    assert out.read_bytes() == b"PASS\npass1\nWORD\nword1\n"
+
+
+def test_stats_on_request(tmp_path):
+    kwargs = dict(first="Ann", min_len=1, max_len=6, depth=2, dedup=True, pool_cache=False)
+    state, _, _, _, stats = run_worker("iter_wordlist", str(tmp_path / "out.txt"), kwargs, True)
+    assert state == jobs.DONE
+    assert "duplicates" in stats
+
+
+def wait(job, state=jobs.FINISHED, timeout=60):
+    deadline = time.monotonic() + timeout
+    while job.state not in state and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return job.state
+
+
+def test_runner(tmp_path):
+    runner = jobs.JobRunner()
+    try:
+        job = runner.submit("Mask", "iter_from_mask", str(tmp_path / "out.txt"), total=100, mask="?d?d")
+        wait(job)
+        assert (job.state, job.result, job.stats) == (jobs.DONE, 100, {})
+    finally:
+        runner.shutdown()
+    assert (tmp_path / "out.txt").read_bytes() == b"".join(b"%02d\n" % i for i in range(100))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.txt"]
+
+
+@pytest.fixture
+def previous(tmp_path):
+    out = tmp_path / "wordlist.txt"
+    out.write_bytes(b"good\nwords\n")
+    words = tmp_path / "words.txt"
+    words.write_text("a\nb\n", encoding="utf-8")
+    return out, str(words)
+
+
+def test_failed_estimate_keeps_previous_output(previous):
+    out, words = previous
+    runner = jobs.JobRunner()
+    try:
+        job = runner.submit("Hybrid", "iter_hybrid", str(out), estimate=("hybrid", dict(file_a=words, mask="?q")),
+                            file_a=words, mask="?q")
+        assert wait(job) == jobs.FAILED
+        assert "MaskError" in job.error
+    finally:
+        runner.shutdown()
+    assert out.read_bytes() == b"good\nwords\n"
+    assert sorted(p.name for p in out.parent.iterdir()) == ["wordlist.txt", "words.txt"]
+
+
+def test_cancel_keeps_previous_output(previous):
+    out, _ = previous
+    runner = jobs.JobRunner()
+    try:
+        running = runner.submit("Mask", "iter_from_mask", str(out), total=95 ** 5, mask="?a?a?a?a?a")
+        queued = runner.submit("Mask", "iter_from_mask", str(out), total=100, mask="?d?d")
+        runner.cancel(queued)
+        assert wait(running, (jobs.RUNNING,)) == jobs.RUNNING
+        deadline = time.monotonic() + 60
+        while not running.words and time.monotonic() < deadline:
+            time.sleep(0.02)
+        runner.cancel(running)
+        assert wait(running) == jobs.CANCELLED
+        assert queued.state == jobs.CANCELLED
+    finally:
+        runner.shutdown()
+    assert out.read_bytes() == b"good\nwords\n"
+    assert sorted(p.name for p in out.parent.iterdir()) == ["wordlist.txt", "words.txt"]
@@ -0,0 +1,87 @@
+"""The '.lines' paging sidecar: opt-in, best-effort, and what read_lines does with it."""
+import os
+import random
+
+import pytest
+
+from core import engine
+
+
+def sidecar(path):
+    return str(path) + engine.LineIndex.SUFFIX
+
+
+def test_sidecar_is_opt_in(tmp_path):
+    out = tmp_path / "out.txt"
+    assert engine.generate_from_mask("?d?d", output_file=str(out)) == 100
+    assert not os.path.exists(sidecar(out))
+
+    assert engine.generate_from_mask("?d?d", output_file=str(out), line_index=True) == 100
+    assert engine.LineIndex.load(str(out)).line_count() == 100
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sidecar_skipped_for_devices(workers):
+    if not os.path.exists(os.devnull):
+        pytest.skip("no null device")
+    assert engine.generate_from_mask("?d?d", output_file=os.devnull, workers=workers, line_index=True) == 100
+    assert not os.path.exists(sidecar(os.devnull))
+
+
+def test_sidecar_save_failure_is_not_fatal(tmp_path):
+    out = tmp_path / "out.txt"
+    os.mkdir(sidecar(out))  # the sidecar path can't be opened as a file
+    assert engine.generate_from_mask("?d?d", output_file=str(out), line_index=True) == 100
+    assert out.read_bytes().count(b"\n") == 100
+
+
+@pytest.fixture(scope="module")
+def digits(tmp_path_factory):
+    """A million-line wordlist ('000000' .. '999999') spanning several written blocks, with its sidecar."""
+    out = tmp_path_factory.mktemp("lines") / "digits.txt"
+    engine.generate_from_mask("?d?d?d?d?d?d", output_file=str(out), line_index=True)
+    return str(out)
+
+
+def test_random_access(digits):
+    index = engine.LineIndex.load(digits)
+    assert len(index.lines) > 2 and engine.line_count(digits) == 10**6
+    rng = random.Random(1)
+    starts = [0, 1, 10**6 - 5, 10**6 - 1] + list(index.lines[1:4]) + [rng.randrange(10**6) for _ in range(50)]
+    for start in starts:
+        count = rng.randrange(1, 300)
+        expected = ["%06d" % i for i in range(start, min(start + count, 10**6))]
+        assert engine.read_lines(digits, start, count) == expected
+    assert engine.read_lines(digits, 10**6, 10) == []
+    assert engine.read_lines(digits, 5, 0) == []
+
+
+def test_missing_sidecar_falls_back_to_a_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "BLOCK_SIZE", 64)  # several index entries for a small file
+    path = tmp_path / "words.txt"
+    words = ["w%d" % i for i in range(500)]
+    path.write_text("\n".join(words), encoding="utf-8")  # no trailing newline
+    assert not os.path.exists(sidecar(path))
+    assert engine.read_lines(str(path), 250, 3) == words[250:253]
+    assert engine.read_lines(str(path), 498, 5) == words[498:]
+    assert engine.line_count(str(path)) == 500
+    assert len(engine.LineIndex.load(str(path)).lines) > 10
+
+
+def test_stale_sidecar_is_rebuilt(tmp_path):
+    path = tmp_path / "words.txt"
+    engine.generate_from_mask("a?d", output_file=str(path), line_index=True)
+    assert engine.read_lines(str(path), 8, 5) == ["a8", "a9"]
+
+    # Different size
+    path.write_text("x\ny\n", encoding="utf-8")
+    assert engine.LineIndex.load(str(path)) is None
+    assert engine.read_lines(str(path), 0, 5) == ["x", "y"]
+    assert engine.LineIndex.load(str(path)).line_count() == 2
+
+    # Same size, new mtime
+    st = os.stat(path)
+    path.write_text("xy\n\n", encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert engine.LineIndex.load(str(path)) is None
+    assert engine.read_lines(str(path), 0, 5) == ["xy", ""]
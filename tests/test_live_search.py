@@ -0,0 +1,150 @@
+"""SearchCache (LRU budget, refinements, file versions) and LiveSearch (debounce, cancel, latest only)."""
+import queue
+import threading
+
+import pytest
+
+from core import engine, live_search
+from core.live_search import LiveSearch, SearchCache, SearchResult
+
+WORDS = ["admin", "Admin1", "sysadmin", "root", "user", "administrator", "guest"]
+
+
+@pytest.fixture
+def wordlist(tmp_path):
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(WORDS) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def result(*matches, complete=True):
+    return SearchResult(list(matches), len(matches), complete)
+
+
+def test_cache_lru_byte_budget(wordlist):
+    one = result("x" * 100)
+    cache = SearchCache(max_bytes=2 * live_search._size(one) + 10)
+    cache.put(wordlist, "a", one)
+    cache.put(wordlist, "b", result("y" * 100))
+    assert cache.get(wordlist, "a") is one  # Now the most recently used
+    cache.put(wordlist, "c", result("z" * 100))
+    assert len(cache) == 2 and cache.bytes <= cache.max_bytes
+    assert cache.get(wordlist, "a") is one
+    assert cache.get(wordlist, "b") is None
+    # A result over the whole budget is not kept, and evicts nothing
+    cache.put(wordlist, "d", result("w" * 1000))
+    assert len(cache) == 2 and cache.get(wordlist, "d") is None
+
+
+def test_cache_refines_a_complete_base(wordlist):
+    cache = SearchCache()
+    cache.put(wordlist, "ADM", result("admin", "Admin1", "sysadmin", "administrator"))
+    assert cache.get(wordlist, "admin1") == result("Admin1")
+    assert cache.get(wordlist, "sysadm") == result("sysadmin")
+    assert len(cache) == 3  # Refinements are cached too
+    # Only complete results can answer a refinement
+    cache.put(wordlist, "o", result("root", complete=False))
+    assert cache.get(wordlist, "oo") is None
+
+
+def test_cache_dropped_for_a_new_file_version(wordlist):
+    cache = SearchCache()
+    cache.put(wordlist, "root", result("root"))
+    assert cache.get(wordlist, "root") == result("root")
+    with open(wordlist, "a", encoding="utf-8") as f:
+        f.write("rooted\n")
+    assert cache.get(wordlist, "root") is None
+    assert len(cache) == 0 and cache.bytes == 0
+
+
+class Searches:
+    """Stands in for engine.search_in_file: records queries, optionally holds a scan until released."""
+
+    def __init__(self):
+        self.search = engine.search_in_file
+        self.queries = []
+        self.started = threading.Event()
+        self.hold = {}  # query -> Event released by the test
+        self.ignore_cancel = ()
+
+    def __call__(self, filename, query, skip=0, limit=2000, cancel=None):
+        self.queries.append(query)
+        self.started.set()
+        gate = self.hold.get(query)
+        if gate is not None:
+            while not gate.wait(0.01):
+                if cancel is not None and cancel.is_set() and query not in self.ignore_cancel:
+                    raise engine.SearchCancelled()
+        return self.search(filename, query, skip, limit, use_index=False)
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    fake = Searches()
+    monkeypatch.setattr(engine, "search_in_file", fake)
+    return fake
+
+
+@pytest.fixture
+def results():
+    return queue.Queue()
+
+
+@pytest.fixture
+def live(results):
+    search = LiveSearch(lambda query, skip, result: results.put((query, skip, result)),
+                        lambda query, message: results.put((query, None, message)), debounce=0.1)
+    yield search
+    search.close()
+
+
+def test_debounce_runs_only_the_last_keystroke(wordlist, searches, results, live):
+    for query in ("r", "ro", "roo", "root"):
+        live.request(wordlist, query)
+    assert results.get(timeout=5) == ("root", 0, result("root"))
+    assert searches.queries == ["root"]
+    # Answered from the cache now, on the calling thread
+    live.request(wordlist, "root")
+    assert results.get_nowait() == ("root", 0, result("root"))
+    assert searches.queries == ["root"]
+
+
+def test_new_request_cancels_the_scan_in_flight(wordlist, searches, results, live):
+    searches.hold["admin"] = threading.Event()
+    live.request(wordlist, "admin")
+    assert searches.started.wait(5)
+    live.request(wordlist, "user")
+    assert results.get(timeout=5) == ("user", 0, result("user"))
+    assert searches.queries == ["admin", "user"]
+    assert results.empty()
+    assert len(live.cache) == 1  # Nothing cached for the cancelled query
+
+
+def test_only_the_latest_result_is_delivered(wordlist, searches, results, live):
+    # A scan that doesn't notice the cancel still finishes, but its result is dropped
+    gate = searches.hold["guest"] = threading.Event()
+    searches.ignore_cancel = ("guest",)
+    live.request(wordlist, "guest")
+    assert searches.started.wait(5)
+    live.request(wordlist, "sys")
+    gate.set()
+    assert results.get(timeout=5) == ("sys", 0, result("sysadmin"))
+    live.close()
+    assert results.empty()
+    assert live.cache.get(wordlist, "guest") is None
+
+
+def test_cancel_drops_the_pending_request(wordlist, searches, results, live):
+    live.request(wordlist, "root")
+    live.cancel()
+    live.close()
+    assert searches.queries == [] and results.empty()
+
+
+def test_errors_go_to_on_error(wordlist, monkeypatch, results, live):
+    def broken(*args, **kwargs):
+        raise OSError("disk gone")
+    monkeypatch.setattr(engine, "search_in_file", broken)
+    live.request(wordlist, "root")
+    assert results.get(timeout=5) == ("root", None, "OSError: disk gone")
+    assert len(live.cache) == 0
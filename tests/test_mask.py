@@ -0,0 +1,124 @@
+"""core.mask: charsets, custom charsets, .hcmask files, increments and the MaskError cases."""
+import re
+import string
+
+import pytest
+
+from core import engine
+from core.mask import (CHARSETS, Mask, MaskError, compile_masks, custom_charsets, load_hcmask,
+                       parse_hcmask_line)
+
+
+def chars(text):
+    return tuple(text)
+
+
+def test_builtin_charsets():
+    mask = Mask("A?l?d??")
+    assert mask.positions == [("A",), chars(string.ascii_lowercase), chars(string.digits), ("?",)]
+    assert mask.keyspace == 26 * 10 and len(mask) == 4
+
+
+def test_custom_charsets_drop_repeats():
+    mask = Mask("?1?2", ["?dab", "?h?H"])
+    assert mask.positions[0] == chars(string.digits + "ab")
+    assert mask.positions[1] == chars(string.digits + "abcdefABCDEF")
+    assert custom_charsets({3: "xyx", "4": None}) == {"3": "xy"}
+
+
+def test_bytes_are_surrogate_escaped(tmp_path):
+    (charset,) = Mask("?b").positions
+    assert len(charset) == 256
+    assert charset[0x41] == "A" and charset[0xff] == "\udcff"
+    out = tmp_path / "out.bin"
+    assert engine.generate_from_mask("x?b", output_file=str(out)) == 256
+    data = out.read_bytes()
+    assert len(data) == 256 * 3
+    # One raw byte per candidate, as hashcat writes it; 0x0a splits its line in two
+    assert data[3 * 0x80:3 * 0x80 + 3] == b"x\x80\n" and data[3 * 0xff:] == b"x\xff\n"
+    assert data.count(b"\n") == 257
+
+
+def test_increments():
+    mask = Mask("?d?l?u")
+    digits, lower, upper = mask.positions
+    assert mask.increments() == [[digits], [digits, lower], [digits, lower, upper]]
+    assert mask.increments(2) == [[digits, lower], [digits, lower, upper]]
+    assert mask.increments(1, 2) == [[digits], [digits, lower]]
+    assert mask.increments(2, 9) == mask.increments(2)
+    assert compile_masks("?d?d", increment=True) == [[digits], [digits, digits]]
+    assert compile_masks(["?d?l", "?l?u?d"], increment=(2, 2)) == [[digits, lower], [lower, upper]]
+
+
+@pytest.mark.parametrize("lo,hi", [(0, None), (4, None), (3, 2)])
+def test_increment_out_of_range(lo, hi):
+    with pytest.raises(MaskError, match="Increment range"):
+        Mask("?d?l?u").increments(lo, hi)
+
+
+def test_hcmask_line_fields():
+    mask = parse_hcmask_line("?l?d,?u,?1?2?2")
+    assert mask.positions == [chars(string.ascii_lowercase + string.digits)] + [chars(string.ascii_uppercase)] * 2
+    # '\,' is a literal comma, in a charset and in the mask
+    assert parse_hcmask_line(r"a\,b,?1\,").positions == [("a", ",", "b"), (",",)]
+    # The line's own charsets replace those passed in, the others still apply
+    assert parse_hcmask_line("xy,?1?2", ["?d", "z"]).positions == [("x", "y"), ("z",)]
+
+
+def test_load_hcmask(tmp_path):
+    path = tmp_path / "masks.hcmask"
+    path.write_text("# comment, with commas\n\n?d?d\r\n?l,?1?1\nab\\,c\n", encoding="utf-8")
+    masks = load_hcmask(str(path))
+    assert [m.text for m in masks] == ["?d?d", "?1?1", "ab,c"]
+    assert [m.keyspace for m in masks] == [100, 676, 1]
+    assert compile_masks(str(path)) == [m.positions for m in masks]
+    out = b"".join(engine.iter_from_mask(str(path))).splitlines()
+    assert (len(out), out[0], out[100], out[-1]) == (777, b"00", b"aa", b"ab,c")
+
+
+@pytest.mark.parametrize("lines,line,message", [
+    ("?d\n?q\n", 2, "Unknown mask code ?q"),
+    ("# first\n?1\n", 2, "custom charset 1 is not defined"),
+    ("?d\n\n?d,?d?\n", 3, "lone '?'"),
+    ("a,b,c,d,e,?1\n", 1, "Too many fields"),
+    ("?1,?1\n", 1, "not allowed inside a custom charset"),
+])
+def test_hcmask_errors_name_the_line(tmp_path, lines, line, message):
+    path = tmp_path / "bad.hcmask"
+    path.write_text(lines, encoding="utf-8")
+    with pytest.raises(MaskError, match=re.escape(message)) as error:
+        load_hcmask(str(path))
+    assert str(error.value).startswith(f"{path}:{line}: ")
+
+
+def test_empty_hcmask(tmp_path):
+    path = tmp_path / "empty.hcmask"
+    path.write_text("# nothing\n\n", encoding="utf-8")
+    with pytest.raises(MaskError, match="holds no masks"):
+        load_hcmask(str(path))
+
+
+@pytest.mark.parametrize("mask,custom,message", [
+    ("?x", None, "Unknown mask code ?x"),
+    ("abc?", None, "lone '?'"),
+    ("?3", ["?d"], "custom charset 3 is not defined"),
+    ("?1", ["?1"], "not allowed inside a custom charset"),
+    ("?1", {5: "ab"}, "Custom charsets are ?1 to ?4"),
+    ("?1", ["?z"], "Unknown mask code ?z"),
+])
+def test_mask_errors(mask, custom, message):
+    with pytest.raises(MaskError, match=re.escape(message)):
+        Mask(mask, custom)
+
+
+def test_mask_error_is_a_value_error():
+    assert issubclass(MaskError, ValueError)
+    with pytest.raises(ValueError):
+        engine.estimate("mask", dict(mask="?q"))
+    with pytest.raises(ValueError):
+        engine.estimate("hybrid", dict(file_a="unused.txt", mask="?d?"))
+
+
+def test_charset_table():
+    assert CHARSETS["a"] == string.digits + string.ascii_letters + string.punctuation
+    assert len(set(CHARSETS["b"])) == 256
@@ -0,0 +1,86 @@
+"""Metrics and the _instrumented entry points: what gets recorded, and that results don't change."""
+import json
+
+import pytest
+
+from core import engine
+from core.metrics import Metrics, PROFILE_ENV, REPORT_ENV
+
+
+@pytest.fixture(autouse=True)
+def no_env_metrics(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    monkeypatch.delenv(REPORT_ENV, raising=False)
+
+
+def test_generate_records_counts_and_stages(tmp_path):
+    metrics = Metrics()
+    out = tmp_path / "out.txt"
+    assert engine.generate_from_mask("?l?d?d", output_file=str(out), metrics=metrics) == 2600
+    report = metrics.report()
+    assert report["entry"] == "generate_from_mask"
+    assert report["params"]["mask"] == "?l?d?d" and "metrics" not in report["params"]
+    assert (report["words"], report["bytes"]) == (2600, out.stat().st_size)
+    assert report["flushes"] >= 1
+    assert {"parse", "enumerate", "write"} <= set(report["stages"])
+    assert all(seconds >= 0 for seconds in report["stages"].values())
+    assert metrics.elapsed is not None and report["elapsed"] >= report["stages"]["write"]
+
+
+def test_compressed_output_times_the_writer_thread(tmp_path):
+    metrics = Metrics()
+    engine.generate_from_mask("?d?d?d", output_file=str(tmp_path / "out.txt.gz"), metrics=metrics)
+    assert "compress" in metrics.stages and metrics.words == 1000
+
+
+def test_stream_finishes_when_exhausted():
+    metrics = Metrics()
+    chunks = engine.iter_from_mask("?d?d", metrics=metrics)
+    assert metrics.elapsed is None
+    assert b"".join(chunks) == b"".join(engine.iter_from_mask("?d?d"))
+    assert metrics.elapsed is not None
+    assert (metrics.words, metrics.bytes) == (100, 300)
+
+
+CALLS = {
+    "brute_force": lambda words, **kw: engine.generate_brute_force("a,b,é", 1, 3, output_file="-", **kw),
+    "hybrid": lambda words, **kw: b"".join(engine.iter_hybrid(words, "?d", **kw)),
+    "rules": lambda words, **kw: b"".join(engine.iter_rules(words, ":\nu\n$1", **kw)),
+    "combinator": lambda words, **kw: b"".join(engine.iter_combinator(words, words, dedup=True, **kw)),
+    "search": lambda words, **kw: engine.search_in_file(words, "a", 0, 10, use_index=False, **kw),
+}
+
+
+@pytest.mark.parametrize("name", CALLS)
+def test_results_unchanged(tmp_path, capsysbinary, name):
+    words = tmp_path / "words.txt"
+    words.write_text("pass\nadmin\nroot\n", encoding="utf-8")
+    plain = CALLS[name](str(words))
+    plain_out = capsysbinary.readouterr().out
+    metrics = Metrics()
+    assert CALLS[name](str(words), metrics=metrics) == plain
+    assert capsysbinary.readouterr().out == plain_out
+    assert metrics.entry and metrics.elapsed is not None
+
+
+def test_errors_still_finish(tmp_path):
+    metrics = Metrics()
+    with pytest.raises(ValueError):
+        b"".join(engine.iter_from_mask("?q", metrics=metrics))
+    assert metrics.elapsed is not None
+
+
+def test_report_saved_from_env(tmp_path, monkeypatch):
+    report = tmp_path / "report.json"
+    monkeypatch.setenv(REPORT_ENV, str(report))
+    assert engine.generate_from_mask("?d", output_file=str(tmp_path / "out.txt")) == 10
+    saved = json.loads(report.read_text(encoding="utf-8"))
+    assert (saved["entry"], saved["words"], saved["bytes"]) == ("generate_from_mask", 10, 20)
+
+
+def test_cprofile_and_tracemalloc(tmp_path):
+    metrics = Metrics(profile="cprofile,tracemalloc")
+    engine.generate_from_mask("?d?d", output_file=str(tmp_path / "out.txt"), metrics=metrics)
+    assert metrics.profiles["cprofile"] and metrics.profiles["tracemalloc"]["peak"] > 0
+    with pytest.raises(ValueError, match="Unknown profiler"):
+        Metrics(profile="perf")
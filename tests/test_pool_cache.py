@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+from core import engine
+
+PROFILE = dict(first="Ann", last="Lee", aliases="annie", dob="01/02/1990", enable_leet=True)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return engine.PoolCache(str(tmp_path / "cache" / "pools"))
+
+
+def test_reuse_gives_same_output(cache):
+    expected = b"".join(engine.iter_wordlist(4, 10, 2, pool_cache=False, **PROFILE))
+    for origin in ("built", "memory"):
+        stats = {}
+        assert b"".join(engine.iter_wordlist(4, 10, 2, stats=stats, pool_cache=cache, **PROFILE)) == expected
+        assert stats["pool"]["origin"] == origin
+    cache.clear()
+    stats = {}
+    out = b"".join(engine.iter_wordlist(4, 10, 2, stats=stats, order="probability", pool_cache=cache, **PROFILE))
+    assert stats["pool"]["origin"] == "disk"
+    assert sorted(out.splitlines()) == sorted(expected.splitlines())
+
+
+def test_key_follows_inputs():
+    assert engine._profile_key(dict(first="Ann")) == engine._profile_key(dict(first="Ann", last=""))
+    assert engine._profile_key(dict(first="Ann")) != engine._profile_key(dict(first="Ann", enable_leet=True))
+
+
+def test_memory_lru(tmp_path):
+    cache = engine.PoolCache(None, max_entries=2)
+    for name in ("a", "b", "c"):
+        cache.get(dict(first=name))
+    assert len(cache) == 2
+    assert cache.get(dict(first="a"))[1] == "built"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+def test_files_are_private(cache):
+    cache.get(PROFILE)
+    (path,) = cache._files()
+    assert os.stat(cache.directory).st_mode & 0o777 == 0o700
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+
+def test_clear(cache):
+    cache.get(PROFILE)
+    open(cache._files()[0] + ".123.tmp", "w").close()
+    assert engine.clear_pool_cache(cache) == cache.directory
+    assert os.listdir(cache.directory) == []
+    assert len(cache) == 0
+    assert cache.get(PROFILE)[1] == "built"
+
+
+def test_unreadable_file_is_rebuilt(cache):
+    cache.get(PROFILE)
+    with open(cache._files()[0], "w") as f:
+        f.write("{not json")
+    cache.clear()
+    assert cache.get(PROFILE)[1] == "built"
+
+
+@pytest.mark.parametrize("table,key,value", [
+    ("LEET_MAP", ord("s"), "$"),
+    ("SOURCE_WEIGHTS", "name", 0.5),
+    ("SOURCE_KINDS", "alias", "date"),
+    ("CASE_WEIGHTS", "upper", 0.5),
+    ("SUBSTRING_WEIGHTS", "inner", 0.5),
+])
+def test_key_follows_tables(monkeypatch, table, key, value):
+    before = engine._profile_key(PROFILE)
+    monkeypatch.setitem(getattr(engine, table), key, value)
+    assert engine._profile_key(PROFILE) != before
+
+
+def test_key_follows_format(monkeypatch):
+    before = engine._profile_key(PROFILE)
+    monkeypatch.setattr(engine, "POOL_FORMAT", engine.POOL_FORMAT + 1)
+    assert engine._profile_key(PROFILE) != before
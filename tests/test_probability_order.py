@@ -0,0 +1,69 @@
+"""order="probability": the same words as the lexical order, best score first."""
+import math
+import re
+
+import pytest
+
+from core import engine
+
+PROFILE = dict(first="Ann", last="Lee", middle="Jo", aliases="annie", usernames="alee", extra="blue,42",
+               dob="01/02/1990", special_chars="!,#")
+
+# Capitalised parts, so every candidate splits back into its parts one way only
+SOURCES = {
+    "Ann": ("name", 1.0), "Lee": ("name", 0.9), "Jo": ("name", 0.5), "Le": ("name", 0.25),
+    "Blue": ("word", 0.7), "Bl": ("word", 0.35),
+    "Y1990": ("date", 0.9), "Y90": ("date", 0.8), "D0102": ("date", 0.6), "D1": ("date", 0.4),
+    "X!": ("special", 0.6), "X#": ("special", 0.6),
+}
+
+
+def log_score(word):
+    """The model's log-probability of a word built from SOURCES."""
+    parts = re.findall(r"[A-Z][^A-Z]*", word)
+    r = len(parts)
+    roles = (None,) if r == 1 else (0,) + (1,) * (r - 2) + (2,)
+    score = (r - 1) * math.log(engine.DEPTH_WEIGHT) + math.log(engine._length_weight(len(word)))
+    for part, role in zip(parts, roles):
+        kind, weight = SOURCES[part]
+        score += math.log(weight if role is None else weight * engine.ROLE_WEIGHTS[kind][role])
+    return score
+
+
+def words(runs):
+    return [w.decode("utf-8") for data, _ in runs for w in data.split(b"\n")[:-1]]
+
+
+@pytest.mark.parametrize("min_len,max_len,depth", [(1, 25, 1), (4, 12, 2), (5, 14, 3), (9, 9, 3), (8, 4, 2)])
+def test_scores_non_increasing(min_len, max_len, depth):
+    ranked = words(engine._ranked_runs(SOURCES, min_len, max_len, depth))
+    lexical = words(engine._wordlist_runs(sorted(SOURCES), min_len, max_len, depth))
+    assert sorted(ranked) == sorted(lexical)
+    scores = [log_score(w) for w in ranked]
+    assert all(b <= a + 1e-9 for a, b in zip(scores, scores[1:]))
+
+
+def test_quotas_keep_the_best_of_each_bucket():
+    everything = words(engine._ranked_runs(SOURCES, 4, 14, 3))
+    buckets = {}
+    for w in everything:
+        buckets.setdefault((len(re.findall(r"[A-Z]", w)), len(w)), []).append(w)
+    quotas = {bucket: len(ws) // 3 for bucket, ws in buckets.items()}
+    kept = words(engine._ranked_runs(SOURCES, 4, 14, 3, quotas))
+    assert len(kept) == sum(quotas.values())
+    for bucket, ws in buckets.items():
+        mine = [w for w in kept if (len(re.findall(r"[A-Z]", w)), len(w)) == bucket]
+        assert len(mine) == quotas[bucket]
+        if mine and len(mine) < len(ws):
+            dropped = sorted(set(ws) - set(mine), key=log_score, reverse=True)
+            assert min(map(log_score, mine)) >= log_score(dropped[0]) - 1e-9
+
+
+@pytest.mark.parametrize("min_len,max_len,depth,leet", [(4, 25, 1, False), (4, 12, 2, True), (6, 10, 3, False)])
+def test_profile_is_a_permutation_of_the_lexical_order(min_len, max_len, depth, leet):
+    params = dict(min_len=min_len, max_len=max_len, depth=depth, enable_leet=leet, pool_cache=False, **PROFILE)
+    lexical = b"".join(engine.iter_wordlist(**params)).splitlines()
+    ranked = b"".join(engine.iter_wordlist(order="probability", **params)).splitlines()
+    assert ranked != lexical
+    assert sorted(ranked) == sorted(lexical)
+    assert engine.estimate("wordlist", params)[0] == len(ranked)
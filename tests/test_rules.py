@@ -0,0 +1,113 @@
+import pytest
+
+from core import engine, rules
+
+
+def apply(rule, word):
+    return rules.compile_rule(rule)(word.encode("utf-8") if isinstance(word, str) else word)
+
+
+@pytest.mark.parametrize("rule,word,expected", [
+    # <N keeps words of at most N bytes, >N those of at least N (checked on the word so far)
+    ("<5", "abcde", b"abcde"),
+    ("<5", "abcdef", None),
+    (">5", "abcde", b"abcde"),
+    (">5", "abcd", None),
+    ("<A", "abcdefghij", b"abcdefghij"),
+    ("$1 <5", "abcde", None),
+    ("<5 $1", "abcde", b"abcde1"),
+    ("_3", "abc", b"abc"),
+    ("_3", "ab", None),
+    ("!z", "lazy", None),
+    ("/z", "lazy", b"lazy"),
+    ("(l", "lazy", b"lazy"),
+    (")l", "lazy", None),
+    ("=1a", "lazy", b"lazy"),
+    ("%2a", "banana", b"banana"),
+    ("%4a", "banana", None),
+])
+def test_rejects(rule, word, expected):
+    assert apply(rule, word) == expected
+
+
+@pytest.mark.parametrize("rule,word,expected", [
+    ("x02", "abcd", b"ab"),
+    ("x13", "abcd", b"bcd"),
+    ("x14", "abcd", b"abcd"),   # Runs past the end: word unchanged
+    ("x40", "abcd", b"abcd"),   # Start at the end: unchanged
+    ("O12", "abcd", b"ad"),
+    ("O04", "abcd", b""),
+    ("O23", "abcd", b"abcd"),
+    ("O40", "abcd", b"abcd"),
+    ("i0!", "abc", b"!abc"),
+    ("i3!", "abc", b"abc!"),    # Insert at len appends
+    ("i4!", "abc", b"abc"),
+    ("o0!", "abc", b"!bc"),
+    ("o2!", "abc", b"ab!"),
+    ("o3!", "abc", b"abc"),     # Overwrite needs an existing byte
+])
+def test_position_bounds(rule, word, expected):
+    assert apply(rule, word) == expected
+
+
+def test_case_and_reverse_work_on_bytes():
+    word = "éa".encode("utf-8")
+    assert apply("u", word) == "éA".encode("utf-8")   # Only ASCII letters change case
+    assert apply("l", "ÉA".encode("utf-8")) == "Éa".encode("utf-8")
+    assert apply("r", word) == b"a" + word[1::-1]     # Byte-wise, as hashcat: splits the UTF-8 sequence
+    assert apply("c", "ébc".encode("utf-8")) == "ébc".encode("utf-8")
+
+
+def test_legacy_fallback():
+    # '0' is no hashcat function, so the line falls back to the old space-separated form
+    assert rules.parse("u $2024 ^The") == [("legacy", (("u", ()), ("$", ("2024",)), ("^", ("The",))))]
+    assert apply("u $2024 ^The", "pass") == b"ThePASS2024"
+    # The old form works on text: Unicode case and reversal by character
+    assert apply("u $!!", "é") == "É!!".encode("utf-8")
+    assert apply("r $xx", "aé") == "éaxx".encode("utf-8")
+    # Valid hashcat keeps hashcat semantics
+    assert rules.parse("u $1") == [("u", ()), ("$", (b"1",))]
+    assert apply("u $1", "é") == "é1".encode("utf-8")
+
+
+def test_invalid_lines_are_skipped():
+    ruleset = rules.RuleSet(["u", "Q", "$", "c $1"])
+    assert ruleset.rules == ["u", "c $1"]
+    assert [line for line, _ in ruleset.invalid] == ["Q", "$"]
+    with pytest.raises(rules.RuleError):
+        rules.parse("Q")
+
+
+def test_ruleset_is_word_major():
+    ruleset = rules.RuleSet([":", "u", "$1", "<3"])
+    assert ruleset.expand([b"ab", b"cdef"]) == [b"ab", b"AB", b"ab1", b"ab", b"cdef", b"CDEF", b"cdef1"]
+
+
+def test_split_rule_functions_match_single(monkeypatch):
+    lines = [f"${i % 10} ^{chr(97 + i % 26)}" for i in range(25)] + ["x13", "<4", "O01"]
+    words = [b"pass", b"ab", b"longword"]
+    expected = rules.RuleSet(lines).expand(words)
+    monkeypatch.setattr(rules, "RULES_PER_FUNCTION", 4)
+    assert rules.RuleSet(lines).expand(words) == expected
+
+
+def test_hit_counts():
+    ruleset = rules.RuleSet([":", "<3", "u"], count_hits=True)
+    ruleset.expand([b"ab", b"abcd", b"AB"])
+    assert ruleset.hits == [3, 2, 3]
+    assert ruleset.unchanged == [3, 2, 1]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_iter_rules_workers_match_serial(tmp_path, monkeypatch, ordered):
+    words = tmp_path / "words.txt"
+    words.write_text("\n".join(f"word{i}é" for i in range(3000)) + "\n", encoding="utf-8")
+    rule_str = "\n".join([":", "u", "r", "$1 $2", "x13", "i2-", "<6", ">7 c", "sa@", "u $2024 ^The"])
+    monkeypatch.setattr(engine, "RULE_BATCH_OUTPUTS", 1000)  # Several batches per worker
+    serial = b"".join(engine.iter_rules(str(words), rule_str))
+    parallel = b"".join(engine.iter_rules(str(words), rule_str, workers=3, ordered=ordered))
+    if ordered:
+        assert parallel == serial
+    else:
+        assert sorted(parallel.splitlines()) == sorted(serial.splitlines())
+    assert serial.count(b"\n") > 3000
@@ -0,0 +1,93 @@
+"""search_in_file on each of its paths against a plain scan."""
+import gzip
+import os
+import threading
+
+import pytest
+
+from core import engine
+
+QUERIES = ["admin", "ADM", "x9", "123", "é", "Zzz", "nomatch", "a"]
+PAGES = [(0, 2000), (0, 5), (37, 10), (10**6, 10)]
+
+
+@pytest.fixture(scope="module")
+def wordlist(tmp_path_factory):
+    words = []
+    for i in range(20000):
+        words.append(f"user{i}")
+        if i % 7 == 0:
+            words.append(f"Admin{i}x9")
+        if i % 101 == 0:
+            words.append(f"café{i}Zzz")
+    path = tmp_path_factory.mktemp("search") / "words.txt"
+    path.write_text("\n".join(words) + "\n", encoding="utf-8")
+    return str(path), words
+
+
+def reference(words, query, skip, limit):
+    hits = [w for w in words if query.lower() in w.lower()]
+    return hits[skip:skip + limit], len(hits)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("skip,limit", PAGES)
+def test_serial(wordlist, query, skip, limit):
+    path, words = wordlist
+    assert engine.search_in_file(path, query, skip, limit, use_index=False) == reference(words, query, skip, limit)
+    assert engine.search_in_file(path, query, skip, limit, count_only=True, use_index=False) == \
+        ([], reference(words, query, skip, limit)[1])
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("skip,limit", PAGES)
+def test_workers(wordlist, monkeypatch, query, skip, limit):
+    path, words = wordlist
+    monkeypatch.setattr(engine, "PARALLEL_SEARCH_MIN", 0)  # Small file, still split over the pool
+    assert engine.search_in_file(path, query, skip, limit, workers=3, use_index=False) == \
+        reference(words, query, skip, limit)
+
+
+@pytest.fixture
+def indexed(wordlist, tmp_path):
+    _, words = wordlist
+    path = tmp_path / "words.txt"
+    path.write_text("\n".join(words) + "\n", encoding="utf-8")
+    assert engine.build_search_index(str(path), block_size=4096) == str(path) + engine.INDEX_SUFFIX
+    return str(path), words
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("skip,limit", PAGES)
+def test_index(indexed, query, skip, limit):
+    path, words = indexed
+    assert engine.TrigramIndex.open(path) is not None
+    assert engine.search_in_file(path, query, skip, limit) == reference(words, query, skip, limit)
+
+
+def test_index_goes_stale(indexed):
+    path, words = indexed
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("admin_late\n")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert engine.TrigramIndex.open(path) is None
+    assert engine.search_in_file(path, "admin_late", 0, 10) == (["admin_late"], 1)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("skip,limit", PAGES)
+def test_gzip(wordlist, tmp_path, query, skip, limit):
+    _, words = wordlist
+    path = tmp_path / "words.txt.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(words) + "\n")
+    assert engine.search_in_file(str(path), query, skip, limit) == reference(words, query, skip, limit)
+
+
+def test_cancel(wordlist):
+    path, _ = wordlist
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(engine.SearchCancelled):
+        engine.search_in_file(path, "user", cancel=cancel, use_index=False)